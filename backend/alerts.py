@@ -0,0 +1,139 @@
+"""Cheap-listing alerts, evaluated on each batch of newly inserted listings.
+
+A rule watches one item (on one server or all of them) for listings at or
+below a unit price, optionally with bonus thresholds. AlertEngine listens
+to the BulkWriter: after every commit it looks at the new listings only,
+and rules are indexed by item id, so a batch costs O(listings + matching
+rules) whatever the number of rules. Matches go to the rule's sink: the
+log, a webhook, or the SSE stream served at /alerts/stream.
+"""
+
+import json
+import operator
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .bonuses import parse_bonus, parse_filter
+    from .events import ALERT, event_bus
+    from .search_index import fold
+except ImportError:  # run directly as `python scraper.py`
+    from bonuses import parse_bonus, parse_filter
+    from events import ALERT, event_bus
+    from search_index import fold
+
+WEBHOOK_TIMEOUT = 5
+
+OPERATORS = {">=": operator.ge, "<=": operator.le, ">": operator.gt, "<": operator.lt, "=": operator.eq}
+
+Rule = namedtuple("Rule", "id item_id server_id max_unit_price bonus_filters sink target")
+
+_webhooks = ThreadPoolExecutor(max_workers=2, thread_name_prefix="alert-webhook")
+
+def _post(url, alert):
+    request = urllib.request.Request(url, data=json.dumps(alert).encode("utf-8"),
+                                     headers={"Content-Type": "application/json"}, method="POST")
+    try:
+        urllib.request.urlopen(request, timeout=WEBHOOK_TIMEOUT).close()
+    except Exception as e:
+        print(f"Alert webhook {url} failed: {e}")
+
+def log_sink(alert, target):
+    print(f"ALERT rule {alert['rule_id']}: {alert['item']} on {alert['server']} at "
+          f"{alert['unit_price']:,} Yang/unit (max {alert['max_unit_price']:,}) from {alert['seller']}")
+
+def webhook_sink(alert, target):
+    # Off the writer's thread: a slow endpoint must not hold up the scrape
+    _webhooks.submit(_post, target, alert)
+
+def stream_sink(alert, target):
+    event_bus.publish({"type": ALERT, **alert})
+
+# Where matches go, by the rule's `sink`; add entries to plug in more
+SINKS = {"log": log_sink, "webhook": webhook_sink, "sse": stream_sink}
+
+def bonus_values(bonuses):
+    """{folded bonus name: value} for a listing's raw bonus texts."""
+    values = {}
+    for text in bonuses:
+        name, value = parse_bonus(text)
+        if value is not None:
+            values[fold(name)] = value
+    return values
+
+def _matches_bonuses(filters, values):
+    return all(key in values and OPERATORS[op](values[key], threshold) for key, op, threshold in filters)
+
+class AlertEngine:
+    """Rules indexed by item id, reloaded when the alert_rules table changes."""
+
+    def __init__(self, sinks=None):
+        self.sinks = SINKS if sinks is None else sinks
+        self._by_item = {}
+        self._version = None
+
+    def refresh(self, conn):
+        """Reloads enabled rules if any rule was added, changed or deleted since the last load."""
+        version = conn.execute("SELECT COUNT(*), MAX(id), MAX(updated_at) FROM alert_rules").fetchone()
+        if version == self._version:
+            return
+        by_item = {}
+        for rule_id, item_id, server_id, max_price, bonus_filters, sink, target in conn.execute("""
+            SELECT id, item_id, server_id, max_unit_price, bonus_filters, sink, target
+            FROM alert_rules WHERE enabled = 1
+        """):
+            filters = [parse_filter(expression) for expression in json.loads(bonus_filters or "[]")]
+            by_item.setdefault(item_id, []).append(
+                Rule(rule_id, item_id, server_id, max_price, filters, sink, target))
+        self._by_item, self._version = by_item, version
+
+    def match(self, server_id, listings):
+        """(rule, listing) pairs for the new listings (dicts as in CommittedBatch.added)."""
+        matches = []
+        for listing in listings:
+            rules = self._by_item.get(listing["item_id"])
+            if not rules:
+                continue
+            unit_price = listing["total_price_yang"] // max(listing["quantity"], 1)
+            values = None
+            for rule in rules:
+                if rule.server_id is not None and rule.server_id != server_id:
+                    continue
+                if unit_price > rule.max_unit_price:
+                    continue
+                if rule.bonus_filters:
+                    # Parsed once per listing, and only if some rule needs it
+                    if values is None:
+                        values = bonus_values(listing["bonuses"])
+                    if not _matches_bonuses(rule.bonus_filters, values):
+                        continue
+                matches.append((rule, listing))
+        return matches
+
+    def on_batch(self, conn, batch):
+        """BulkWriter listener: sends an alert for every rule a new listing satisfies."""
+        if not batch.added:
+            return
+        self.refresh(conn)
+        for rule, listing in self.match(batch.server_id, batch.added):
+            alert = {
+                "rule_id": rule.id,
+                "listing_id": listing["id"],
+                "item": listing["item_name"],
+                "server": batch.server_name,
+                "seller": listing["seller"],
+                "quantity": listing["quantity"],
+                "total_price_yang": listing["total_price_yang"],
+                "unit_price": listing["total_price_yang"] // max(listing["quantity"], 1),
+                "max_unit_price": rule.max_unit_price,
+                "bonuses": listing["bonuses"],
+                "seen_at": batch.at.isoformat(),
+            }
+            sink = self.sinks.get(rule.sink)
+            if sink is None:
+                print(f"Alert rule {rule.id} has unknown sink {rule.sink!r}")
+                continue
+            sink(alert, rule.target)
+
+alert_engine = AlertEngine()
@@ -0,0 +1,111 @@
+"""Structured item bonuses: a normalized bonus type plus a numeric value.
+
+The store shows bonuses as text ('Ortalama Zarar %45', 'Ölümsüzlere karşı
+güçlü +%20', 'Karanlığın gücü 7 (2,1,4)'). The writer splits each one into
+a `bonus_types` row, keyed by the folded name, and a numeric `value_num`,
+so "Ortalama Zarar >= 40" becomes a range scan on the
+(bonus_type_id, value_num, listing_id) index instead of a string scan
+over every listing's bonuses.
+"""
+
+import re
+
+try:
+    from .search_index import fold
+except ImportError:  # run directly as `python scraper.py`
+    from search_index import fold
+
+# Name, then the value with its optional sign/percent decorations, then an optional '(...)' detail
+_BONUS = re.compile(r"^(?P<name>.*?)\s*\+?%?\s*(?P<value>-?\d+(?:[.,]\d+)?)\s*%?\s*(?:\(.*\))?$")
+# 'Ortalama Zarar>=40' as used in the ?bonus= filter
+_FILTER = re.compile(r"^(?P<name>.+?)\s*(?P<op>>=|<=|>|<|=)\s*(?P<value>-?\d+(?:[.,]\d+)?)$")
+
+def parse_bonus(text):
+    """Splits a bonus into (name, value); value is None for bonuses without a number."""
+    text = text.strip()
+    match = _BONUS.match(text)
+    if not match or not match["name"]:
+        return text, None
+    return match["name"], float(match["value"].replace(",", "."))
+
+def value_text(value):
+    """bonus_value as stored: the number without a trailing '.0', or '' for none."""
+    if value is None:
+        return ""
+    return str(int(value)) if value.is_integer() else str(value)
+
+def resolve_types(cursor, names, cache):
+    """Returns {name: bonus_type_id} for bonus names, creating missing types.
+
+    `cache` maps folded names to ids and is filled in place; differently
+    cased or accented spellings of a name share one type.
+    """
+    missing = {fold(name): name for name in names if fold(name) not in cache}
+    if missing:
+        cursor.executemany("INSERT OR IGNORE INTO bonus_types (name, folded) VALUES (?, ?)",
+                           [(name, key) for key, name in missing.items()])
+        for key in missing:
+            cursor.execute("SELECT id FROM bonus_types WHERE folded = ?", (key,))
+            cache[key] = cursor.fetchone()[0]
+    return {name: cache[fold(name)] for name in names}
+
+def bonus_rows(cursor, bonuses, cache):
+    """Parses (listing_id, text) pairs into listing_bonuses rows.
+
+    Rows are (listing_id, bonus_name, bonus_value, bonus_type_id, value_num).
+    """
+    parsed = [(listing_id, text, *parse_bonus(text)) for listing_id, text in bonuses]
+    type_ids = resolve_types(cursor, {name for _, _, name, _ in parsed}, cache)
+    return [
+        (listing_id, text, value_text(value), type_ids[name], value)
+        for listing_id, text, name, value in parsed
+    ]
+
+def backfill(conn):
+    """Parses bonuses stored before they were structured. Returns the rows updated.
+
+    Each distinct bonus text is parsed once; a single UPDATE then fills the
+    rows through SQL functions that look the results up.
+    """
+    cursor = conn.cursor()
+    texts = [row[0] for row in cursor.execute(
+        "SELECT DISTINCT bonus_name FROM listing_bonuses WHERE bonus_type_id IS NULL")]
+    if not texts:
+        return 0
+    parsed = {text: parse_bonus(text) for text in texts}
+    type_ids = resolve_types(cursor, {name for name, _ in parsed.values()}, {})
+    conn.create_function("bonus_type_id", 1, lambda text: type_ids[parsed[text][0]], deterministic=True)
+    conn.create_function("bonus_value_num", 1, lambda text: parsed[text][1], deterministic=True)
+    conn.create_function("bonus_value_text", 1, lambda text: value_text(parsed[text][1]), deterministic=True)
+    cursor.execute("""
+        UPDATE listing_bonuses
+        SET bonus_type_id = bonus_type_id(bonus_name),
+            value_num = bonus_value_num(bonus_name),
+            bonus_value = bonus_value_text(bonus_name)
+        WHERE bonus_type_id IS NULL
+    """)
+    return cursor.rowcount
+
+def parse_filter(expression):
+    """'Ortalama Zarar>=40' -> (folded name, operator, value); ValueError if malformed."""
+    match = _FILTER.match(expression.strip())
+    if not match:
+        raise ValueError(f"Bonus filter must look like 'Ortalama Zarar>=40', got {expression!r}")
+    return fold(match["name"]), match["op"], float(match["value"].replace(",", "."))
+
+def listing_ids_sql(filters, prefix="bonus"):
+    """SQL selecting listing ids that satisfy every (folded name, op, value) filter, with its params.
+
+    Each filter is a range scan on idx_listing_bonuses_type_value; the
+    results are intersected.
+    """
+    selects, params = [], {}
+    for i, (key, op, value) in enumerate(filters):
+        selects.append(f"""
+            SELECT listing_id FROM listing_bonuses
+            WHERE bonus_type_id = (SELECT id FROM bonus_types WHERE folded = :{prefix}_type{i})
+              AND value_num {op} :{prefix}_value{i}
+        """)
+        params[f"{prefix}_type{i}"] = key
+        params[f"{prefix}_value{i}"] = value
+    return " INTERSECT ".join(selects), params
@@ -0,0 +1,113 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright
+
+# Number of isolated contexts/pages (and therefore concurrent jobs) per pool
+DEFAULT_POOL_SIZE = int(os.environ.get("SCRAPER_POOL_SIZE", "4"))
+
+
+class PoolSlot:
+    """One isolated browser context + page leased out to a single job at a time."""
+
+    def __init__(self, index, context, page):
+        self.index = index
+        self.context = context
+        self.page = page
+        # Store state survives between jobs so the next job can skip it
+        self.loaded = False
+        self.server_value = None
+        self.jobs_run = 0
+        # Optional ResponseCapture attached to this page by the scraper
+        self.capture = None
+
+    def reset(self):
+        """Forget page state, e.g. after a job failed half-way."""
+        self.loaded = False
+        self.server_value = None
+
+
+class BrowserPool:
+    """A long-lived Chromium shared by N isolated contexts/pages.
+
+    Jobs lease a slot, drive its page and hand it back. The pool size is the
+    concurrency limit: at most `size` jobs run at once, the rest wait in
+    acquire(). Slots remember the server they last selected, so acquire()
+    prefers an idle slot that is already on the requested server.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, headless=True):
+        self.size = max(1, int(size))
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        self._slots = []
+        self._idle = []
+        self._cond = None
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._cond = asyncio.Condition()
+
+        for i in range(self.size):
+            context = await self._browser.new_context()
+            page = await context.new_page()
+            slot = PoolSlot(i, context, page)
+            self._slots.append(slot)
+            self._idle.append(slot)
+
+        print(f"Browser pool started with {self.size} pages.")
+        return self
+
+    async def close(self):
+        for slot in self._slots:
+            try:
+                await slot.context.close()
+            except Exception:
+                pass
+        self._slots.clear()
+        self._idle.clear()
+
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def acquire(self, server_value=None):
+        """Wait for an idle slot, preferring one already on `server_value`."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._idle)
+
+            slot = next((s for s in self._idle if s.server_value == server_value), None)
+            if slot is None:
+                # Take a fresh page before stealing one that is parked on another server
+                slot = next((s for s in self._idle if s.server_value is None), self._idle[0])
+
+            self._idle.remove(slot)
+            return slot
+
+    async def release(self, slot):
+        slot.jobs_run += 1
+        async with self._cond:
+            self._idle.append(slot)
+            self._cond.notify()
+
+    @asynccontextmanager
+    async def lease(self, server_value=None):
+        slot = await self.acquire(server_value)
+        try:
+            yield slot
+        except Exception:
+            slot.reset()
+            raise
+        finally:
+            await self.release(slot)
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import re
+import time
+
+try:
+    from .metrics import PARSE_FAILURES
+    from .parsing import parse_price, make_listing, parse_listing_rows
+except ImportError:  # run directly as `python scraper.py`
+    from metrics import PARSE_FAILURES
+    from parsing import parse_price, make_listing, parse_listing_rows
+
+# Store responses that carry listing data (XHR/fetch JSON). Override if the store moves its API.
+DATA_URL_PATTERN = os.environ.get("STORE_DATA_URL_PATTERN", r"/api/|/store/(search|items|listings|data)")
+CAPTURE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "fixtures", "captures")
+
+# Keys tried, in order, when a row comes back as a JSON object
+FIELD_ALIASES = {
+    "item_name": ("item_name", "itemName", "name", "item"),
+    "seller": ("seller", "seller_name", "sellerName", "owner", "player"),
+    "quantity": ("quantity", "qty", "count", "amount"),
+    "yang": ("price_yang", "yang", "price"),
+    "won": ("price_won", "won"),
+    "bonuses": ("bonuses", "attributes", "attrs", "bonus"),
+}
+
+# Container keys that hold the row list (DataTables uses "data")
+ROW_KEYS = ("data", "aaData", "items", "results", "listings", "rows")
+
+def _first(row, field):
+    for key in FIELD_ALIASES[field]:
+        if key in row and row[key] is not None:
+            return row[key]
+    return None
+
+def _bonus_text(bonus):
+    if isinstance(bonus, dict):
+        name = bonus.get("name") or bonus.get("bonus_name") or ""
+        value = bonus.get("value") or bonus.get("bonus_value") or ""
+        return f"{name} {value}".strip()
+    return str(bonus).strip()
+
+def _listing_from_object(row):
+    item = _first(row, "item_name")
+    if isinstance(item, dict):
+        item = item.get("name")
+    if not item:
+        return None
+
+    bonuses = _first(row, "bonuses") or []
+    if isinstance(bonuses, str):
+        bonuses = [bonuses]
+
+    return make_listing(
+        str(item).strip(),
+        str(_first(row, "seller") or "Unknown").strip(),
+        parse_price(_first(row, "quantity")) or 1,
+        parse_price(_first(row, "yang")),
+        parse_price(_first(row, "won")),
+        [b for b in (_bonus_text(b) for b in bonuses) if b],
+    )
+
+def listings_from_payload(payload):
+    """Maps a captured store response onto listing dicts.
+
+    Understands a bare row list or a container such as DataTables'
+    {"data": [...], "recordsFiltered": N}. Rows may be objects, or arrays of
+    cell markup laid out like the rendered table. Returns None when the
+    payload does not look like listing data, so callers can fall back to
+    parsing the page HTML.
+    """
+    rows = payload
+    if isinstance(payload, dict):
+        rows = next((payload[k] for k in ROW_KEYS if isinstance(payload.get(k), list)), None)
+    if not isinstance(rows, list):
+        return None
+    if not rows:
+        return []
+
+    if all(isinstance(r, (list, tuple)) for r in rows):
+        # Cells carry the same markup as the rendered <td>s; parse them as one small table
+        html = "<table><tbody>" + "".join(
+            "<tr>" + "".join(f"<td>{cell}</td>" for cell in r) + "</tr>" for r in rows
+        ) + "</tbody></table>"
+        return parse_listing_rows(html) or []
+
+    if all(isinstance(r, dict) for r in rows):
+        listings = [_listing_from_object(r) for r in rows]
+        if not any(listings):
+            return None
+        kept = [l for l in listings if l]
+        if len(kept) < len(listings):
+            PARSE_FAILURES.inc(len(listings) - len(kept), parser="payload")
+        return kept
+
+    return None
+
+class ResponseCapture:
+    """Records the store's data responses on a page via response interception.
+
+    Attach once per page; each matching JSON response is queued so the scraper
+    can await the next results payload instead of waiting on networkidle and
+    re-parsing the DOM. With `record_dir` set, payloads are also written out
+    as fixtures for offline replay.
+    """
+
+    def __init__(self, url_pattern=DATA_URL_PATTERN, record_dir=None):
+        self.url_pattern = re.compile(url_pattern)
+        self.record_dir = record_dir
+        self.recorded = 0
+        self._queue = asyncio.Queue()
+
+    def attach(self, page):
+        page.on("response", self.on_response)
+        return self
+
+    def matches(self, response):
+        if response.request.resource_type not in ("xhr", "fetch"):
+            return False
+        if not self.url_pattern.search(response.url):
+            return False
+        return "json" in response.headers.get("content-type", "")
+
+    def on_response(self, response):
+        if self.matches(response):
+            asyncio.ensure_future(self._read(response))
+
+    async def _read(self, response):
+        try:
+            payload = await response.json()
+        except Exception:
+            return
+        if self.record_dir:
+            self.record(response.url, payload)
+        self._queue.put_nowait(payload)
+
+    def record(self, url, payload):
+        os.makedirs(self.record_dir, exist_ok=True)
+        self.recorded += 1
+        path = os.path.join(self.record_dir, f"capture_{int(time.time())}_{self.recorded:04d}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"url": url, "payload": payload}, f, ensure_ascii=False)
+
+    def clear(self):
+        """Drops payloads left over from a previous search."""
+        while not self._queue.empty():
+            self._queue.get_nowait()
+
+    async def next_payload(self, timeout=10):
+        """Waits for the next data response; None if none arrives in time."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
@@ -0,0 +1,122 @@
+"""Record/replay corpus of store result pages for offline pipeline runs.
+
+Recording (`python scraper.py --query ... --record-corpus`, or
+SCRAPER_RECORD_CORPUS=1 / a directory) saves every result page the scraper
+reads as <root>/<server>/<query>/page_NNN.json, holding the rows' cell
+markup exactly as rendered. Replay serves a corpus through StubStore, whose
+page has the store's search input, server <select> and `>` pager, so the
+real scrape_store, save_to_db and analyze_market run end to end without
+network access (bench_pipeline.py). Without a recorded corpus,
+`python corpus.py synth` writes one from the stub store's generator.
+"""
+
+import argparse
+import json
+import os
+from glob import glob
+from urllib.parse import quote
+
+from bs4 import BeautifulSoup
+
+try:
+    from .stub_store import STUB_ITEMS, STUB_SERVERS, StubStore, generate_listings, render_cells
+except ImportError:  # run directly as `python corpus.py`
+    from stub_store import STUB_ITEMS, STUB_SERVERS, StubStore, generate_listings, render_cells
+
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "fixtures", "corpus")
+
+def page_path(root, server_name, query, page):
+    # Queries carry spaces, '+' and Turkish letters; quoting keeps them one path segment
+    return os.path.join(root, quote(server_name, safe=""), quote(query.strip(), safe=""), f"page_{page:03d}.json")
+
+def rows_from_html(html):
+    """Cell markup of each data row in a rendered results table (the 'No data' row has none)."""
+    rows = []
+    for tr in BeautifulSoup(html, "html.parser").select("tbody tr"):
+        cells = tr.find_all("td")
+        if len(cells) >= 5:
+            rows.append([cell.decode_contents() for cell in cells])
+    return rows
+
+def write_page(root, server_name, server_value, query, page, rows):
+    path = page_path(root, server_name, query, page)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"server": server_name, "server_value": server_value, "query": query.strip(),
+                   "page": page, "rows": rows}, f, ensure_ascii=False)
+    return path
+
+def record_page(root, server_name, server_value, query, page, html):
+    """Saves one result page the scraper read; returns its row count."""
+    rows = rows_from_html(html)
+    write_page(root, server_name, server_value, query, page, rows)
+    return len(rows)
+
+def synthesize(root, servers=STUB_SERVERS, items=STUB_ITEMS, page_size=20):
+    """Writes a corpus from the stub store's generator; returns the number of pages."""
+    pages = 0
+    for server_name, server_value in servers.items():
+        for item in items:
+            for query in [item] + [f"{item}+{i}" for i in range(10)]:
+                rows = [render_cells(listing) for listing in generate_listings(server_value, query)]
+                for start in range(0, len(rows), page_size):
+                    write_page(root, server_name, server_value, query, start // page_size + 1,
+                               rows[start:start + page_size])
+                    pages += 1
+    return pages
+
+class Corpus:
+    """A recorded corpus, loaded for replay through StubStore.
+
+    Pages of a query are served concatenated and re-split by the largest
+    recorded page, which reproduces the store's paging as long as it used
+    one page size.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or CORPUS_DIR
+        self.servers = {}  # server name -> select value
+        self.rows = {}     # (server value, query) -> rows in page order
+        self.pages = 0
+        self.page_size = 0
+        by_query = {}
+        for path in glob(os.path.join(self.root, "*", "*", "page_*.json")):
+            with open(path, encoding="utf-8") as f:
+                page = json.load(f)
+            self.servers[page["server"]] = page["server_value"]
+            by_query.setdefault((page["server_value"], page["query"]), {})[page["page"]] = page["rows"]
+            self.pages += 1
+            self.page_size = max(self.page_size, len(page["rows"]))
+        for key, pages in by_query.items():
+            self.rows[key] = [row for number in sorted(pages) for row in pages[number]]
+
+    def source(self, server_value, query):
+        return self.rows.get((server_value, query.strip()), [])
+
+    def searches(self):
+        """(server name, search) pairs whose scrape_store query queues cover the recorded queries.
+
+        A base name expands to its +0..+9 variants, so those are not searched on their own.
+        """
+        names = {value: name for name, value in self.servers.items()}
+        recorded = set(self.rows)
+        return sorted((names[value], query) for value, query in recorded
+                      if "+" not in query or (value, query.rsplit("+", 1)[0]) not in recorded)
+
+    def store(self, latency=0.0):
+        return StubStore(latency, self.page_size or 20, self.source, render=lambda cells: cells,
+                         servers=self.servers)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fixture corpus of store result pages")
+    parser.add_argument("command", choices=["synth", "stats"])
+    parser.add_argument("--root", default=CORPUS_DIR)
+    args = parser.parse_args()
+
+    if args.command == "synth":
+        print(f"Wrote {synthesize(args.root)} pages to {args.root}")
+    else:
+        corpus = Corpus(args.root)
+        rows = sum(len(r) for r in corpus.rows.values())
+        print(f"{len(corpus.servers)} servers, {len(corpus.rows)} queries, {corpus.pages} pages, {rows:,} rows "
+              f"(page size {corpus.page_size})")
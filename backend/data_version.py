@@ -0,0 +1,58 @@
+"""Data versions: when the data behind an API response last changed.
+
+Every commit that changes listings or price history bumps the version of
+each (server, item) it touched, in the same transaction. Versions are drawn
+from one global counter (the server_id = 0, item_id = 0 row), so the newest
+version over any set of (server, item) pairs tells whether anything in it
+changed since, including items or servers that did not exist yet. The API's
+response cache (response_cache.py) keys its entries on these.
+"""
+
+try:
+    from .search_index import item_ids_sql
+except ImportError:  # run directly as `python scraper.py`
+    from search_index import item_ids_sql
+
+def bump(cursor, pairs=()):
+    """Gives every (server_id, item_id) in `pairs` a new version; returns it.
+
+    Call inside the transaction that made the change. With no pairs only the
+    global counter moves, which invalidates responses covering the whole
+    database (server list, item search, top items).
+    """
+    version = cursor.execute("""
+        UPDATE data_versions SET version = version + 1 WHERE server_id = 0 AND item_id = 0 RETURNING version
+    """).fetchone()[0]
+    cursor.executemany("""
+        INSERT INTO data_versions (server_id, item_id, version) VALUES (?, ?, ?)
+        ON CONFLICT (server_id, item_id) DO UPDATE SET version = excluded.version
+    """, [(server_id, item_id, version) for server_id, item_id in set(pairs)])
+    return version
+
+def _names(column, table, names, prefix, params):
+    placeholders = []
+    for i, name in enumerate(names):
+        params[f"{prefix}{i}"] = name
+        placeholders.append(f":{prefix}{i}")
+    return f"{column} IN (SELECT id FROM {table} WHERE name IN ({', '.join(placeholders)}))"
+
+def current(conn, servers=(), items=(), search=None):
+    """Newest version of the data a response depends on.
+
+    `servers` and `items` are names, `search` an item search as in
+    item_ids_sql; each one left out means "all". With none of them this is
+    the global counter, a single-row lookup.
+    """
+    if not servers and not items and not search:
+        return conn.execute("SELECT version FROM data_versions WHERE server_id = 0 AND item_id = 0").fetchone()[0]
+    where, params = [], {}
+    if servers:
+        where.append(_names("server_id", "servers", servers, "server", params))
+    if items:
+        where.append(_names("item_id", "items", items, "item", params))
+    if search:
+        match_sql, match_params = item_ids_sql(search)
+        where.append(f"item_id IN ({match_sql})")
+        params.update(match_params)
+    return conn.execute(f"SELECT COALESCE(MAX(version), 0) FROM data_versions WHERE {' AND '.join(where)}",
+                        params).fetchone()[0]
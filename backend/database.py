@@ -1,15 +1,168 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import sqlite3
+
+try:
+    from .parsing import fingerprint
+    from .search_index import sync_items
+    from .market_summary import rebuild as rebuild_summary
+    from .price_stats import STAT_COLUMNS
+    from .history_rollup import rebuild as rebuild_rollups
+    from .bonuses import backfill as backfill_bonuses
+    from .metrics import trace_queries
+except ImportError:  # imported by scraper.py run as a script
+    from parsing import fingerprint
+    from search_index import sync_items
+    from market_summary import rebuild as rebuild_summary
+    from price_stats import STAT_COLUMNS
+    from history_rollup import rebuild as rebuild_rollups
+    from bonuses import backfill as backfill_bonuses
+    from metrics import trace_queries
 
 # Connect to the same DB as the scraper
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "metin2.db")
+DB_PATH = os.environ.get("METIN2_DB_PATH", os.path.join(os.path.dirname(__file__), "..", "data", "metin2.db"))
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "database", "schema.sql")
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{DB_PATH}"
 
+# Pragma profile shared by the scraper's raw connections and the API engine.
+# WAL lets API readers keep reading while a scrape commits; NORMAL sync is safe under WAL.
+# Set METIN2_SQLITE_PROFILE=default to run on SQLite's stock settings (for benchmarks).
+SQLITE_PROFILE = os.environ.get("METIN2_SQLITE_PROFILE", "tuned")
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,        # ms to wait on a lock instead of failing with "database is locked"
+    "cache_size": -64000,        # ~64 MB page cache per connection
+    "mmap_size": 268435456,      # 256 MB memory-mapped reads
+    "temp_store": "MEMORY",
+}
+
+def apply_pragmas(conn):
+    """Applies the pragma profile to a DB-API sqlite3 connection."""
+    if SQLITE_PROFILE == "default":
+        return
+    cursor = conn.cursor()
+    for name, value in PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+def connect(db_path=None, **kwargs):
+    """Opens a raw sqlite3 connection with the shared pragma profile."""
+    conn = sqlite3.connect(db_path or DB_PATH, **kwargs)
+    apply_pragmas(conn)
+    trace_queries(conn)
+    return conn
+
+def migrate_listings(conn):
+    """Adds the incremental-sync columns to a listings table created before them.
+
+    Existing rows get their fingerprint backfilled so the first sync after the
+    upgrade recognises them instead of re-inserting everything.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(listings)")}
+    if not columns:
+        return  # fresh database, schema.sql creates the full table
+    if "fingerprint" not in columns:
+        conn.execute("ALTER TABLE listings ADD COLUMN fingerprint TEXT")
+    if "removed_at" not in columns:
+        conn.execute("ALTER TABLE listings ADD COLUMN removed_at TIMESTAMP")
+
+    conn.create_function("listing_fingerprint", 4, fingerprint, deterministic=True)
+    conn.execute("""
+        UPDATE listings
+        SET fingerprint = listing_fingerprint(
+            (SELECT name FROM items WHERE items.id = listings.item_id),
+            seller_name, total_price_yang, quantity)
+        WHERE fingerprint IS NULL
+    """)
+    conn.commit()
+
+def migrate_listing_bonuses(conn):
+    """Adds the structured bonus columns to a listing_bonuses table created before them.
+
+    init_db fills them for the existing rows once bonus_types exists.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(listing_bonuses)")}
+    if not columns:
+        return
+    if "bonus_type_id" not in columns:
+        conn.execute("ALTER TABLE listing_bonuses ADD COLUMN bonus_type_id INTEGER")
+        conn.execute("ALTER TABLE listing_bonuses ADD COLUMN value_num REAL")
+    conn.commit()
+
+def migrate_price_history(conn):
+    """Adds the series keys and robust-stat columns to a price_history table created before them.
+
+    Older history points keep NULL stats and a NULL server (they were taken
+    over every server at once); their item_id is backfilled from the name.
+    Rollups keyed by name alone are dropped and rebuilt by init_db.
+    """
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(price_history)")}
+    if not columns:
+        return
+    for column in STAT_COLUMNS:
+        if column not in columns:
+            conn.execute(f"ALTER TABLE price_history ADD COLUMN {column} BIGINT")
+    if "item_id" not in columns:
+        conn.execute("ALTER TABLE price_history ADD COLUMN item_id INTEGER")
+        conn.execute("ALTER TABLE price_history ADD COLUMN server_id INTEGER")
+        conn.execute("""
+            INSERT OR IGNORE INTO items (name, category)
+            SELECT DISTINCT item_name, 'General' FROM price_history
+        """)
+        conn.execute("""
+            UPDATE price_history SET item_id = (SELECT id FROM items WHERE items.name = price_history.item_name)
+        """)
+    rollup_columns = {row[1] for row in conn.execute("PRAGMA table_info(price_history_rollup)")}
+    if rollup_columns and "server_id" not in rollup_columns:
+        conn.execute("DROP TABLE price_history_rollup")
+    conn.commit()
+
+def init_db(db_path=None):
+    """Creates or upgrades the schema, including its indexes."""
+    db_path = db_path or DB_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    # Lets retention hand freed pages back to the OS. Only takes effect on a new, empty database,
+    # before WAL writes its header (`python retention.py --vacuum` converts an existing one)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    apply_pragmas(conn)
+
+    # Older databases predate the incremental-sync columns; add them before the schema's indexes
+    migrate_listings(conn)
+    migrate_listing_bonuses(conn)
+    migrate_price_history(conn)
+
+    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
+        conn.executescript(f.read())
+
+    # Index items stored before the search index existed
+    sync_items(conn)
+    # Bonuses stored as text only
+    backfill_bonuses(conn)
+    # Listings stored before market_summary existed
+    if conn.execute("SELECT 1 FROM market_summary LIMIT 1").fetchone() is None \
+            and conn.execute("SELECT 1 FROM listings WHERE removed_at IS NULL LIMIT 1").fetchone():
+        rebuild_summary(conn)
+    # History recorded before the chart rollups existed
+    if conn.execute("SELECT 1 FROM price_history_rollup LIMIT 1").fetchone() is None \
+            and conn.execute("SELECT 1 FROM price_history LIMIT 1").fetchone():
+        rebuild_rollups(conn)
+    conn.commit()
+    conn.close()
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    apply_pragmas(dbapi_connection)
+    # Also sees what routers run on the driver connection directly, past SQLAlchemy
+    trace_queries(dbapi_connection)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -23,32 +23,156 @@ CREATE TABLE IF NOT EXISTS listings (
     price_won INTEGER DEFAULT 0,
     price_yang INTEGER DEFAULT 0,
     total_price_yang BIGINT, -- Calculated total value for sorting
-    seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, -- First time this listing was scraped
+    fingerprint TEXT, -- Hash of the scraper's dedup signature (item, seller, total price, quantity)
+    removed_at TIMESTAMP, -- Set when the listing vanished from the store (sold/removed); NULL while active
     FOREIGN KEY(server_id) REFERENCES servers(id),
     FOREIGN KEY(item_id) REFERENCES items(id)
 );
 
--- Item Bonuses/Attributes (e.g., "Ortalama Zarar 45%")
+-- Bonus Types: normalized bonus names ("Ortalama Zarar"), matched by their folded form (see bonuses.py)
+CREATE TABLE IF NOT EXISTS bonus_types (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    folded TEXT NOT NULL,
+    UNIQUE(folded)
+);
+
+-- Item Bonuses/Attributes (e.g., "Ortalama Zarar %45")
 CREATE TABLE IF NOT EXISTS listing_bonuses (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     listing_id INTEGER,
-    bonus_name TEXT NOT NULL,
-    bonus_value TEXT,
-    FOREIGN KEY(listing_id) REFERENCES listings(id)
+    bonus_name TEXT NOT NULL, -- text as shown by the store
+    bonus_value TEXT, -- numeric part of the text, '' if it has none
+    bonus_type_id INTEGER,
+    value_num REAL, -- NULL for bonuses without a number
+    FOREIGN KEY(listing_id) REFERENCES listings(id),
+    FOREIGN KEY(bonus_type_id) REFERENCES bonus_types(id)
 );
 
 -- Price History (Market Analysis)
 CREATE TABLE IF NOT EXISTS price_history (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    item_name TEXT NOT NULL,
+    item_id INTEGER,
+    server_id INTEGER, -- NULL for points recorded before history was kept per server
+    item_name TEXT NOT NULL, -- display name, kept for exports
     avg_unit_price BIGINT,
     min_unit_price BIGINT,
     total_listings INTEGER,
-    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    -- Robust stats (see price_stats.py); trimmed/weighted use only listings inside the IQR fences
+    median_unit_price BIGINT,
+    p10_unit_price BIGINT,
+    p25_unit_price BIGINT,
+    p75_unit_price BIGINT,
+    p90_unit_price BIGINT,
+    trimmed_mean_unit_price BIGINT,
+    weighted_unit_price BIGINT
+);
+
+-- Price History Rollups: OHLC of min_unit_price per item, server and bucket ('15m', '1h', '1d', '1w')
+CREATE TABLE IF NOT EXISTS price_history_rollup (
+    item_id INTEGER NOT NULL,
+    server_id INTEGER NOT NULL DEFAULT 0, -- 0 for history without a server
+    bucket TEXT NOT NULL,
+    bucket_start TIMESTAMP NOT NULL,
+    open_min_price BIGINT,
+    high_min_price BIGINT,
+    low_min_price BIGINT,
+    close_min_price BIGINT,
+    sum_avg_price BIGINT, -- avg_unit_price summed over the bucket's points
+    sum_listings INTEGER,
+    points INTEGER NOT NULL,
+    first_at TIMESTAMP,
+    last_at TIMESTAMP,
+    PRIMARY KEY (item_id, server_id, bucket, bucket_start)
+);
+
+-- Market Summary: stats of the active listings per item and server, maintained by the writer
+CREATE TABLE IF NOT EXISTS market_summary (
+    item_id INTEGER NOT NULL,
+    server_id INTEGER NOT NULL,
+    listing_count INTEGER NOT NULL,
+    min_unit_price BIGINT,
+    sum_unit_price BIGINT,
+    sketch BLOB, -- PriceSketch (log-bucketed unit-price histogram) for percentiles
+    updated_at TIMESTAMP,
+    PRIMARY KEY (item_id, server_id),
+    FOREIGN KEY(item_id) REFERENCES items(id),
+    FOREIGN KEY(server_id) REFERENCES servers(id)
 );
 
+-- Watchlist: (query, server) pairs the scheduler keeps fresh, each on its own adaptive interval
+CREATE TABLE IF NOT EXISTS watchlist (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    server_id INTEGER NOT NULL,
+    enabled INTEGER DEFAULT 1,
+    interval_minutes REAL, -- Last interval chosen from price volatility
+    volatility REAL, -- Coefficient of variation of recent min unit prices
+    last_run_at TIMESTAMP,
+    next_run_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(query, server_id),
+    FOREIGN KEY(server_id) REFERENCES servers(id)
+);
+
+-- Alert Rules: notify through `sink` when a new listing of the item is at or below max_unit_price
+CREATE TABLE IF NOT EXISTS alert_rules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_id INTEGER NOT NULL,
+    server_id INTEGER, -- NULL for every server
+    max_unit_price BIGINT NOT NULL,
+    bonus_filters TEXT, -- JSON list of bonus thresholds like "Ortalama Zarar>=40" (see bonuses.parse_filter)
+    sink TEXT NOT NULL DEFAULT 'log', -- 'log', 'webhook' or 'sse' (see alerts.SINKS)
+    target TEXT, -- Webhook URL
+    enabled INTEGER DEFAULT 1,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY(item_id) REFERENCES items(id),
+    FOREIGN KEY(server_id) REFERENCES servers(id)
+);
+
+-- Data versions: bumped per (server, item) by every commit that changes its listings or history
+-- (see data_version.py); the (0, 0) row is the global counter versions are drawn from
+CREATE TABLE IF NOT EXISTS data_versions (
+    server_id INTEGER NOT NULL,
+    item_id INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (server_id, item_id)
+) WITHOUT ROWID;
+INSERT OR IGNORE INTO data_versions (server_id, item_id, version) VALUES (0, 0, 0);
+
+-- Retention (see retention.py): data at `resolution` ('raw' = price_history, or a rollup bucket)
+-- older than pruned_before has been deleted
+CREATE TABLE IF NOT EXISTS retention_watermarks (
+    resolution TEXT PRIMARY KEY,
+    pruned_before TIMESTAMP NOT NULL
+);
+
+-- Item-name search: trigram index over folded names (see search_index.py), rowid = items.id
+CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(folded, tokenize='trigram');
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_listings_item_server ON listings(item_id, server_id);
 CREATE INDEX IF NOT EXISTS idx_listings_seen_at ON listings(seen_at);
-CREATE INDEX IF NOT EXISTS idx_price_history_item ON price_history(item_name);
-CREATE INDEX IF NOT EXISTS idx_price_history_timestamp ON price_history(timestamp);
\ No newline at end of file
+-- Keyset pagination per server (the rowid/id tie-breaker is implicit in every index)
+CREATE INDEX IF NOT EXISTS idx_listings_server_seen ON listings(server_id, seen_at);
+CREATE INDEX IF NOT EXISTS idx_listings_server_price ON listings(server_id, total_price_yang);
+CREATE INDEX IF NOT EXISTS idx_listing_bonuses_listing ON listing_bonuses(listing_id);
+-- Bonus threshold filters ("Ortalama Zarar >= 40") as range scans
+CREATE INDEX IF NOT EXISTS idx_listing_bonuses_type_value ON listing_bonuses(bonus_type_id, value_num, listing_id);
+-- LIKE is case-insensitive, so only a NOCASE index can serve prefix lookups ('Dolunay%')
+CREATE INDEX IF NOT EXISTS idx_items_name_nocase ON items(name COLLATE NOCASE);
+-- Per-series history in time order; supersedes the older item_name indexes
+CREATE INDEX IF NOT EXISTS idx_price_history_series ON price_history(item_id, server_id, timestamp);
+DROP INDEX IF EXISTS idx_price_history_item_time;
+DROP INDEX IF EXISTS idx_price_history_item;
+CREATE INDEX IF NOT EXISTS idx_price_history_timestamp ON price_history(timestamp);
+CREATE INDEX IF NOT EXISTS idx_watchlist_due ON watchlist(enabled, next_run_at);
+CREATE INDEX IF NOT EXISTS idx_alert_rules_item ON alert_rules(item_id);
+-- Response cache checks scoped to items on every server
+CREATE INDEX IF NOT EXISTS idx_data_versions_item ON data_versions(item_id, version);
+-- Retention deletes oldest first, a batch at a time
+CREATE INDEX IF NOT EXISTS idx_price_history_rollup_age ON price_history_rollup(bucket, bucket_start);
+CREATE INDEX IF NOT EXISTS idx_listings_removed ON listings(removed_at) WHERE removed_at IS NOT NULL;
\ No newline at end of file
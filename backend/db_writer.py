@@ -0,0 +1,202 @@
+from collections import namedtuple
+from datetime import datetime
+
+try:
+    from .database import connect
+    from .parsing import fingerprint
+    from .search_index import sync_items
+    from .market_summary import apply_changes
+    from .bonuses import bonus_rows
+    from .data_version import bump
+except ImportError:  # run directly as `python scraper.py`
+    from database import connect
+    from parsing import fingerprint
+    from search_index import sync_items
+    from market_summary import apply_changes
+    from bonuses import bonus_rows
+    from data_version import bump
+
+# Stay well below SQLite's bound-parameter limit for IN (...) lookups
+LOOKUP_CHUNK = 500
+
+# What a committed batch changed, for BulkWriter.listeners. `added` holds a dict
+# per inserted listing; `removed` holds (listing_id, item_id, total_price_yang, quantity).
+CommittedBatch = namedtuple("CommittedBatch", "server_id server_name added removed at")
+
+def _chunks(seq, size=LOOKUP_CHUNK):
+    for i in range(0, len(seq), size):
+        yield seq[i:i + size]
+
+class BulkWriter:
+    """Writes scraped listings in batches over one long-lived connection.
+
+    Item and server names are resolved set-wise and cached in-process, and
+    listings plus bonuses go in with executemany inside a single transaction
+    per batch. Keep one writer for a whole sweep and close() it at the end.
+
+    Batches are synced incrementally against what is stored: only new
+    listings are inserted, vanished ones get `removed_at` set, and unchanged
+    rows are not touched, so `seen_at` keeps meaning "first seen". The same
+    changes are folded into market_summary before the batch commits.
+
+    After each commit every callable in `listeners` gets (conn, CommittedBatch).
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        # Autocommit mode: transactions are opened explicitly per batch
+        self.conn = connect(db_path, isolation_level=None, check_same_thread=False)
+        self._item_ids = {}
+        self._server_ids = {}
+        self._bonus_type_ids = {}
+        self.listeners = []
+
+    def close(self):
+        self.conn.close()
+
+    def server_id(self, server_name):
+        if server_name not in self._server_ids:
+            cursor = self.conn.cursor()
+            cursor.execute("INSERT OR IGNORE INTO servers (name) VALUES (?)", (server_name,))
+            cursor.execute("SELECT id FROM servers WHERE name=?", (server_name,))
+            self._server_ids[server_name] = cursor.fetchone()[0]
+        return self._server_ids[server_name]
+
+    def resolve_items(self, names):
+        """Returns {name: item_id}, creating missing items in one pass."""
+        missing = [n for n in set(names) if n not in self._item_ids]
+        if missing:
+            cursor = self.conn.cursor()
+            cursor.executemany("INSERT OR IGNORE INTO items (name, category) VALUES (?, ?)",
+                               [(n, "General") for n in missing])
+            sync_items(self.conn)
+            for chunk in _chunks(missing):
+                placeholders = ",".join("?" * len(chunk))
+                cursor.execute(f"SELECT name, id FROM items WHERE name IN ({placeholders})", chunk)
+                self._item_ids.update(cursor.fetchall())
+        return {n: self._item_ids[n] for n in names}
+
+    def _next_listing_id(self, cursor):
+        # Ids are handed out up front so bonuses can reference them in the same executemany.
+        # Safe because BEGIN IMMEDIATE holds the write lock for the whole batch.
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'listings'")
+        row = cursor.fetchone()
+        seq = row[0] if row else 0
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM listings")
+        return max(seq, cursor.fetchone()[0]) + 1
+
+    def _scope_item_ids(self, cursor, item_ids, search_query):
+        """Items whose stored listings this batch is authoritative for.
+
+        That is every item the batch returned, plus the item named exactly
+        like the query (so a fully sold-out item still gets its listings
+        closed). A generic 'Dolunay Kılıcı' query therefore never touches the
+        '+N' buckets unless the store actually returned them.
+        """
+        scope = set(item_ids.values())
+        if search_query:
+            cursor.execute("SELECT id FROM items WHERE name = ?", (search_query,))
+            scope.update(row[0] for row in cursor.fetchall())
+        return list(scope)
+
+    def _active_listings(self, cursor, server_id, scope):
+        """Returns {fingerprint: [(listing_id, item_id, total_price_yang, quantity), ...]} of active listings in scope."""
+        active = {}
+        for chunk in _chunks(scope):
+            placeholders = ",".join("?" * len(chunk))
+            cursor.execute(f"""
+                SELECT id, fingerprint, item_id, total_price_yang, quantity FROM listings
+                WHERE server_id = ? AND item_id IN ({placeholders}) AND removed_at IS NULL
+            """, [server_id, *chunk])
+            for listing_id, fp, *values in cursor.fetchall():
+                active.setdefault(fp, []).append((listing_id, *values))
+        return active
+
+    @staticmethod
+    def _added(listing_rows, new_items):
+        return [{
+            "id": row[0], "item_id": row[2], "item_name": item['item_name'], "seller": row[3],
+            "quantity": row[4], "price_won": row[5], "price_yang": row[6], "total_price_yang": row[7],
+            "bonuses": item['bonuses'],
+        } for row, (_, item) in zip(listing_rows, new_items)]
+
+    def _notify(self, batch):
+        for listener in self.listeners:
+            try:
+                listener(self.conn, batch)
+            except Exception as e:
+                # The batch is committed; a failing listener must not fail the scrape
+                print(f"Listener {listener!r} failed: {e}")
+
+    def write(self, listings, search_query, server_name):
+        """Syncs the stored listings for (server, query) to `listings`.
+
+        Returns counts of inserted, removed and unchanged listings.
+        """
+        now = datetime.now()
+        cursor = self.conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            server_id = self.server_id(server_name)
+            item_ids = self.resolve_items([item['item_name'] for item in listings])
+            active = self._active_listings(cursor, server_id, self._scope_item_ids(cursor, item_ids, search_query))
+
+            new_items = []
+            for item in listings:
+                fp = fingerprint(item['item_name'], item['seller'], item['total_yang'], item['quantity'])
+                if active.get(fp):
+                    # Still listed: claim the stored row and leave it alone
+                    active[fp].pop()
+                else:
+                    new_items.append((fp, item))
+
+            # Whatever was not claimed has vanished from the store
+            vanished = [row for rows in active.values() for row in rows]
+            cursor.executemany("UPDATE listings SET removed_at = ? WHERE id = ?",
+                               [(now, row[0]) for row in vanished])
+
+            next_id = self._next_listing_id(cursor)
+            listing_rows = []
+            bonuses = []
+            for offset, (fp, item) in enumerate(new_items):
+                listing_id = next_id + offset
+                listing_rows.append((listing_id, server_id, item_ids[item['item_name']], item['seller'],
+                                     item['quantity'], item['price_won'], item['price_yang'], item['total_yang'],
+                                     now, fp))
+                bonuses.extend((listing_id, bonus) for bonus in item['bonuses'] if bonus)
+
+            cursor.executemany("""
+                INSERT INTO listings (id, server_id, item_id, seller_name, quantity, price_won, price_yang,
+                                      total_price_yang, seen_at, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, listing_rows)
+            # Split into bonus type and numeric value now so bonus filters are index range scans
+            cursor.executemany("""
+                INSERT INTO listing_bonuses (listing_id, bonus_name, bonus_value, bonus_type_id, value_num)
+                VALUES (?, ?, ?, ?, ?)
+            """, bonus_rows(cursor, bonuses, self._bonus_type_ids))
+            apply_changes(cursor, server_id,
+                          [(row[2], row[7], row[4]) for row in listing_rows],
+                          [row[1:] for row in vanished], now)
+            # Cached API responses over the (server, item) pairs that changed are now stale
+            changed = {(server_id, row[2]) for row in listing_rows} | {(server_id, row[1]) for row in vanished}
+            if changed:
+                bump(cursor, changed)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            # Cached ids may belong to rows that were just rolled back
+            self._item_ids.clear()
+            self._server_ids.clear()
+            self._bonus_type_ids.clear()
+            raise
+
+        if self.listeners:
+            self._notify(CommittedBatch(server_id, server_name, self._added(listing_rows, new_items),
+                                        vanished, now))
+
+        return {
+            "inserted": len(listing_rows),
+            "removed": len(vanished),
+            "unchanged": len(listings) - len(listing_rows),
+        }
@@ -0,0 +1,153 @@
+"""In-process pub/sub of market changes, for live dashboards.
+
+The scraper publishes as it commits: `listing-added` and `listing-removed`
+from the BulkWriter (publish_batch is one of its listeners), `history-point`
+from analyze_market, and `alert` from alert rules with the 'sse' sink.
+Subscribers (the SSE endpoints) filter by event type, server and item;
+subscriptions naming items are indexed by item name, so a batch is only
+offered to the clients that asked for it. Every event is a dict with
+"type", "item" and "server" keys.
+
+Subscribers live in this process: a scraper running on its own (e.g.
+`python scheduler.py`) has no one to publish to, and publishing is skipped.
+"""
+
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+
+try:
+    from .search_index import fold, search_terms
+except ImportError:  # run directly as `python scraper.py`
+    from search_index import fold, search_terms
+
+LISTING_ADDED = "listing-added"
+LISTING_REMOVED = "listing-removed"
+HISTORY_POINT = "history-point"
+ALERT = "alert"
+EVENT_TYPES = (LISTING_ADDED, LISTING_REMOVED, HISTORY_POINT, ALERT)
+
+# Events buffered per client; past that it is too slow and misses events
+# (the SSE endpoint then tells it to resync)
+STREAM_BUFFER = 1000
+LOOKUP_CHUNK = 500
+
+class Subscription:
+    """One client's filters and queue. None means "any" for each filter."""
+
+    def __init__(self, loop, buffer, types=None, servers=None, items=None, query=None):
+        self.loop = loop
+        self.queue = asyncio.Queue(buffer)
+        self.types = set(types) if types else None
+        self.servers = set(servers) if servers else None
+        self.items = set(items) if items else None
+        self.terms = search_terms(query) if query else None
+        # Events lost to a full queue since the client last caught up
+        self.dropped = 0
+
+    def wants(self, event):
+        if self.types is not None and event["type"] not in self.types:
+            return False
+        if self.servers is not None and event["server"] not in self.servers:
+            return False
+        if self.terms is not None:
+            name = fold(event["item"])
+            return any(term in name for term in self.terms)
+        return True
+
+    def offer(self, events):
+        # Runs on the subscriber's event loop
+        for event in events:
+            if self.queue.full():
+                self.dropped += 1
+            else:
+                self.queue.put_nowait(event)
+
+class EventBus:
+    """Fan-out of events to subscribers on any event loop.
+
+    publish() may be called from any thread; each subscriber gets the
+    events on its own loop's queue. The subscriber registry changes on the
+    subscribers' loops while the DB writer thread publishes, so it is only
+    touched under a lock and publishing works on copies.
+    """
+
+    def __init__(self, buffer=STREAM_BUFFER):
+        self.buffer = buffer
+        self._by_item = {}
+        self._any_item = set()
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self):
+        return bool(self._any_item or self._by_item)
+
+    @asynccontextmanager
+    async def subscribe(self, types=None, servers=None, items=None, query=None):
+        """Yields a Subscription whose queue receives the matching events."""
+        subscription = Subscription(asyncio.get_running_loop(), self.buffer, types, servers, items, query)
+        with self._lock:
+            for item in subscription.items or ():
+                self._by_item.setdefault(item, set()).add(subscription)
+            if subscription.items is None:
+                self._any_item.add(subscription)
+        try:
+            yield subscription
+        finally:
+            with self._lock:
+                for item in subscription.items or ():
+                    subscribers = self._by_item.get(item, set())
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        self._by_item.pop(item, None)
+                self._any_item.discard(subscription)
+
+    def _candidates(self, items):
+        """{item: subscriptions that may want its events}, copied under the lock."""
+        with self._lock:
+            return {item: self._by_item.get(item, set()) | self._any_item for item in items}
+
+    def publish(self, event):
+        self.publish_many([event])
+
+    def publish_many(self, events):
+        """Offers a batch of events, with one wake-up per interested subscriber."""
+        if not self.has_subscribers:
+            return
+        candidates = self._candidates({event["item"] for event in events})
+        matched = {}
+        for event in events:
+            for subscription in candidates[event["item"]]:
+                if subscription.wants(event):
+                    matched.setdefault(subscription, []).append(event)
+        for subscription, batch in matched.items():
+            subscription.loop.call_soon_threadsafe(subscription.offer, batch)
+
+event_bus = EventBus()
+
+def listing_added(listing, server_name, at):
+    return {
+        "type": LISTING_ADDED, "item": listing["item_name"], "server": server_name, "id": listing["id"],
+        "seller_name": listing["seller"], "quantity": listing["quantity"],
+        "price_won": listing["price_won"], "price_yang": listing["price_yang"],
+        "total_price_yang": listing["total_price_yang"], "bonuses": listing["bonuses"],
+        "seen_at": at.isoformat(),
+    }
+
+def publish_batch(conn, batch):
+    """BulkWriter listener: a listing-added / listing-removed event per changed listing."""
+    if not event_bus.has_subscribers:
+        return
+    events = [listing_added(listing, batch.server_name, batch.at) for listing in batch.added]
+    if batch.removed:
+        item_ids = sorted({row[1] for row in batch.removed})
+        names = {}
+        for start in range(0, len(item_ids), LOOKUP_CHUNK):
+            chunk = item_ids[start:start + LOOKUP_CHUNK]
+            names.update(conn.execute(f"SELECT id, name FROM items WHERE id IN ({','.join('?' * len(chunk))})",
+                                      chunk))
+        events.extend({
+            "type": LISTING_REMOVED, "item": names[item_id], "server": batch.server_name, "id": listing_id,
+            "removed_at": batch.at.isoformat(),
+        } for listing_id, item_id, *_ in batch.removed)
+    event_bus.publish_many(events)
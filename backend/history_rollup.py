@@ -0,0 +1,284 @@
+"""Time-bucketed rollups of price_history for charts.
+
+Every history point is folded into one row per bucket size (15m, 1h, 1d,
+1w) of `price_history_rollup` as it is recorded: open/high/low/close of
+min_unit_price plus running sums for the averages. Reading a chart range
+then costs at most MAX_POINTS rows whatever the item's age, picking the
+finest bucket that fits. LTTB downsampling works from the same bounded
+input for charts that prefer real points over aggregates.
+
+Retention (retention.py) prunes raw points and the finer buckets after a
+while and records how far in `retention_watermarks`; reads then start
+from the finest resolution that still covers their range.
+"""
+
+from datetime import datetime, timedelta
+
+BUCKETS = {
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+    "1d": timedelta(days=1),
+    "1w": timedelta(weeks=1),
+}
+# From finest to coarsest; "raw" is price_history itself
+RESOLUTIONS = ("raw", *BUCKETS)
+# Upper bound on points returned for any range
+MAX_POINTS = 1000
+# LTTB reads at most this many points per requested output point
+LTTB_OVERSAMPLE = 20
+
+def bucket_start(timestamp, bucket):
+    """Start of the bucket containing `timestamp` (weeks start on Monday)."""
+    if bucket == "1w":
+        day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        return day - timedelta(days=day.weekday())
+    if bucket == "1d":
+        return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "1h":
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(minute=timestamp.minute - timestamp.minute % 15, second=0, microsecond=0)
+
+def record_point(cursor, item_id, server_id, timestamp, avg_price, min_price, listings):
+    """Folds one price_history point into every bucket size. Order of arrival does not matter.
+
+    `server_id` None (history from before it was recorded per server) is stored as 0.
+    """
+    cursor.executemany("""
+        INSERT INTO price_history_rollup (item_id, server_id, bucket, bucket_start, open_min_price,
+                                          high_min_price, low_min_price, close_min_price, sum_avg_price,
+                                          sum_listings, points, first_at, last_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?, ?)
+        ON CONFLICT(item_id, server_id, bucket, bucket_start) DO UPDATE SET
+            open_min_price = CASE WHEN excluded.first_at < first_at THEN excluded.open_min_price ELSE open_min_price END,
+            close_min_price = CASE WHEN excluded.last_at >= last_at THEN excluded.close_min_price ELSE close_min_price END,
+            high_min_price = MAX(high_min_price, excluded.high_min_price),
+            low_min_price = MIN(low_min_price, excluded.low_min_price),
+            sum_avg_price = sum_avg_price + excluded.sum_avg_price,
+            sum_listings = sum_listings + excluded.sum_listings,
+            points = points + 1,
+            first_at = MIN(first_at, excluded.first_at),
+            last_at = MAX(last_at, excluded.last_at)
+    """, [(item_id, server_id or 0, bucket, bucket_start(timestamp, bucket), min_price, min_price, min_price,
+           min_price, avg_price, listings, timestamp, timestamp) for bucket in BUCKETS])
+
+def _parse(value):
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+def rebuild(conn):
+    """Recomputes all rollups from price_history (e.g. after an upgrade).
+
+    Rollups of points retention has already pruned from price_history are lost.
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM price_history_rollup")
+    rows = conn.execute("""
+        SELECT item_id, server_id, timestamp, avg_unit_price, min_unit_price, total_listings FROM price_history
+        WHERE item_id IS NOT NULL
+    """).fetchall()
+    for item_id, server_id, timestamp, avg_price, min_price, listings in rows:
+        record_point(cursor, item_id, server_id, _parse(timestamp), avg_price, min_price, listings)
+
+def _filters(item_ids, server_ids, col, start, end):
+    """WHERE fragment and params for some items on some servers (None = every server) in a time range."""
+    sql = f"item_id IN ({','.join('?' * len(item_ids))})"
+    params = list(item_ids)
+    if server_ids is not None:
+        sql += f" AND server_id IN ({','.join('?' * len(server_ids))})"
+        params += list(server_ids)
+    if start:
+        sql += f" AND {col} >= ?"
+        params.append(start)
+    if end:
+        sql += f" AND {col} <= ?"
+        params.append(end)
+    return sql, params
+
+def _ids(value):
+    return None if value is None else [value]
+
+def raw_points(conn, item_id, server_id=None, start=None, end=None, columns=()):
+    where, params = _filters([item_id], _ids(server_id), "timestamp", start, end)
+    extra = "".join(f", {c}" for c in columns)
+    rows = conn.execute(f"""
+        SELECT timestamp, avg_unit_price, min_unit_price, total_listings{extra} FROM price_history
+        WHERE {where}
+        ORDER BY timestamp ASC
+    """, params).fetchall()
+    names = ("timestamp", "avg_unit_price", "min_unit_price", "total_listings", *columns)
+    return [dict(zip(names, row)) for row in rows]
+
+def rollup_rows(conn, item_ids, server_ids, bucket, start=None, end=None):
+    """Stored rollup rows for the series, as tuples ordered by bucket_start.
+
+    (item_id, server_id, bucket_start, open, high, low, close, sum_avg, sum_listings, points, first_at, last_at)
+    """
+    # A bucket belongs to the range if it overlaps it
+    where, params = _filters(item_ids, server_ids, "bucket_start", start and bucket_start(start, bucket), end)
+    return conn.execute(f"""
+        SELECT item_id, server_id, bucket_start, open_min_price, high_min_price, low_min_price, close_min_price,
+               sum_avg_price, sum_listings, points, first_at, last_at
+        FROM price_history_rollup
+        WHERE bucket = ? AND {where}
+        ORDER BY bucket_start ASC
+    """, [bucket, *params]).fetchall()
+
+def _merge(rows):
+    """Combines rollup rows of the same bucket on different servers into one."""
+    merged = {}
+    for _, _, ts, open_, high, low, close, sum_avg, sum_listings, points, first_at, last_at in rows:
+        if ts not in merged:
+            merged[ts] = [open_, high, low, close, sum_avg, sum_listings, points, first_at, last_at]
+            continue
+        m = merged[ts]
+        if first_at < m[7]:
+            m[0], m[7] = open_, first_at
+        if last_at >= m[8]:
+            m[3], m[8] = close, last_at
+        m[1], m[2] = max(m[1], high), min(m[2], low)
+        m[4], m[5], m[6] = m[4] + sum_avg, m[5] + sum_listings, m[6] + points
+    return merged
+
+def rollup_points(conn, item_id, bucket, server_id=None, start=None, end=None):
+    """OHLC points of one item on one server, or merged over every server when `server_id` is None."""
+    merged = _merge(rollup_rows(conn, [item_id], _ids(server_id), bucket, start, end))
+    return [{
+        "timestamp": ts,
+        "open": open_, "high": high, "low": low, "close": close,
+        "min_unit_price": low,
+        "avg_unit_price": round(sum_avg / points),
+        "total_listings": round(sum_listings / points),
+        "points": points,
+    } for ts, (open_, high, low, close, sum_avg, sum_listings, points, _, _) in merged.items()]
+
+def extent(conn, item_ids, server_ids=None, start=None, end=None):
+    """(first, last) time of the series' points within the range, read from the weekly rollups; None if none."""
+    where, params = _filters(item_ids, server_ids, "bucket_start", start and bucket_start(start, "1w"), end)
+    first, last = conn.execute(f"""
+        SELECT MIN(first_at), MAX(last_at) FROM price_history_rollup WHERE bucket = '1w' AND {where}
+    """, params).fetchone()
+    if first is None:
+        return None
+    first, last = _parse(first), _parse(last)
+    first, last = max(first, start) if start else first, min(last, end) if end else last
+    return first, max(first, last)
+
+def watermarks(conn):
+    """{resolution: datetime} before which retention has pruned it; resolutions never pruned are absent."""
+    return {resolution: _parse(before) for resolution, before in
+            conn.execute("SELECT resolution, pruned_before FROM retention_watermarks")}
+
+def finest_kept(conn, item_ids, server_ids=None, start=None):
+    """Finest resolution that still holds the series' points from `start` (or their first point) on."""
+    marks = watermarks(conn)
+    if not marks:
+        return "raw"
+    where, params = _filters(item_ids, server_ids, "bucket_start", start and bucket_start(start, "1w"), None)
+    first = conn.execute(f"""
+        SELECT MIN(first_at) FROM price_history_rollup WHERE bucket = '1w' AND {where}
+    """, params).fetchone()[0]
+    if first is None:
+        return "raw"
+    since = max(_parse(first), start) if start else _parse(first)
+    for resolution in RESOLUTIONS:
+        if resolution not in marks or since >= marks[resolution]:
+            return resolution
+    return RESOLUTIONS[-1]
+
+def _coarser(*resolutions):
+    return max(resolutions, key=RESOLUTIONS.index)
+
+def _count(conn, item_id, server_id, start, end, cap):
+    """Raw points in the range, counting no further than `cap + 1`."""
+    where, params = _filters([item_id], _ids(server_id), "timestamp", start, end)
+    return conn.execute(f"""
+        SELECT COUNT(*) FROM (SELECT 1 FROM price_history WHERE {where} LIMIT ?)
+    """, [*params, cap + 1]).fetchone()[0]
+
+def pick_bucket(covered, max_points, finest="15m"):
+    """Finest bucket, no finer than `finest`, whose buckets touching `covered` (see extent) are at most `max_points`.
+
+    Counted on bucket boundaries: a range starting mid-bucket touches one
+    more bucket than its length suggests.
+    """
+    names = list(BUCKETS)
+    if covered is None:
+        return finest
+    first, last = covered
+    for name in names[names.index(finest):]:
+        if (bucket_start(last, name) - bucket_start(first, name)) // BUCKETS[name] + 1 <= max_points:
+            return name
+    return names[-1]
+
+def lttb(points, threshold, value="min_unit_price"):
+    """Largest-Triangle-Three-Buckets: `threshold` of `points` that keep the curve's shape."""
+    if threshold >= len(points) or threshold < 3:
+        return points
+    xs = [_parse(p["timestamp"]).timestamp() for p in points]
+    ys = [p[value] or 0 for p in points]
+    every = (len(points) - 2) / (threshold - 2)
+    sampled = [points[0]]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third corner of the triangle
+        next_start, next_end = int((i + 1) * every) + 1, min(int((i + 2) * every) + 1, len(points))
+        avg_x = sum(xs[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+def query_history(conn, item_id, server_id=None, start=None, end=None, bucket=None, max_points=None,
+                  mode="ohlc", raw_columns=()):
+    """Chart points for an item on a server (every server if None) as (rows, resolution).
+
+    Without `bucket` or `max_points` the raw points come back as long as
+    there are at most MAX_POINTS of them, else the finest bucket that fits.
+    An explicit `bucket` is coarsened only when the range would exceed
+    MAX_POINTS buckets. mode="lttb" returns real points picked by LTTB from
+    the finest resolution holding at most LTTB_OVERSAMPLE x max_points.
+    Ranges reaching back past what retention kept at a resolution use a
+    coarser one.
+    """
+    max_points = min(max_points or MAX_POINTS, MAX_POINTS)
+    cap = max_points * LTTB_OVERSAMPLE if mode == "lttb" else max_points
+    finest = finest_kept(conn, [item_id], _ids(server_id), start)
+    if finest == "raw" and (mode == "lttb" or bucket is None) \
+            and _count(conn, item_id, server_id, start, end, cap) <= cap:
+        rows = raw_points(conn, item_id, server_id, start, end, raw_columns)
+        return (lttb(rows, max_points) if mode == "lttb" else rows), "raw"
+
+    covered = extent(conn, [item_id], _ids(server_id), start, end)
+    resolution = pick_bucket(covered, cap, _coarser(bucket or "15m", finest))
+    rows = rollup_points(conn, item_id, resolution, server_id, start, end)
+    return (lttb(rows, max_points) if mode == "lttb" else rows), resolution
+
+def compare(conn, item_ids, server_ids, start=None, end=None, bucket=None, max_points=None):
+    """Aligned columnar series for every (item, server) pair.
+
+    All series share one bucket and one timestamp axis; a series has None
+    where it has no point in a bucket. Returns (bucket, timestamps,
+    {(item_id, server_id): {"min_unit_price": [...], "avg_unit_price": [...]}}).
+    """
+    max_points = min(max_points or MAX_POINTS, MAX_POINTS)
+    finest = _coarser(bucket or "15m", finest_kept(conn, item_ids, server_ids, start))
+    resolution = pick_bucket(extent(conn, item_ids, server_ids, start, end), max_points, finest)
+    rows = rollup_rows(conn, item_ids, server_ids, resolution, start, end)
+
+    timestamps = sorted({row[2] for row in rows})
+    index = {ts: i for i, ts in enumerate(timestamps)}
+    series = {(item_id, server_id): {"min_unit_price": [None] * len(timestamps),
+                                     "avg_unit_price": [None] * len(timestamps)}
+              for item_id in item_ids for server_id in server_ids}
+    for item_id, server_id, ts, _, _, low, _, sum_avg, _, points, _, _ in rows:
+        columns = series[(item_id, server_id)]
+        columns["min_unit_price"][index[ts]] = low
+        columns["avg_unit_price"][index[ts]] = round(sum_avg / points)
+    return resolution, timestamps, series
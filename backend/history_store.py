@@ -0,0 +1,195 @@
+"""Append-only binary price history, one file per item and server.
+
+Each file is a small header followed by fixed-size little-endian records
+(see RECORD), so recording a point is a single append whatever the
+history's length, and reading maps the file as a NumPy structured array
+whose fields are the columns. A record cut short by a crash is ignored
+until the next append overwrites it.
+
+The JSON export is produced on demand by streaming records out of a
+file; nothing rewrites whole histories on the scrape path any more.
+
+    python history_store.py rebuild
+    python history_store.py export --item "Dolunay Kılıcı+9" --server Marmara
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import struct
+import threading
+from datetime import datetime
+
+import numpy as np
+
+try:
+    from .database import DB_PATH
+    from .price_stats import STAT_COLUMNS
+except ImportError:  # run directly as `python history_store.py`
+    from database import DB_PATH
+    from price_stats import STAT_COLUMNS
+
+# Kept next to the database so a throwaway DB gets a throwaway store
+HISTORY_STORE_DIR = os.environ.get("METIN2_HISTORY_DIR", os.path.join(os.path.dirname(DB_PATH), "history"))
+HISTORY_EXPORT_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "exports")
+
+MAGIC = b"M2H1"
+HEADER = struct.Struct("<4sI")  # magic, record size
+COLUMNS = ("avg_unit_price", "min_unit_price", "total_listings", *STAT_COLUMNS)
+# Seconds since the epoch (of naive local time), then one int64 per column
+RECORD = np.dtype([("timestamp", "<f8")] + [(column, "<i8") for column in COLUMNS])
+# Stored for a missing (NULL) value
+NULL = np.iinfo(np.int64).min
+# Records per chunk when streaming JSON
+EXPORT_CHUNK = 4096
+# Appends (the scraper's DB thread) and prune's swap (retention) run on different threads
+_lock = threading.Lock()
+
+def series_path(item_id, server_id, root=None):
+    return os.path.join(root or HISTORY_STORE_DIR, str(server_id), f"{item_id}.m2h")
+
+def _record(timestamp, values):
+    record = np.zeros(1, dtype=RECORD)
+    record["timestamp"] = timestamp.timestamp()
+    for column in COLUMNS:
+        value = values.get(column)
+        record[column] = NULL if value is None else value
+    return record.tobytes()
+
+def append(item_id, server_id, timestamp, values, root=None):
+    """Appends one history point; `values` maps COLUMNS to ints (missing ones are stored as NULL)."""
+    path = series_path(item_id, server_id, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with _lock, open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+        size = f.seek(0, os.SEEK_END)
+        if size < HEADER.size:
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, RECORD.itemsize))
+            size = HEADER.size
+        # Overwrite a torn record left by an interrupted append
+        f.seek(size - (size - HEADER.size) % RECORD.itemsize)
+        f.write(_record(timestamp, values))
+
+def read(item_id, server_id, root=None):
+    """Memory-mapped history of a series as a RECORD array, oldest first (empty if none)."""
+    path = series_path(item_id, server_id, root)
+    try:
+        size = os.path.getsize(path)
+    except FileNotFoundError:
+        return np.empty(0, dtype=RECORD)
+    count = (size - HEADER.size) // RECORD.itemsize
+    if count <= 0:
+        return np.empty(0, dtype=RECORD)
+    with open(path, "rb") as f:
+        magic, itemsize = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or itemsize != RECORD.itemsize:
+        raise ValueError(f"{path} is not a history file of this version")
+    return np.memmap(path, dtype=RECORD, mode="r", offset=HEADER.size, shape=(count,))
+
+def iter_json(records):
+    """The records as a JSON array of objects, yielded a chunk of text at a time."""
+    yield "["
+    for start in range(0, len(records), EXPORT_CHUNK):
+        chunk = records[start:start + EXPORT_CHUNK]
+        columns = {column: chunk[column].tolist() for column in COLUMNS}
+        points = []
+        for i, timestamp in enumerate(chunk["timestamp"].tolist()):
+            point = {"timestamp": str(datetime.fromtimestamp(timestamp))}
+            for column in COLUMNS:
+                value = columns[column][i]
+                point[column] = None if value == NULL else value
+            points.append(json.dumps(point, ensure_ascii=False))
+        yield ("," if start else "") + "\n" + ",\n".join(points)
+    yield "\n]\n"
+
+def export_json(item_id, server_id, path, root=None):
+    """Writes a series' history to a JSON file without holding it in memory."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        for text in iter_json(read(item_id, server_id, root)):
+            f.write(text)
+
+def prune(before, root=None):
+    """Drops records older than `before` from every series; returns how many went.
+
+    A pruned file is written beside the original and swapped in, unless an
+    append grew the original meanwhile; the next prune picks that one up.
+    The size check and the swap hold the lock append takes, so no append
+    lands in between (within this process).
+    """
+    root = root or HISTORY_STORE_DIR
+    cutoff = before.timestamp()
+    dropped = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if not name.endswith(".m2h"):
+                continue
+            path = os.path.join(directory, name)
+            size = os.path.getsize(path)
+            records = read(int(name[:-len(".m2h")]), int(os.path.basename(directory)), root)
+            keep = records["timestamp"] >= cutoff
+            if keep.all():
+                continue
+            kept = np.array(records[keep])
+            del records
+            with open(path + ".tmp", "wb") as f:
+                f.write(HEADER.pack(MAGIC, RECORD.itemsize))
+                f.write(kept.tobytes())
+            with _lock:
+                swap = os.path.getsize(path) == size
+                if swap:
+                    os.replace(path + ".tmp", path)
+            if swap:
+                dropped += int((~keep).sum())
+            else:
+                os.remove(path + ".tmp")
+    return dropped
+
+def rebuild(conn, root=None):
+    """Rewrites the store from price_history (e.g. after an upgrade). Points without a server are skipped."""
+    root = root or HISTORY_STORE_DIR
+    series = conn.execute("""
+        SELECT DISTINCT item_id, server_id FROM price_history WHERE item_id IS NOT NULL AND server_id IS NOT NULL
+    """).fetchall()
+    for item_id, server_id in series:
+        path = series_path(item_id, server_id, root)
+        if os.path.exists(path):
+            os.remove(path)
+        rows = conn.execute(f"""
+            SELECT timestamp, {", ".join(COLUMNS)} FROM price_history
+            WHERE item_id = ? AND server_id = ?
+            ORDER BY timestamp
+        """, (item_id, server_id))
+        for timestamp, *values in rows:
+            if not isinstance(timestamp, datetime):
+                timestamp = datetime.fromisoformat(timestamp)
+            append(item_id, server_id, timestamp, dict(zip(COLUMNS, values)), root)
+    return len(series)
+
+def main():
+    parser = argparse.ArgumentParser(description="Binary price history store")
+    parser.add_argument("command", choices=["rebuild", "export"])
+    parser.add_argument("--item", help="Item name (export)")
+    parser.add_argument("--server", help="Server name (export)")
+    parser.add_argument("--output", help="JSON file (default: data/exports/history_<item>_<server>.json)")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(DB_PATH)
+    if args.command == "rebuild":
+        print(f"Rebuilt {rebuild(conn)} series in {HISTORY_STORE_DIR}")
+        return
+
+    row = conn.execute("""
+        SELECT i.id, s.id FROM items i, servers s WHERE i.name = ? AND s.name = ?
+    """, (args.item, args.server)).fetchone()
+    if row is None:
+        parser.error(f"Unknown item or server: {args.item!r} on {args.server!r}")
+    label = f"{args.item} {args.server}"
+    safe_name = "".join([c for c in label if c.isalnum() or c in (' ', '-', '_')]).strip().replace(' ', '_')
+    output = args.output or os.path.join(HISTORY_EXPORT_DIR, f"history_{safe_name}.json")
+    export_json(*row, output)
+    print(f"Exported history to {output}")
+
+if __name__ == "__main__":
+    main()
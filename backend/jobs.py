@@ -0,0 +1,172 @@
+import asyncio
+import itertools
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+try:
+    from . import scraper
+    from .browser_pool import BrowserPool, DEFAULT_POOL_SIZE
+except ImportError:  # run from inside backend/ as a script
+    import scraper
+    from browser_pool import BrowserPool, DEFAULT_POOL_SIZE
+
+# Scrape requests run at once; their queries share the browser pool's pages
+DEFAULT_JOB_WORKERS = int(os.environ.get("SCRAPE_JOB_WORKERS", "2"))
+# Finished jobs kept around for GET /scrape/{id}
+MAX_FINISHED_JOBS = 200
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class ScrapeJob:
+    """One requested scrape of `query` on `server`, and how far it got."""
+
+    def __init__(self, job_id, query, server):
+        self.id = job_id
+        self.query = query
+        self.server = server
+        self.status = QUEUED
+        self.pages = 0
+        self.listings = 0          # rows read so far, before de-duplication
+        self.stored = None         # unique listings synced once finished
+        self.failed_queries = 0
+        self.error = None
+        self.requests = 1          # POST /scrape calls coalesced into this job
+        self.created_at = datetime.now()
+        self.started_at = None
+        self.finished_at = None
+        self._queued_at = time.perf_counter()
+        self._started = None
+        self.wait = None
+        self.elapsed = None
+
+    @property
+    def key(self):
+        return (self.query.strip().lower(), self.server)
+
+    def add_page(self, rows):
+        """Progress hook passed to the scraper as `on_page`."""
+        self.pages += 1
+        self.listings += rows
+
+    def start(self):
+        self.status = RUNNING
+        self.started_at = datetime.now()
+        self._started = time.perf_counter()
+        self.wait = self._started - self._queued_at
+
+    def finish(self, error=None):
+        self.status = FAILED if error else DONE
+        self.error = error
+        self.finished_at = datetime.now()
+        self.elapsed = time.perf_counter() - (self._started or self._queued_at)
+
+    def to_dict(self):
+        running_for = time.perf_counter() - self._started if self.status == RUNNING else self.elapsed
+        return {
+            "id": self.id,
+            "query": self.query,
+            "server": self.server,
+            "status": self.status,
+            "progress": {"pages": self.pages, "listings": self.listings},
+            "stored": self.stored,
+            "failed_queries": self.failed_queries,
+            "error": self.error,
+            "requests": self.requests,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "timings": {"queued": self.wait, "running": running_for},
+        }
+
+
+class JobQueue:
+    """Runs scrape jobs in-process on a fixed number of async workers.
+
+    Submitting a (query, server) that is already waiting returns the waiting
+    job instead of queueing a second one. All workers share one BrowserPool,
+    launched on the first job and kept until stop().
+
+    `runner(job)` does the work; it defaults to scraper.scrape_store.
+    """
+
+    def __init__(self, workers=DEFAULT_JOB_WORKERS, pool_size=DEFAULT_POOL_SIZE, runner=None):
+        self.workers = max(1, int(workers))
+        self.pool_size = pool_size
+        self.runner = runner or self._scrape
+        self.jobs = OrderedDict()
+        self._pending = {}
+        self._ids = itertools.count(1)
+        self._queue = None
+        self._tasks = []
+        self._pool = None
+        self._pool_lock = None
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._pool_lock = asyncio.Lock()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        return self
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+            scraper.close_writer()
+
+    def submit(self, query, server):
+        """Queues a scrape; returns (job, coalesced)."""
+        job = ScrapeJob(str(next(self._ids)), query, server)
+        waiting = self._pending.get(job.key)
+        if waiting is not None:
+            waiting.requests += 1
+            return waiting, True
+
+        self._pending[job.key] = job
+        self.jobs[job.id] = job
+        self._queue.put_nowait(job)
+        self._prune()
+        return job, False
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        finished = [j for j in self.jobs.values() if j.status in (DONE, FAILED)]
+        for job in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job.id]
+
+    async def _browser_pool(self):
+        async with self._pool_lock:
+            if self._pool is None:
+                self._pool = await BrowserPool(self.pool_size).start()
+        return self._pool
+
+    async def _scrape(self, job):
+        pool = await self._browser_pool()
+        results = await scraper.scrape_store(job.query, job.server, pool=pool, on_page=job.add_page) or []
+        job.stored = sum(r["listings"] for r in results)
+        job.failed_queries = sum(1 for r in results if not r["ok"])
+
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            # From here on a new identical request needs a fresh scrape
+            self._pending.pop(job.key, None)
+            job.start()
+            try:
+                await self.runner(job)
+                job.finish()
+            except asyncio.CancelledError:
+                job.finish("cancelled")
+                raise
+            except Exception as e:
+                job.finish(f"{type(e).__name__}: {e}")
+            finally:
+                self._queue.task_done()
@@ -1,17 +1,23 @@
-import subprocess
+import asyncio
 import os
-import sys
 from typing import Optional
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
-from .routers import market
-from .database import engine, Base
 
-# Load environment variables
+# Load environment variables (before the scraper modules read their settings)
 load_dotenv()
 
-# Create tables if they don't exist
+from .routers import alerts, events, export, market, watchlist
+from .database import engine, Base, init_db
+from .jobs import JobQueue
+from .metrics import CONTENT_TYPE, MetricsMiddleware, render
+from .retention import RETENTION_INTERVAL_HOURS, run_forever as run_retention
+from .scheduler import WatchlistScheduler
+from .scraper import SERVER_MAPPING
+
+# Create tables and indexes if they don't exist (same schema.sql the scraper uses)
+init_db()
 Base.metadata.create_all(bind=engine)
 
 app = FastAPI(title="Metin2 Market Analysis API")
@@ -24,43 +30,72 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Bucket"],
 )
+# Latency and SQL query counts per endpoint, served with the scraper's metrics at /metrics
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(market.router)
+app.include_router(watchlist.router)
+app.include_router(export.router)
+app.include_router(alerts.router)
+app.include_router(events.router)
 
 @app.get("/")
 def read_root():
     return {"message": "Metin2 Market API is running. Check /docs for API documentation."}
 
-import subprocess
-import os
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render(), media_type=CONTENT_TYPE)
+
 from pydantic import BaseModel
 
 class ScrapeRequest(BaseModel):
     query: str
     server: Optional[str] = "Marmara"
 
-@app.post("/scrape")
-def trigger_scrape(request: ScrapeRequest):
-    """Triggers the scraper for a specific item query and server."""
-    try:
-        # Run scraper as a subprocess
-        env = os.environ.copy()
-        env["SEARCH_QUERY"] = request.query
-        env["SERVER_NAME"] = request.server
-        
-        # Path to scraper
-        scraper_path = os.path.join(os.path.dirname(__file__), "scraper.py")
-        
-        # Run in background or wait? Waiting might timeout if it takes long.
-        # For now, let's wait to ensure it works.
-        # Use sys.executable to ensure the same python environment is used
-        result = subprocess.run([sys.executable, scraper_path], env=env, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            return {"message": f"Scraped successfully for '{request.query}'", "output": result.stdout}
-        else:
-            return {"message": "Scraper failed", "error": result.stderr}
-            
-    except Exception as e:
-        return {"message": f"Error triggering scraper: {str(e)}"}
+# Scrapes run in-process on a small worker pool sharing one browser
+scrape_jobs = JobQueue()
+# WATCHLIST_SCHEDULER=1 runs the watchlist scheduler on the same queue (instead of scheduler.py)
+watchlist_scheduler = WatchlistScheduler(scrape_jobs) if os.environ.get("WATCHLIST_SCHEDULER", "0") == "1" else None
+# ...and retention with it, as scheduler.py does
+retention_task = None
+
+@app.on_event("startup")
+async def start_scrape_jobs():
+    global retention_task
+    await scrape_jobs.start()
+    if watchlist_scheduler:
+        watchlist_scheduler.start()
+        if RETENTION_INTERVAL_HOURS:
+            retention_task = asyncio.create_task(run_retention())
+
+@app.on_event("shutdown")
+async def stop_scrape_jobs():
+    if retention_task:
+        retention_task.cancel()
+    if watchlist_scheduler:
+        await watchlist_scheduler.stop()
+    await scrape_jobs.stop()
+
+# async: the job queue lives on the event loop, so these must not run in the threadpool
+@app.post("/scrape", status_code=202)
+async def trigger_scrape(request: ScrapeRequest):
+    """Queues a scrape for an item query and server.
+
+    Returns right away with a job id to poll at GET /scrape/{job_id}. A
+    request identical to one still waiting in the queue joins that job.
+    """
+    if request.server not in SERVER_MAPPING:
+        raise HTTPException(status_code=400, detail=f"Unknown server '{request.server}'")
+    job, coalesced = scrape_jobs.submit(request.query, request.server)
+    return {"job_id": job.id, "status": job.status, "coalesced": coalesced}
+
+@app.get("/scrape/{job_id}")
+async def get_scrape_job(job_id: str):
+    """Status, progress (pages and listings read so far) and timings of a scrape job."""
+    job = scrape_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job.to_dict()
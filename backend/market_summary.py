@@ -0,0 +1,114 @@
+"""Per-(item, server) market stats kept in step with the listings table.
+
+`market_summary` holds the count, min and sum of unit prices of the active
+listings for each item on each server, plus a PriceSketch for percentiles.
+BulkWriter applies each batch's inserted and removed listings to it in the
+same transaction, so dashboard stats read a row per item instead of
+aggregating every listing.
+"""
+
+from datetime import datetime
+
+try:
+    from .sketch import PriceSketch
+except ImportError:  # run directly as `python scraper.py`
+    from sketch import PriceSketch
+
+# Stay well below SQLite's bound-parameter limit for IN (...) lookups
+LOOKUP_CHUNK = 500
+
+def _unit_prices(listings):
+    """{item_id: [unit_price, ...]} for (item_id, total_price_yang, quantity) rows."""
+    prices = {}
+    for item_id, total, quantity in listings:
+        if quantity and quantity > 0:
+            prices.setdefault(item_id, []).append(total // quantity)
+    return prices
+
+def _load(cursor, server_id, item_ids):
+    rows = {}
+    for i in range(0, len(item_ids), LOOKUP_CHUNK):
+        chunk = item_ids[i:i + LOOKUP_CHUNK]
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(f"""
+            SELECT item_id, listing_count, min_unit_price, sum_unit_price, sketch
+            FROM market_summary WHERE server_id = ? AND item_id IN ({placeholders})
+        """, [server_id, *chunk])
+        for item_id, count, min_price, sum_price, sketch in cursor.fetchall():
+            rows[item_id] = [count, min_price, sum_price, PriceSketch.from_bytes(sketch)]
+    return rows
+
+def apply_changes(cursor, server_id, added, removed, now):
+    """Folds one batch of listing changes on a server into market_summary.
+
+    `added` and `removed` are (item_id, total_price_yang, quantity) rows.
+    Must run inside the writer's transaction, after the listings themselves
+    were updated: a removed minimum is recomputed from the remaining active
+    listings of that item (an index lookup on (item_id, server_id)).
+    """
+    added, removed = _unit_prices(added), _unit_prices(removed)
+    item_ids = list(set(added) | set(removed))
+    if not item_ids:
+        return
+
+    current = _load(cursor, server_id, item_ids)
+    upserts, deletes = [], []
+    for item_id in item_ids:
+        count, min_price, sum_price, sketch = current.get(item_id, [0, None, 0, PriceSketch()])
+        for price in added.get(item_id, ()):
+            count += 1
+            sum_price += price
+            sketch.add(price)
+            min_price = price if min_price is None else min(min_price, price)
+
+        min_removed = False
+        for price in removed.get(item_id, ()):
+            count -= 1
+            sum_price -= price
+            sketch.remove(price)
+            min_removed = min_removed or (min_price is not None and price <= min_price)
+
+        if count <= 0:
+            deletes.append((item_id, server_id))
+            continue
+        if min_removed:
+            cursor.execute("""
+                SELECT MIN(total_price_yang / quantity) FROM listings
+                WHERE item_id = ? AND server_id = ? AND removed_at IS NULL AND quantity > 0
+            """, (item_id, server_id))
+            min_price = cursor.fetchone()[0]
+        upserts.append((item_id, server_id, count, min_price, sum_price, sketch.to_bytes(), now))
+
+    cursor.executemany("DELETE FROM market_summary WHERE item_id = ? AND server_id = ?", deletes)
+    cursor.executemany("""
+        INSERT INTO market_summary (item_id, server_id, listing_count, min_unit_price, sum_unit_price, sketch, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(item_id, server_id) DO UPDATE SET
+            listing_count = excluded.listing_count,
+            min_unit_price = excluded.min_unit_price,
+            sum_unit_price = excluded.sum_unit_price,
+            sketch = excluded.sketch,
+            updated_at = excluded.updated_at
+    """, upserts)
+
+def rebuild(conn, now=None):
+    """Recomputes market_summary from the active listings (e.g. after an upgrade)."""
+    now = now or datetime.now()
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM market_summary")
+    cursor.execute("""
+        SELECT server_id, item_id, total_price_yang, quantity FROM listings
+        WHERE removed_at IS NULL AND quantity > 0
+    """)
+    by_server = {}
+    for server_id, item_id, total, quantity in cursor.fetchall():
+        by_server.setdefault(server_id, []).append((item_id, total, quantity))
+    for server_id, listings in by_server.items():
+        apply_changes(cursor, server_id, listings, (), now)
+
+def quantile(sketches, q):
+    """q-quantile over several stored sketches (e.g. one item on every server)."""
+    merged = PriceSketch()
+    for data in sketches:
+        merged.merge(PriceSketch.from_bytes(data))
+    return merged.quantile(q)
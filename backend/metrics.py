@@ -0,0 +1,219 @@
+"""Process-wide counters and histograms in the Prometheus text format.
+
+The scraper records per-phase timings (navigate, select_server, search,
+wait, paginate, content, parse, dedupe, save, analyze), pages, rows, parse
+failures and rows written; MetricsMiddleware adds per-endpoint latency and
+SQL query counts. Queries are counted by a trace callback on every SQLite
+connection (database.connect and the API engine), so raw sqlite3 work like
+the scraper's writer and retention is included, not just the ORM. GET /metrics on the API serves them all, and
+`python scheduler.py --metrics-port` does the same for a standalone
+scheduler (metrics are per process, like the event feed).
+
+No client library: a metric is a dict of label values to counts behind
+one lock, cheap enough for the scraper's and the API's hot paths.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; API requests and scrape phases live on different scales
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PHASE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=(), registry=None):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).append(self)
+
+    def _key(self, labels):
+        return tuple(map(labels.__getitem__, self.label_names))
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            values = sorted(self._values.items())
+            lines.extend(self._lines(key, value) for key, value in values)
+        return "\n".join(lines)
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def _lines(self, key, value):
+        return f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS, registry=None):
+        super().__init__(name, help, labels, registry)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), then the sum
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0]
+            series[slot] += 1
+            series[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observes the seconds spent in the block, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels):
+        series = self._values.get(self._key(labels))
+        return sum(series[:-1]) if series else 0
+
+    def sum(self, **labels):
+        series = self._values.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def _lines(self, key, series):
+        lines, cumulative = [], 0
+        for bound, hits in zip((*self.buckets, "+Inf"), series):
+            cumulative += hits
+            le = 'le="%s"' % (bound if bound == "+Inf" else _number(bound))
+            lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+        labels = _labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_number(series[-1])}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return "\n".join(lines)
+
+REGISTRY = []
+
+def render(registry=None):
+    return "\n".join(metric.render() for metric in (REGISTRY if registry is None else registry)) + "\n"
+
+# Scraper
+SCRAPE_PHASE_SECONDS = Histogram("metin2_scrape_phase_seconds", "Time spent per scrape phase",
+                                 ["phase"], PHASE_BUCKETS)
+SCRAPE_JOBS = Counter("metin2_scrape_jobs_total", "Finished (server, query) scrape jobs", ["outcome"])
+SCRAPE_PAGES = Counter("metin2_scrape_pages_total", "Result pages read", ["source"])
+SCRAPE_ROWS = Counter("metin2_scrape_rows_total", "Listing rows read from result pages", ["source"])
+PARSE_FAILURES = Counter("metin2_parse_failures_total", "Result rows skipped because they failed to parse",
+                         ["parser"])
+DB_ROWS_WRITTEN = Counter("metin2_db_rows_written_total", "Rows written by scrapes", ["table", "op"])
+DB_STATEMENTS = Counter("metin2_db_statements_total",
+                        "SQL statements run, in API requests or in the background (scrapes, retention)",
+                        ["source"])
+
+# API
+HTTP_REQUEST_SECONDS = Histogram("metin2_http_request_duration_seconds",
+                                 "API latency until the response starts", ["method", "route", "status"])
+HTTP_REQUEST_QUERIES = Histogram("metin2_http_request_sql_queries", "SQL statements run per API request",
+                                 ["method", "route"], QUERY_BUCKETS)
+
+# Queries counted for the request being served; a list so the threadpool's copied context shares it
+_request_queries = contextvars.ContextVar("request_queries", default=None)
+
+def count_query(statement=None):
+    """sqlite3 trace callback, called for every statement a connection runs (executemany: per row)."""
+    queries = _request_queries.get()
+    if queries is None:
+        DB_STATEMENTS.inc(source="background")
+    else:
+        queries[0] += 1
+        DB_STATEMENTS.inc(source="api")
+
+def trace_queries(conn):
+    """Counts the statements run on a DB-API sqlite3 connection, raw or under SQLAlchemy."""
+    conn.set_trace_callback(count_query)
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and SQL query counts per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        queries = [0]
+        token = _request_queries.set(queries)
+        started = False
+
+        def observe(status):
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=scope["method"],
+                                         route=_route(scope), status=status)
+
+        async def send_wrapper(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                # Streams (exports, SSE) would otherwise count as long as they stay open
+                started = True
+                observe(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_queries.reset(token)
+            if not started:
+                observe(500)
+            HTTP_REQUEST_QUERIES.observe(queries[0], method=scope["method"], route=_route(scope))
+
+def _route(scope):
+    # The template, not the raw path, so ids don't multiply the series
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(port, host="0.0.0.0"):
+    """Serves render() on `port` from a daemon thread (for processes without the API)."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, BigInteger, Boolean, Float, LargeBinary
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -26,25 +26,84 @@ class Listing(Base):
     price_yang = Column(Integer, default=0)
     total_price_yang = Column(BigInteger)
     seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    fingerprint = Column(String, nullable=True)
+    removed_at = Column(DateTime(timezone=True), nullable=True)
 
     server = relationship("Server")
     item = relationship("Item")
     bonuses = relationship("ListingBonus", back_populates="listing")
 
+class BonusType(Base):
+    __tablename__ = "bonus_types"
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    folded = Column(String, unique=True, nullable=False)
+
 class ListingBonus(Base):
     __tablename__ = "listing_bonuses"
     id = Column(Integer, primary_key=True, index=True)
     listing_id = Column(Integer, ForeignKey("listings.id"))
     bonus_name = Column(String)
     bonus_value = Column(String)
+    bonus_type_id = Column(Integer, ForeignKey("bonus_types.id"), nullable=True)
+    value_num = Column(Float, nullable=True)
 
     listing = relationship("Listing", back_populates="bonuses")
 
 class PriceHistory(Base):
     __tablename__ = "price_history"
     id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=True)
+    server_id = Column(Integer, ForeignKey("servers.id"), nullable=True)
     item_name = Column(String, index=True)
     avg_unit_price = Column(BigInteger)
     min_unit_price = Column(BigInteger)
     total_listings = Column(Integer)
     timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    median_unit_price = Column(BigInteger, nullable=True)
+    p10_unit_price = Column(BigInteger, nullable=True)
+    p25_unit_price = Column(BigInteger, nullable=True)
+    p75_unit_price = Column(BigInteger, nullable=True)
+    p90_unit_price = Column(BigInteger, nullable=True)
+    trimmed_mean_unit_price = Column(BigInteger, nullable=True)
+    weighted_unit_price = Column(BigInteger, nullable=True)
+
+class MarketSummary(Base):
+    __tablename__ = "market_summary"
+    item_id = Column(Integer, ForeignKey("items.id"), primary_key=True)
+    server_id = Column(Integer, ForeignKey("servers.id"), primary_key=True)
+    listing_count = Column(Integer, nullable=False)
+    min_unit_price = Column(BigInteger)
+    sum_unit_price = Column(BigInteger)
+    sketch = Column(LargeBinary)
+    updated_at = Column(DateTime(timezone=True))
+
+class WatchlistEntry(Base):
+    __tablename__ = "watchlist"
+    id = Column(Integer, primary_key=True, index=True)
+    query = Column(String, nullable=False)
+    server_id = Column(Integer, ForeignKey("servers.id"), nullable=False)
+    enabled = Column(Boolean, default=True)
+    interval_minutes = Column(Float, nullable=True)
+    volatility = Column(Float, nullable=True)
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    next_run_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    server = relationship("Server")
+
+class AlertRule(Base):
+    __tablename__ = "alert_rules"
+    id = Column(Integer, primary_key=True, index=True)
+    item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
+    server_id = Column(Integer, ForeignKey("servers.id"), nullable=True)
+    max_unit_price = Column(BigInteger, nullable=False)
+    bonus_filters = Column(String, nullable=True)
+    sink = Column(String, nullable=False, default="log")
+    target = Column(String, nullable=True)
+    enabled = Column(Boolean, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    item = relationship("Item")
+    server = relationship("Server")
@@ -0,0 +1,212 @@
+import hashlib
+import os
+from abc import ABC, abstractmethod
+from bs4 import BeautifulSoup
+
+try:
+    from .metrics import PARSE_FAILURES
+except ImportError:  # run directly as `python scraper.py`
+    from metrics import PARSE_FAILURES
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # optional fast backend
+    lxml_html = None
+
+def parse_price(price_str):
+    """Clean and convert price strings like '1 w', '50 m', '10.000'."""
+    if not price_str: return 0
+    clean_str = str(price_str).lower().replace('.', '').strip()
+
+    multiplier = 1
+    if 'w' in clean_str:
+        multiplier = 100000000
+        clean_str = clean_str.replace('w', '')
+    elif 'm' in clean_str:
+        multiplier = 1000000
+        clean_str = clean_str.replace('m', '')
+    elif 'k' in clean_str:
+        multiplier = 1000
+        clean_str = clean_str.replace('k', '')
+
+    try:
+        return int(float(clean_str) * multiplier)
+    except ValueError:
+        return 0
+
+def make_listing(item_name, seller, quantity, yang, won, bonuses):
+    """Builds the listing dict the rest of the pipeline works with."""
+    quantity = quantity or 1
+    total_yang = (won * 100_000_000) + yang
+    return {
+        "item_name": item_name,
+        "seller": seller,
+        "quantity": quantity,
+        "price_won": won,
+        "price_yang": yang,
+        "total_yang": total_yang,
+        "unit_price": total_yang / quantity,
+        "bonuses": bonuses
+    }
+
+def listing_signature(item):
+    """Identity of a listing across pages and scrapes (same seller, item, stack and price)."""
+    return (item['item_name'], item['seller'], item['total_yang'], item['quantity'])
+
+def fingerprint(item_name, seller, total_yang, quantity):
+    """Stable hash of a listing's dedup signature (see listing_signature)."""
+    raw = f"{item_name}\x1f{seller}\x1f{total_yang}\x1f{quantity}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=8).hexdigest()
+
+class RowParser(ABC):
+    """Turns result table markup into listing dicts.
+
+    parse() returns None when the markup has no data rows at all, otherwise
+    the list of listings (rows that fail to parse are skipped).
+    """
+    name = None
+
+    @abstractmethod
+    def parse(self, html):
+        """Listing dicts of the data rows in `html`, or None when it has none."""
+
+class SoupRowParser(RowParser):
+    """Reference implementation on BeautifulSoup's html.parser."""
+    name = "soup"
+
+    def parse(self, html):
+        soup = BeautifulSoup(html, 'html.parser')
+        rows = soup.select("tbody tr")
+
+        if not rows or (len(rows) == 1 and "No data" in rows[0].text):
+            return None
+
+        listings = []
+        for row in rows:
+            try:
+                cols = row.find_all('td')
+                if len(cols) < 5: continue
+
+                info_col = cols[1]
+                name_div = info_col.find('div', class_=lambda x: x and 'font-medium' in x)
+                item_name = ""
+                special_bonuses = []
+
+                if name_div:
+                    name_spans = name_div.find_all('span')
+                    special_bonuses = [s.get_text(strip=True) for s in name_spans]
+                    for s in name_spans: s.extract()
+                    item_name = name_div.get_text(strip=True)
+                else:
+                    item_name = info_col.get_text(strip=True)
+
+                # Only add if it actually matches our query loosely
+                # (Prevents generic 'Dolunay' search from polluting specific '+9' buckets if site fuzzy matches)
+                # But since we iterate, we trust the scraper's query context.
+
+                bonus_div = info_col.find('div', class_=lambda x: x and 'text-xs' in x and 'text-gray-400' in x)
+                bonuses = []
+                if bonus_div:
+                    bonuses = [s.get_text(strip=True) for s in bonus_div.find_all('span')]
+                bonuses.extend(special_bonuses)
+
+                quantity = parse_price(cols[2].get_text(strip=True)) or 1
+                yang = parse_price(cols[3].get_text(strip=True))
+                won = parse_price(cols[4].get_text(strip=True))
+                seller = cols[5].get_text(strip=True) if len(cols) > 5 else "Unknown"
+
+                listings.append(make_listing(item_name, seller, quantity, yang, won, bonuses))
+            except Exception:
+                PARSE_FAILURES.inc(parser=self.name)
+                continue
+
+        return listings
+
+if lxml_html is not None:
+    # Compiled once; the class tests use substring matching like the soup lambdas do
+    _ROWS = etree.XPath("//tbody//tr")
+    _CELLS = etree.XPath(".//td")
+    _NAME_DIV = etree.XPath(".//div[contains(@class, 'font-medium')]")
+    _BONUS_DIV = etree.XPath(".//div[contains(@class, 'text-xs') and contains(@class, 'text-gray-400')]")
+    _SPANS = etree.XPath(".//span")
+    _TEXT = etree.XPath(".//text()")
+    _TEXT_OUTSIDE_SPANS = etree.XPath(".//text()[not(ancestor::span)]")
+
+def _strip_join(texts):
+    # Same result as BeautifulSoup's get_text(strip=True)
+    return "".join(t.strip() for t in texts)
+
+class LxmlRowParser(RowParser):
+    """Fast path on lxml's C parser with precompiled XPath.
+
+    Yields the same dicts as SoupRowParser but never mutates the tree: the
+    item name is read from the text outside the name spans instead of
+    extracting them first.
+    """
+    name = "lxml"
+
+    def parse(self, html):
+        if not html or not html.strip():
+            return None
+        rows = _ROWS(lxml_html.fromstring(html))
+
+        if not rows or (len(rows) == 1 and "No data" in rows[0].text_content()):
+            return None
+
+        listings = []
+        for row in rows:
+            try:
+                cols = _CELLS(row)
+                if len(cols) < 5: continue
+
+                info_col = cols[1]
+                name_divs = _NAME_DIV(info_col)
+                special_bonuses = []
+
+                if name_divs:
+                    special_bonuses = [_strip_join(_TEXT(s)) for s in _SPANS(name_divs[0])]
+                    item_name = _strip_join(_TEXT_OUTSIDE_SPANS(name_divs[0]))
+                else:
+                    item_name = _strip_join(_TEXT(info_col))
+
+                bonus_divs = _BONUS_DIV(info_col)
+                bonuses = [_strip_join(_TEXT(s)) for s in _SPANS(bonus_divs[0])] if bonus_divs else []
+                bonuses.extend(special_bonuses)
+
+                quantity = parse_price(_strip_join(_TEXT(cols[2]))) or 1
+                yang = parse_price(_strip_join(_TEXT(cols[3])))
+                won = parse_price(_strip_join(_TEXT(cols[4])))
+                seller = _strip_join(_TEXT(cols[5])) if len(cols) > 5 else "Unknown"
+
+                listings.append(make_listing(item_name, seller, quantity, yang, won, bonuses))
+            except Exception:
+                PARSE_FAILURES.inc(parser=self.name)
+                continue
+
+        return listings
+
+ROW_PARSERS = {"soup": SoupRowParser}
+if lxml_html is not None:
+    ROW_PARSERS["lxml"] = LxmlRowParser
+
+# Backend used by the scraper; falls back to the reference parser without lxml
+DEFAULT_ROW_PARSER = os.environ.get("SCRAPER_ROW_PARSER", "lxml" if lxml_html is not None else "soup")
+
+def get_row_parser(name=None):
+    name = name or DEFAULT_ROW_PARSER
+    if name not in ROW_PARSERS:
+        print(f"Row parser '{name}' unavailable, using 'soup'.")
+        name = "soup"
+    return ROW_PARSERS[name]()
+
+_default_parser = None
+
+def parse_listing_rows(html):
+    """Parses the store's result table markup with the default row parser.
+
+    Returns None when the markup has no data rows at all.
+    """
+    global _default_parser
+    if _default_parser is None:
+        _default_parser = get_row_parser()
+    return _default_parser.parse(html)
@@ -0,0 +1,87 @@
+"""Robust unit-price statistics, computed for many groups in one NumPy pass.
+
+A handful of troll listings at absurd prices drag an arithmetic mean far
+from the market (a 4.5B yang "average" next to a 39M minimum), so history
+points also get percentiles, an IQR-trimmed mean and a quantity-weighted
+unit price, all of which ignore those outliers.
+"""
+
+import numpy as np
+
+PERCENTILES = (10, 25, 50, 75, 90)
+# Tukey fences: prices outside [p25 - k*IQR, p75 + k*IQR] are treated as outliers
+IQR_FENCE = 1.5
+
+STAT_COLUMNS = ("median_unit_price", "p10_unit_price", "p25_unit_price", "p75_unit_price",
+                "p90_unit_price", "trimmed_mean_unit_price", "weighted_unit_price")
+
+def load_listings(conn, match_sql=None, params=(), server_id=None):
+    """Active listings as int64 arrays (item_ids, server_ids, totals, quantities).
+
+    `match_sql` (e.g. from search_index.item_ids_sql) limits them to some items
+    and `server_id` to one server; without either the whole table is read in
+    storage order.
+    """
+    item_filter = f"item_id IN ({match_sql}) AND" if match_sql else ""
+    if server_id is not None:
+        item_filter += " server_id = :server_id AND"
+        params = {**dict(params), "server_id": server_id}
+    cursor = conn.execute(f"""
+        SELECT item_id, server_id, total_price_yang, quantity FROM listings
+        WHERE {item_filter} removed_at IS NULL AND quantity > 0
+    """, params)
+    rows = np.array(cursor.fetchall(), dtype=np.int64).reshape(-1, 4)
+    return rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3]
+
+def robust_stats(keys, totals, quantities):
+    """Per-group robust unit-price stats.
+
+    `keys` labels each listing's group: an array of e.g. item ids, or of
+    (item_id, server_id) rows for tuple-keyed groups. `totals` and
+    `quantities` are the listing prices and stack sizes. Returns
+    {key: {column: value}} for the columns in STAT_COLUMNS. Percentiles
+    interpolate linearly like np.percentile; the trimmed mean and the
+    weighted price (sum of totals / sum of quantities) use only the listings
+    inside the IQR fences.
+    """
+    keys = np.asarray(keys)
+    if not len(keys):
+        return {}
+    if keys.ndim == 2:
+        labels, inverse = np.unique(keys, axis=0, return_inverse=True)
+        stats = robust_stats(inverse.ravel(), totals, quantities)
+        return {tuple(labels[k].tolist()): row for k, row in stats.items()}
+    totals = np.asarray(totals, dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.int64)
+    unit = totals // quantities
+
+    # Sort by group, then by unit price within each group
+    order = np.lexsort((unit, keys))
+    keys, unit, totals, quantities = keys[order], unit[order], totals[order], quantities[order]
+    group_keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+    group = np.repeat(np.arange(len(group_keys)), counts)
+    values = unit.astype(np.float64)
+
+    def percentile(p):
+        pos = (counts - 1) * (p / 100)
+        low = np.floor(pos).astype(np.int64)
+        high = np.minimum(low + 1, counts - 1)
+        frac = pos - low
+        return values[starts + low] * (1 - frac) + values[starts + high] * frac
+
+    pcts = {p: percentile(p) for p in PERCENTILES}
+    iqr = pcts[75] - pcts[25]
+    lower, upper = pcts[25] - IQR_FENCE * iqr, pcts[75] + IQR_FENCE * iqr
+    inlier = (values >= lower[group]) & (values <= upper[group])
+
+    n_groups = len(group_keys)
+    kept = np.bincount(group, weights=inlier, minlength=n_groups)
+    trimmed_mean = np.bincount(group, weights=values * inlier, minlength=n_groups) / kept
+    weighted = (np.bincount(group, weights=totals * inlier, minlength=n_groups)
+                / np.bincount(group, weights=quantities * inlier, minlength=n_groups))
+
+    columns = np.column_stack([pcts[50], pcts[10], pcts[25], pcts[75], pcts[90], trimmed_mean, weighted])
+    return {
+        key.item(): dict(zip(STAT_COLUMNS, (int(round(v)) for v in row)))
+        for key, row in zip(group_keys, columns)
+    }
@@ -0,0 +1,76 @@
+import os
+
+# Upper bound for any single readiness wait; steps return as soon as the page is ready
+READY_TIMEOUT_MS = int(os.environ.get("SCRAPER_READY_TIMEOUT_MS", "8000"))
+NO_DATA_TEXT = "No data available in table"
+
+# The table must go this long without a mutation before it is read, so
+# rows that are still being drawn in are not taken as the whole page
+READY_QUIET_MS = int(os.environ.get("SCRAPER_READY_QUIET_MS", "150"))
+# Image, item, quantity, yang, won (+ seller): fewer cells is a placeholder row
+MIN_DATA_CELLS = 5
+
+# Counts redraws of the results table: a MutationObserver bumps a counter and
+# notes the time on any change inside a <table> (rows replaced, the "No data"
+# row re-rendered, even with identical content) or when a table is inserted.
+# Installed on first use per document; returns the current count.
+_MARK_JS = """
+() => {
+    if (window.__m2Draws === undefined) {
+        window.__m2Draws = 0;
+        window.__m2LastDraw = performance.now();
+        const inTable = (node) => {
+            const el = node.nodeType === 1 ? node : node.parentElement;
+            return !!(el && el.closest("table"));
+        };
+        const addsTable = (record) => Array.from(record.addedNodes)
+            .some((n) => n.nodeType === 1 && (n.matches("table") || n.querySelector("table")));
+        new MutationObserver((records) => {
+            if (records.some((r) => inTable(r.target) || addsTable(r))) {
+                window.__m2Draws += 1;
+                window.__m2LastDraw = performance.now();
+            }
+        }).observe(document.body, { childList: true, subtree: true, characterData: true });
+    }
+    return window.__m2Draws;
+}
+"""
+
+# Ready once the table was redrawn after the mark, has been quiet for quietMs
+# and holds a final state: only data rows, or the single "No data" row.
+# Loading placeholders and half-drawn tables are neither, so they keep waiting.
+_READY_JS = """
+({ mark, quietMs, minCells, noData }) => {
+    if (window.__m2Draws <= mark || performance.now() - window.__m2LastDraw < quietMs) {
+        return false;
+    }
+    const rows = Array.from(document.querySelectorAll("table tbody tr"));
+    if (rows.length === 1 && rows[0].textContent.includes(noData)) {
+        return "empty";
+    }
+    return rows.length > 0 && rows.every((row) => row.cells.length >= minCells) ? "rows" : false;
+}
+"""
+
+async def mark_table(page):
+    """Call right before a search, server change or page click; pass the result to wait_for_redraw."""
+    return await page.evaluate(_MARK_JS)
+
+async def wait_for_redraw(page, mark, timeout_ms=None, required=True):
+    """Waits until the results table shows the outcome of the action taken after `mark`.
+
+    Returns "rows" or "empty" (the "No data" marker). Raises TimeoutError
+    when the table does not settle on either in time, so neither a stale
+    table nor a loading placeholder is read as the new result; with
+    required=False it returns False instead.
+    """
+    timeout_ms = READY_TIMEOUT_MS if timeout_ms is None else timeout_ms
+    args = {"mark": mark, "quietMs": READY_QUIET_MS, "minCells": MIN_DATA_CELLS, "noData": NO_DATA_TEXT}
+    try:
+        # Polled on a timer: the quiet period can pass without any new frame
+        state = await page.wait_for_function(_READY_JS, arg=args, timeout=timeout_ms, polling=50)
+    except Exception:
+        if required:
+            raise TimeoutError(f"Results table did not settle within {timeout_ms} ms")
+        return False
+    return await state.json_value()
@@ -0,0 +1,142 @@
+"""Read-through cache of GET responses, revalidated against data versions.
+
+Endpoints opt in with @cached(scope) on a router whose route_class is
+CachedRoute. A request is keyed by its path and normalized query string;
+before serving, the route looks up the current data version of the
+request's scope (data_version.current: which servers and items the response
+depends on), so an entry is reused until a scrape commits a change inside
+that scope, and no longer. Entries also expire after a TTL and are evicted
+least-recently-used once their bodies exceed the memory budget.
+
+Responses carry an ETag (a hash of the body) and `Cache-Control: no-cache`,
+so browsers revalidate with If-None-Match and get a bodiless 304 while the
+data is unchanged.
+"""
+
+import hashlib
+import os
+import time
+from collections import OrderedDict, namedtuple
+from fastapi import Response
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+
+from . import database
+from .data_version import current
+
+CACHE_MAX_BYTES = int(float(os.environ.get("METIN2_CACHE_MB", "32")) * 1024 * 1024)
+CACHE_TTL_SECONDS = float(os.environ.get("METIN2_CACHE_TTL", "300"))
+# Response headers stored and replayed with the body
+CACHED_HEADERS = ("content-type", "x-next-cursor", "x-bucket")
+
+Entry = namedtuple("Entry", "version etag body headers expires")
+
+class ResponseCache:
+    """LRU of response bodies bounded by total body size, with a TTL."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES, ttl=CACHE_TTL_SECONDS, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, version):
+        """The entry for `key` if it was stored at `version` and has not expired."""
+        entry = self._entries.get(key)
+        if entry is not None and (entry.version != version or entry.expires <= self.clock()):
+            self._discard(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key, version, body, headers):
+        entry = Entry(version, f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', body, headers,
+                      self.clock() + self.ttl)
+        self._discard(key)
+        if len(body) > self.max_bytes:
+            # Would evict everything else and still not fit
+            return entry
+        self._entries[key] = entry
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted.body)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+        self.size = 0
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.body)
+
+response_cache = ResponseCache()
+
+def cached(scope=None):
+    """Marks an endpoint as cacheable under CachedRoute.
+
+    `scope(query_params)` returns the data_version.current() arguments for a
+    request (e.g. {"servers": [...], "search": ...}); without one the
+    response depends on the whole database.
+    """
+    def decorate(endpoint):
+        endpoint.cache_scope = scope or (lambda params: {})
+        return endpoint
+    return decorate
+
+def _version(scope):
+    conn = database.engine.raw_connection()
+    try:
+        return current(conn.driver_connection, **scope)
+    finally:
+        conn.close()
+
+def _matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+class CachedRoute(APIRoute):
+    """APIRoute serving @cached endpoints through response_cache."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        scope = getattr(self.endpoint, "cache_scope", None)
+        if scope is None:
+            return handler
+
+        async def cached_handler(request):
+            if request.method != "GET":
+                return await handler(request)
+            params = request.query_params
+            key = (request.url.path, tuple(sorted(params.multi_items(), key=lambda pair: pair[0])))
+            # Read before the response is built: a commit in between leaves the entry
+            # labelled older than its data, which only costs one extra miss
+            version = await run_in_threadpool(_version, scope(params))
+            entry = response_cache.get(key, version)
+            if entry is None:
+                response = await handler(request)
+                if response.status_code != 200 or not hasattr(response, "body"):
+                    return response
+                headers = {name: value for name, value in response.headers.items() if name in CACHED_HEADERS}
+                entry = response_cache.put(key, version, response.body, headers)
+
+            headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+            if _matches(request.headers.get("if-none-match"), entry.etag):
+                return Response(status_code=304, headers=headers)
+            return Response(entry.body, headers={**entry.headers, **headers})
+
+        return cached_handler
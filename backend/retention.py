@@ -0,0 +1,189 @@
+"""Retention: keeps the database's size and query cost bounded over months of scraping.
+
+- Raw history points (price_history, and the binary store) are kept
+  RETENTION_DAYS["raw"] days. Every point was folded into the 15m/1h/1d/1w
+  rollups when it was recorded, so older ranges are still charted from those.
+- 15-minute rollups are kept RETENTION_DAYS["15m"] days and hourly ones
+  RETENTION_DAYS["1h"] days; daily and weekly rollups are kept for good.
+  Each cutoff is written to retention_watermarks before anything is
+  deleted, so reads have already moved to a coarser resolution.
+- Listings that left the store more than REMOVED_LISTINGS_DAYS ago are
+  deleted with their bonuses.
+
+Deletes go oldest first, RETENTION_BATCH rows per transaction with a pause
+in between, so a scrape never waits long for the write lock. Freed pages
+are then handed back with incremental_vacuum. Databases created before
+auto_vacuum was enabled reuse their free pages instead until converted
+once with --vacuum (a full VACUUM that locks the database while it runs).
+
+    python retention.py
+    python retention.py --vacuum
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+try:
+    from .database import DB_PATH, connect, init_db
+    from .data_version import bump
+    from .history_rollup import bucket_start
+    from . import history_store
+except ImportError:  # run directly as `python retention.py`
+    from database import DB_PATH, connect, init_db
+    from data_version import bump
+    from history_rollup import bucket_start
+    import history_store
+
+# Days kept per resolution; 0 keeps it forever
+RETENTION_DAYS = {
+    "raw": float(os.environ.get("METIN2_KEEP_RAW_DAYS", "30")),
+    "15m": float(os.environ.get("METIN2_KEEP_15M_DAYS", "30")),
+    "1h": float(os.environ.get("METIN2_KEEP_1H_DAYS", "365")),
+    "1d": 0,
+    "1w": 0,
+}
+REMOVED_LISTINGS_DAYS = float(os.environ.get("METIN2_KEEP_REMOVED_DAYS", "30"))
+RETENTION_BATCH = 5000
+# Seconds between batches, for the scraper to get the write lock in
+RETENTION_PAUSE = 0.05
+# Pages handed back to the OS per incremental_vacuum step
+VACUUM_PAGES = 2000
+# How often the scheduler runs a pass; 0 disables it
+RETENTION_INTERVAL_HOURS = float(os.environ.get("RETENTION_INTERVAL_HOURS", "6"))
+
+def _placeholders(values):
+    return ",".join("?" * len(values))
+
+def _batches(conn, select_sql, params, delete, batch, pause):
+    """Runs delete(cursor, rows) on batches of `select_sql` (ending in LIMIT ?) until none are left.
+
+    Each batch is its own transaction. Returns the number of rows selected.
+    """
+    total = 0
+    while True:
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            rows = cursor.execute(select_sql, [*params, batch]).fetchall()
+            if rows:
+                delete(cursor, rows)
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        total += len(rows)
+        if len(rows) < batch:
+            return total
+        time.sleep(pause)
+
+def _mark(conn, resolution, before):
+    conn.execute("""
+        INSERT INTO retention_watermarks (resolution, pruned_before) VALUES (?, ?)
+        ON CONFLICT (resolution) DO UPDATE SET pruned_before = MAX(pruned_before, excluded.pruned_before)
+    """, (resolution, before))
+    conn.commit()
+
+def prune_history(conn, now, days=RETENTION_DAYS, batch=RETENTION_BATCH, pause=RETENTION_PAUSE):
+    """Deletes raw points and rollups past their retention; returns {resolution: rows deleted}."""
+    deleted = {}
+    for resolution, keep in days.items():
+        if not keep:
+            continue
+        cutoff = now - timedelta(days=keep)
+        if resolution == "raw":
+            table, key, column = "price_history", "id", "timestamp"
+            # Points without an item never made it into the rollups
+            where, params = "timestamp < ? AND item_id IS NOT NULL", [cutoff]
+        else:
+            # Whole buckets only
+            cutoff = bucket_start(cutoff, resolution)
+            table, key, column = "price_history_rollup", "rowid", "bucket_start"
+            where, params = "bucket = ? AND bucket_start < ?", [resolution, cutoff]
+        _mark(conn, resolution, cutoff)
+
+        def delete(cursor, rows, table=table, key=key):
+            cursor.execute(f"DELETE FROM {table} WHERE {key} IN ({_placeholders(rows)})", [row[0] for row in rows])
+            # Cached price-history responses for these series are stale
+            bump(cursor, {(server_id or 0, item_id) for _, item_id, server_id in rows})
+
+        deleted[resolution] = _batches(
+            conn, f"SELECT {key}, item_id, server_id FROM {table} WHERE {where} ORDER BY {column} LIMIT ?",
+            params, delete, batch, pause)
+    return deleted
+
+def prune_listings(conn, now, keep=REMOVED_LISTINGS_DAYS, batch=RETENTION_BATCH, pause=RETENTION_PAUSE):
+    """Deletes listings removed more than `keep` days ago, with their bonuses; returns how many."""
+    if not keep:
+        return 0
+
+    def delete(cursor, rows):
+        ids = [row[0] for row in rows]
+        cursor.execute(f"DELETE FROM listing_bonuses WHERE listing_id IN ({_placeholders(ids)})", ids)
+        cursor.execute(f"DELETE FROM listings WHERE id IN ({_placeholders(ids)})", ids)
+
+    return _batches(conn, """
+        SELECT id FROM listings WHERE removed_at IS NOT NULL AND removed_at < ? ORDER BY removed_at LIMIT ?
+    """, [now - timedelta(days=keep)], delete, batch, pause)
+
+def reclaim(conn, full=False, pause=RETENTION_PAUSE):
+    """Returns free pages to the OS; returns the bytes the file shrank by.
+
+    full=True converts the database to incremental auto-vacuum with a VACUUM.
+    """
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    before = conn.execute("PRAGMA page_count").fetchone()[0]
+    if full:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    elif conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        while conn.execute("PRAGMA freelist_count").fetchone()[0]:
+            # executescript steps it to the end; execute() frees only one page per call
+            conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES})")
+            time.sleep(pause)
+    # Shrink the WAL too, or the space just moves there
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return (before - conn.execute("PRAGMA page_count").fetchone()[0]) * page_size
+
+def run(conn, now=None, days=RETENTION_DAYS, removed_days=REMOVED_LISTINGS_DAYS, batch=RETENTION_BATCH,
+        pause=RETENTION_PAUSE, vacuum=False, store_root=None):
+    """One retention pass; returns what it deleted and reclaimed."""
+    now = now or datetime.now()
+    stats = {"history": prune_history(conn, now, days, batch, pause),
+             "listings": prune_listings(conn, now, removed_days, batch, pause)}
+    if days.get("raw"):
+        stats["store_points"] = history_store.prune(now - timedelta(days=days["raw"]), store_root)
+    stats["reclaimed_bytes"] = reclaim(conn, vacuum, pause)
+    return stats
+
+def run_pass(db_path=None, **kwargs):
+    conn = connect(db_path)
+    try:
+        return run(conn, **kwargs)
+    finally:
+        conn.close()
+
+async def run_forever(interval_hours=RETENTION_INTERVAL_HOURS, db_path=None):
+    """A retention pass every `interval_hours`, off the event loop."""
+    while True:
+        try:
+            stats = await asyncio.to_thread(run_pass, db_path)
+            print(f"Retention: {stats}")
+        except Exception as e:
+            print(f"Retention pass failed: {e}")
+        await asyncio.sleep(interval_hours * 3600)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune old history and listings and reclaim space")
+    parser.add_argument("--vacuum", action="store_true",
+                        help="Also convert the database to incremental auto-vacuum (full VACUUM, locks the DB)")
+    args = parser.parse_args()
+
+    init_db()
+    start = time.perf_counter()
+    stats = run_pass(DB_PATH, vacuum=args.vacuum)
+    print(f"Deleted history rows {stats['history']}, {stats['listings']:,} removed listings, "
+          f"{stats.get('store_points', 0):,} stored points; reclaimed {stats['reclaimed_bytes'] / 1e6:.1f} MB "
+          f"in {time.perf_counter() - start:.1f}s")
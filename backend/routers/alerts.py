@@ -0,0 +1,88 @@
+import json
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.orm import Session, joinedload
+from typing import List
+from .. import models, schemas, database
+from ..bonuses import parse_filter
+from ..data_version import bump
+from ..events import ALERT
+from ..search_index import sync_items
+from .events import sse_response
+
+router = APIRouter(
+    prefix="/alerts",
+    tags=["alerts"]
+)
+
+def _rule_out(rule):
+    return schemas.AlertRuleOut(
+        id=rule.id, item=rule.item, server=rule.server, max_unit_price=rule.max_unit_price,
+        bonus=json.loads(rule.bonus_filters or "[]"), sink=rule.sink, target=rule.target,
+        enabled=rule.enabled, created_at=rule.created_at,
+    )
+
+@router.get("/rules", response_model=List[schemas.AlertRuleOut])
+def get_rules(db: Session = Depends(database.get_db)):
+    rules = db.query(models.AlertRule) \
+        .options(joinedload(models.AlertRule.item), joinedload(models.AlertRule.server)) \
+        .order_by(models.AlertRule.id.asc()) \
+        .all()
+    return [_rule_out(rule) for rule in rules]
+
+@router.post("/rules", response_model=schemas.AlertRuleOut, status_code=201)
+def add_rule(rule: schemas.AlertRuleIn, db: Session = Depends(database.get_db)):
+    """Alerts on new listings of `item` at or below `max_unit_price`.
+
+    Checked against each scraped batch's new listings as it is stored. An
+    item that has not been scraped yet is created so the rule can wait for it.
+    """
+    try:
+        for expression in rule.bonus:
+            parse_filter(expression)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if rule.sink == "webhook" and not rule.target:
+        raise HTTPException(status_code=400, detail="A webhook rule needs a target URL")
+
+    conn = db.connection().connection.driver_connection
+    created = False
+    item = db.query(models.Item).filter(models.Item.name == rule.item).first()
+    if item is None:
+        item = models.Item(name=rule.item, category="General")
+        db.add(item)
+        db.flush()
+        sync_items(conn)
+        created = True
+    server = None
+    if rule.server:
+        server = db.query(models.Server).filter(models.Server.name == rule.server).first()
+        if server is None:
+            server = models.Server(name=rule.server)
+            db.add(server)
+            db.flush()
+            created = True
+    if created:
+        # New entries for the cached server list and item search
+        bump(conn.cursor())
+
+    now = datetime.now()
+    added = models.AlertRule(item_id=item.id, server_id=server.id if server else None,
+                             max_unit_price=rule.max_unit_price, bonus_filters=json.dumps(rule.bonus),
+                             sink=rule.sink, target=rule.target, created_at=now, updated_at=now)
+    db.add(added)
+    db.commit()
+    db.refresh(added)
+    return _rule_out(added)
+
+@router.delete("/rules/{rule_id}", status_code=204)
+def remove_rule(rule_id: int, db: Session = Depends(database.get_db)):
+    deleted = db.query(models.AlertRule).filter(models.AlertRule.id == rule_id).delete()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Unknown alert rule")
+    db.commit()
+
+@router.get("/stream")
+async def stream_alerts(request: Request):
+    """Server-Sent Events: one `alert` event per match of a rule whose sink is 'sse'."""
+    return sse_response(request, types=[ALERT])
@@ -0,0 +1,60 @@
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from ..events import EVENT_TYPES, event_bus
+
+router = APIRouter(
+    prefix="/events",
+    tags=["events"]
+)
+
+# Comment line sent to idle SSE clients so proxies keep the connection open
+KEEPALIVE_SECONDS = 15
+
+async def sse_events(request, subscription, keepalive=KEEPALIVE_SECONDS):
+    """Server-Sent Events from a subscription's queue until the client goes away.
+
+    A client that fell behind and lost events gets a `resync` event telling
+    it to refetch what it shows.
+    """
+    queue = subscription.queue
+    while not await request.is_disconnected():
+        if subscription.dropped:
+            yield f"event: resync\ndata: {json.dumps({'dropped': subscription.dropped})}\n\n"
+            subscription.dropped = 0
+        try:
+            event = await asyncio.wait_for(queue.get(), keepalive)
+        except asyncio.TimeoutError:
+            yield ": keep-alive\n\n"
+            continue
+        yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+def sse_response(request, **filters):
+    async def events():
+        async with event_bus.subscribe(**filters) as subscription:
+            async for chunk in sse_events(request, subscription):
+                yield chunk
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@router.get("/stream")
+async def stream_events(
+    request: Request,
+    type: List[str] = Query([]),
+    server: List[str] = Query([]),
+    item: List[str] = Query([]),
+    q: Optional[str] = None,
+):
+    """Live feed of market changes as Server-Sent Events.
+
+    Event types are listing-added, listing-removed, history-point and alert;
+    filter with repeated `type`, `server` and `item` (exact item names)
+    and/or `q` (an item search, matched like /market/listings' item_name).
+    Each event's data is a JSON object with at least `type`, `item` and `server`.
+    """
+    unknown = set(type) - set(EVENT_TYPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown event type(s): {', '.join(sorted(unknown))}")
+    return sse_response(request, types=type, servers=server, items=item, query=q)
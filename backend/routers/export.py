@@ -0,0 +1,140 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from .. import database
+from ..search_index import item_ids_sql
+from ..price_stats import STAT_COLUMNS
+
+router = APIRouter(
+    prefix="/market/export",
+    tags=["export"]
+)
+
+# Rows fetched from SQLite and encoded per chunk of the response
+EXPORT_BATCH = 5000
+FORMAT_PATTERN = "^(ndjson|csv)$"
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+
+LISTING_COLUMNS = ("id", "server", "item", "seller_name", "quantity", "price_won", "price_yang",
+                   "total_price_yang", "seen_at", "removed_at")
+HISTORY_COLUMNS = ("timestamp", "server", "item", "avg_unit_price", "min_unit_price", "total_listings",
+                   *STAT_COLUMNS)
+
+def _batches(sql, params):
+    """Result batches from a connection of the export's own, held only while the response streams."""
+    # Starlette advances sync iterators on worker threads, one step at a time
+    conn = database.connect(check_same_thread=False)
+    try:
+        cursor = conn.execute(sql, params)
+        while batch := cursor.fetchmany(EXPORT_BATCH):
+            yield batch
+    finally:
+        conn.close()
+
+def _ndjson(columns, batches):
+    for batch in batches:
+        yield "".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in batch).encode()
+
+def _csv(columns, batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for batch in batches:
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # no rows, header only
+        yield buffer.getvalue().encode()
+
+def _gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        if data := compressor.compress(chunk):
+            yield data
+    yield compressor.flush()
+
+def _filters(server, item, time_col, from_, to):
+    """WHERE clauses and params shared by both exports."""
+    clauses, params = [], {}
+    if server:
+        clauses.append("t.server_id = (SELECT id FROM servers WHERE name = :server)")
+        params["server"] = server
+    if item:
+        match_sql, match_params = item_ids_sql(item)
+        clauses.append(f"t.item_id IN ({match_sql})")
+        params.update(match_params)
+    # Stored timestamps are naive local time
+    for op, name, value in ((">=", "from_", from_), ("<=", "to", to)):
+        if value:
+            clauses.append(f"t.{time_col} {op} :{name}")
+            params[name] = value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+    return clauses, params
+
+def _stream(request, name, fmt, columns, sql, params):
+    batches = _batches(sql, params)
+    body = _ndjson(columns, batches) if fmt == "ndjson" else _csv(columns, batches)
+    headers = {"Content-Disposition": f'attachment; filename="{name}.{fmt}"', "Vary": "Accept-Encoding"}
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        body = _gzip(body)
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers=headers)
+
+@router.get("/listings")
+def export_listings(
+    request: Request,
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    server: Optional[str] = None,
+    item: Optional[str] = None,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    include_removed: bool = False,
+):
+    """Streams listings as NDJSON or CSV, gzipped when the client accepts it.
+
+    Filters by server name, item search (as in /market/listings) and
+    `seen_at` range; only active listings unless `include_removed`. Rows
+    are read in batches and written out as they come, so memory use does
+    not grow with the export's size. Rows come in no particular order.
+    """
+    clauses, params = _filters(server, item, "seen_at", from_, to)
+    if not include_removed:
+        clauses.append("t.removed_at IS NULL")
+    sql = f"""
+        SELECT t.id, s.name, i.name, t.seller_name, t.quantity, t.price_won, t.price_yang,
+               t.total_price_yang, t.seen_at, t.removed_at
+        FROM listings t
+        JOIN servers s ON s.id = t.server_id
+        JOIN items i ON i.id = t.item_id
+        {"WHERE " + " AND ".join(clauses) if clauses else ""}
+    """
+    return _stream(request, "listings", format, LISTING_COLUMNS, sql, params)
+
+@router.get("/history")
+def export_history(
+    request: Request,
+    format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+    server: Optional[str] = None,
+    item: Optional[str] = None,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+):
+    """Streams price_history points as NDJSON or CSV, gzipped when the client accepts it.
+
+    Same filters as the listings export, on the point's timestamp. Points
+    recorded before history was kept per server have a null server.
+    """
+    clauses, params = _filters(server, item, "timestamp", from_, to)
+    sql = f"""
+        SELECT t.timestamp, s.name, t.item_name, t.avg_unit_price, t.min_unit_price, t.total_listings,
+               {", ".join(f"t.{column}" for column in STAT_COLUMNS)}
+        FROM price_history t
+        LEFT JOIN servers s ON s.id = t.server_id
+        {"WHERE " + " AND ".join(clauses) if clauses else ""}
+    """
+    return _stream(request, "history", format, HISTORY_COLUMNS, sql, params)
@@ -1,69 +1,288 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import base64
+import json
+import orjson
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import Integer, String, text, tuple_, type_coerce
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from .. import models, schemas, database
+from ..search_index import item_ids_sql, suggest
+from ..bonuses import listing_ids_sql, parse_filter
+from ..market_summary import quantile
+from ..price_stats import STAT_COLUMNS
+from ..history_rollup import MAX_POINTS, compare, query_history
+from ..response_cache import CachedRoute, cached
 
+# GET responses are cached until a scrape changes the servers/items they cover (see response_cache.py)
 router = APIRouter(
     prefix="/market",
-    tags=["market"]
+    tags=["market"],
+    route_class=CachedRoute,
 )
 
+# Most series one compare request may ask for (items x servers)
+MAX_COMPARE_SERIES = 50
+
+# Flat projection get_listings reads instead of ORM objects (see _listings_json)
+LISTING_COLUMNS = (
+    models.Listing.id, models.Server.id, models.Server.name,
+    models.Item.id, models.Item.name, models.Item.category, models.Item.image_url,
+    models.Listing.seller_name, models.Listing.quantity, models.Listing.price_won, models.Listing.price_yang,
+    models.Listing.total_price_yang, models.Listing.seen_at,
+)
+# Listing ids per bonus lookup, as selectinload batches them
+BONUS_CHUNK = 500
+
+# Sort column and direction for each sort_by; `id` breaks ties so keyset cursors are exact
+SORT_KEYS = {
+    "newest": (type_coerce(models.Listing.seen_at, String), "desc"),
+    "price_asc": (models.Listing.total_price_yang, "asc"),
+    "price_desc": (models.Listing.total_price_yang, "desc"),
+}
+
+def encode_cursor(sort_by, value, listing_id):
+    raw = json.dumps([sort_by, value, listing_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor, sort_by):
+    try:
+        cursor_sort, value, listing_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_sort != sort_by:
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different sort_by")
+    return value, listing_id
+
 @router.get("/listings", response_model=List[schemas.ListingOut])
+@cached(lambda params: {"servers": params.getlist("server"), "search": params.get("item_name")})
 def get_listings(
     skip: int = 0, 
     limit: int = 100, 
     server: Optional[str] = None, 
     item_name: Optional[str] = None,
     sort_by: Optional[str] = "newest",
+    cursor: Optional[str] = None,
+    bonus: List[str] = Query([]),
     db: Session = Depends(database.get_db)
 ):
-    query = db.query(models.Listing)
+    """Returns active listings, one page at a time.
+
+    Pass the X-Next-Cursor response header back as `cursor` to get the next
+    page; this seeks on (sort column, id) so deep pages cost the same as the
+    first. `skip` still works but gets slower the deeper it goes.
+
+    `bonus` filters on bonus values and may be repeated, e.g.
+    `bonus=Ortalama Zarar>=40&bonus=Beceri Hasarı>=10` (also <=, >, <, =;
+    names match case- and diacritic-insensitively).
+    """
+    sort_col, direction = SORT_KEYS.get(sort_by, (models.Listing.id, "desc"))
+    sort_by = sort_by if sort_by in SORT_KEYS else "id"
+
+    query = db.query(*LISTING_COLUMNS, sort_col) \
+        .join(models.Server, models.Server.id == models.Listing.server_id) \
+        .join(models.Item, models.Item.id == models.Listing.item_id) \
+        .filter(models.Listing.removed_at.is_(None))
     
     if server:
-        query = query.join(models.Server).filter(models.Server.name == server)
+        # Filter on server_id directly so the (server_id, sort column) indexes apply
+        server_id = db.query(models.Server.id).filter(models.Server.name == server).scalar_subquery()
+        query = query.filter(models.Listing.server_id == server_id)
     if item_name:
-        query = query.join(models.Item).filter(models.Item.name.contains(item_name))
-        
-    if sort_by == "newest":
-        query = query.order_by(models.Listing.seen_at.desc())
-    elif sort_by == "price_asc":
-        query = query.order_by(models.Listing.total_price_yang.asc())
-    elif sort_by == "price_desc":
-        query = query.order_by(models.Listing.total_price_yang.desc())
-
-    listings = query.offset(skip).limit(limit).all()
-    return listings
+        # Folded, alias-aware substring match served by the items_fts trigram index
+        match_sql, params = item_ids_sql(item_name)
+        query = query.filter(models.Listing.item_id.in_(
+            text(match_sql).bindparams(**params).columns(rowid=Integer)))
+    if bonus:
+        try:
+            filters = [parse_filter(expression) for expression in bonus]
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        bonus_sql, params = listing_ids_sql(filters)
+        query = query.filter(models.Listing.id.in_(
+            text(bonus_sql).bindparams(**params).columns(listing_id=Integer)))
+
+    key = tuple_(sort_col, models.Listing.id)
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by)
+        query = query.filter(key < tuple_(value, last_id) if direction == "desc" else key > tuple_(value, last_id))
+    elif skip:
+        query = query.offset(skip)
+
+    if direction == "desc":
+        query = query.order_by(sort_col.desc(), models.Listing.id.desc())
+    else:
+        query = query.order_by(sort_col.asc(), models.Listing.id.asc())
+
+    rows = query.limit(limit).all()
+    response = Response(_listings_json(db, rows), media_type="application/json")
+    if len(rows) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(sort_by, rows[-1][-1], rows[-1][0])
+    return response
+
+def _listings_json(db, rows):
+    """JSON of a page of listings, shaped exactly like List[schemas.ListingOut].
+
+    Built from the flat LISTING_COLUMNS rows plus one IN query per
+    BONUS_CHUNK listings for bonuses, and encoded with orjson: no ORM
+    objects and no per-row model validation.
+    """
+    bonuses = {}
+    ids = [row[0] for row in rows]
+    bonus = models.ListingBonus
+    for start in range(0, len(ids), BONUS_CHUNK):
+        for listing_id, name, value, value_num in db.query(
+                bonus.listing_id, bonus.bonus_name, bonus.bonus_value, bonus.value_num) \
+                .filter(bonus.listing_id.in_(ids[start:start + BONUS_CHUNK])) \
+                .order_by(bonus.id):
+            bonuses.setdefault(listing_id, []).append(
+                {"bonus_name": name, "bonus_value": value, "value_num": value_num})
+    return orjson.dumps([
+        {
+            "id": listing_id,
+            "server": {"id": server_id, "name": server_name},
+            "item": {"id": item_id, "name": item_name, "category": category, "image_url": image_url},
+            "seller_name": seller_name,
+            "quantity": quantity,
+            "price_won": price_won,
+            "price_yang": price_yang,
+            "total_price_yang": total_price_yang,
+            "seen_at": seen_at,
+            "bonuses": bonuses.get(listing_id, []),
+        }
+        for (listing_id, server_id, server_name, item_id, item_name, category, image_url, seller_name, quantity,
+             price_won, price_yang, total_price_yang, seen_at, _) in rows
+    ])
+
+@router.get("/items/search")
+@cached()
+def search_items(q: str, limit: int = Query(10, ge=1, le=50), db: Session = Depends(database.get_db)):
+    """Autocomplete for item names.
+
+    Case- and diacritic-insensitive ('kilic' finds 'Kılıcı') and aware of the
+    scraper's slang aliases ('kdp' finds 'Kırmızı Demir Pala').
+    """
+    conn = db.connection().connection.driver_connection
+    return [
+        {"id": item_id, "name": name, "alias": alias}
+        for item_id, name, alias in suggest(conn, q, limit)
+    ]
 
 @router.get("/stats/top-items")
+@cached()
 def get_top_items(db: Session = Depends(database.get_db)):
-    """Returns the most frequently listed items (by listing count)."""
+    """Returns the most frequently listed items (by active listing count).
+
+    Reads market_summary, so the cost grows with items, not listings.
+    """
     from sqlalchemy import func
-    results = db.query(models.Item.name, func.count(models.Listing.id).label("count")) \
-        .join(models.Listing) \
-        .group_by(models.Item.name) \
-        .order_by(func.count(models.Listing.id).desc()) \
+    summary = models.MarketSummary
+    results = db.query(models.Item.id, models.Item.name,
+                       func.sum(summary.listing_count).label("count"),
+                       func.min(summary.min_unit_price)) \
+        .join(summary, summary.item_id == models.Item.id) \
+        .group_by(models.Item.id) \
+        .order_by(func.sum(summary.listing_count).desc()) \
         .limit(10).all()
-    
-    return [{"name": name, "count": count} for name, count in results]
 
-@router.get("/stats/price-history")
-def get_price_history(item_name: str, db: Session = Depends(database.get_db)):
-    """Returns the recorded price history for a specific item."""
-    history = db.query(models.PriceHistory)\
-        .filter(models.PriceHistory.item_name == item_name)\
-        .order_by(models.PriceHistory.timestamp.asc())\
-        .all()
-    
+    sketches = {}
+    for item_id, sketch in db.query(summary.item_id, summary.sketch) \
+            .filter(summary.item_id.in_([item_id for item_id, *_ in results])):
+        sketches.setdefault(item_id, []).append(sketch)
+
     return [
         {
-            "timestamp": h.timestamp, 
-            "avg_unit_price": h.avg_unit_price, 
-            "min_unit_price": h.min_unit_price,
-            "total_listings": h.total_listings
-        } 
-        for h in history
+            "name": name,
+            "count": count,
+            "min_unit_price": min_price,
+            "median_unit_price": quantile(sketches.get(item_id, []), 0.5),
+        }
+        for item_id, name, count, min_price in results
     ]
 
+def _local(t):
+    # Stored timestamps are naive local time
+    return t.astimezone().replace(tzinfo=None) if t and t.tzinfo else t
+
+def _ids_by_name(db, model, names):
+    rows = db.query(model.name, model.id).filter(model.name.in_(names)).all()
+    return dict(rows)
+
+@router.get("/stats/price-history")
+@cached(lambda params: {"servers": params.getlist("server"), "items": params.getlist("item_name")})
+def get_price_history(
+    response: Response,
+    item_name: str,
+    server: Optional[str] = None,
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    bucket: Optional[str] = Query(None, pattern="^(15m|1h|1d|1w)$"),
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_POINTS),
+    downsample: str = Query("ohlc", pattern="^(ohlc|lttb)$"),
+    db: Session = Depends(database.get_db)
+):
+    """Returns the price history for an item, at most MAX_POINTS points.
+
+    History is kept per server; without `server` the points of every server
+    are combined. Short ranges come back as raw points. Longer ones (or an
+    explicit `bucket`) come back as open/high/low/close of min_unit_price
+    and average avg_unit_price per bucket, read from the rollup tables;
+    `downsample=lttb` instead picks `max_points` real points that keep the
+    curve's shape. The X-Bucket header says which resolution was used.
+    """
+    item_id = _ids_by_name(db, models.Item, [item_name]).get(item_name)
+    server_id = _ids_by_name(db, models.Server, [server]).get(server) if server else None
+    if item_id is None or (server and server_id is None):
+        response.headers["X-Bucket"] = "raw"
+        return []
+
+    conn = db.connection().connection.driver_connection
+    rows, resolution = query_history(conn, item_id, server_id, _local(from_), _local(to), bucket, max_points,
+                                     downsample, raw_columns=STAT_COLUMNS)
+    response.headers["X-Bucket"] = resolution
+    return rows
+
+@router.get("/stats/compare")
+@cached(lambda params: {"servers": params.getlist("server"), "items": params.getlist("item")})
+def compare_price_history(
+    item: List[str] = Query(...),
+    server: List[str] = Query(...),
+    from_: Optional[datetime] = Query(None, alias="from"),
+    to: Optional[datetime] = None,
+    bucket: Optional[str] = Query(None, pattern="^(15m|1h|1d|1w)$"),
+    max_points: Optional[int] = Query(None, ge=3, le=MAX_POINTS),
+    db: Session = Depends(database.get_db)
+):
+    """Aligned price series for every requested item on every requested server.
+
+    Meant for one item across many servers or many items on one server.
+    All series share one bucket (the finest that fits `max_points`, no
+    finer than `bucket`) and one `timestamps` axis, with null where a
+    series has no point, so the response is columnar:
+    {"bucket", "timestamps", "series": [{"item", "server", "min_unit_price", "avg_unit_price"}]}.
+    """
+    item, server = list(dict.fromkeys(item)), list(dict.fromkeys(server))
+    if len(item) * len(server) > MAX_COMPARE_SERIES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_COMPARE_SERIES} series per request")
+    item_ids = _ids_by_name(db, models.Item, item)
+    server_ids = _ids_by_name(db, models.Server, server)
+    missing = [name for name in item if name not in item_ids] + [name for name in server if name not in server_ids]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Unknown item or server: {', '.join(missing)}")
+
+    conn = db.connection().connection.driver_connection
+    resolution, timestamps, series = compare(conn, list(item_ids.values()), list(server_ids.values()),
+                                             _local(from_), _local(to), bucket, max_points)
+    return {
+        "bucket": resolution,
+        "timestamps": timestamps,
+        "series": [
+            {"item": item_name, "server": server_name, **series[(item_ids[item_name], server_ids[server_name])]}
+            for item_name in item for server_name in server
+        ],
+    }
+
 @router.get("/servers")
+@cached()
 def get_servers(db: Session = Depends(database.get_db)):
     return db.query(models.Server).all()
@@ -0,0 +1,55 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session, joinedload
+from typing import List
+from .. import models, schemas, database
+from ..data_version import bump
+from ..scraper import SERVER_MAPPING
+
+router = APIRouter(
+    prefix="/watchlist",
+    tags=["watchlist"]
+)
+
+@router.get("", response_model=List[schemas.WatchlistOut])
+def get_watchlist(db: Session = Depends(database.get_db)):
+    """Watched (query, server) pairs with their current interval and next run."""
+    return db.query(models.WatchlistEntry) \
+        .options(joinedload(models.WatchlistEntry.server)) \
+        .order_by(models.WatchlistEntry.next_run_at.asc()) \
+        .all()
+
+@router.post("", response_model=schemas.WatchlistOut, status_code=201)
+def add_to_watchlist(entry: schemas.WatchlistIn, db: Session = Depends(database.get_db)):
+    """Starts watching a query on a server; the first scan is due right away."""
+    # Same check as /scrape: an unknown server would be scraped as Marmara
+    if entry.server not in SERVER_MAPPING:
+        raise HTTPException(status_code=400, detail=f"Unknown server '{entry.server}'")
+    server = db.query(models.Server).filter(models.Server.name == entry.server).first()
+    if server is None:
+        server = models.Server(name=entry.server)
+        db.add(server)
+        db.flush()
+        # A new entry for the cached server list
+        bump(db.connection().connection.driver_connection.cursor())
+
+    existing = db.query(models.WatchlistEntry) \
+        .filter(models.WatchlistEntry.query == entry.query, models.WatchlistEntry.server_id == server.id) \
+        .first()
+    if existing is not None:
+        existing.enabled = True
+        db.commit()
+        return existing
+
+    watched = models.WatchlistEntry(query=entry.query, server_id=server.id, next_run_at=datetime.now())
+    db.add(watched)
+    db.commit()
+    db.refresh(watched)
+    return watched
+
+@router.delete("/{entry_id}", status_code=204)
+def remove_from_watchlist(entry_id: int, db: Session = Depends(database.get_db)):
+    deleted = db.query(models.WatchlistEntry).filter(models.WatchlistEntry.id == entry_id).delete()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Unknown watchlist entry")
+    db.commit()
@@ -1,34 +1,149 @@
-import schedule
-import time
-import subprocess
+import argparse
+import asyncio
 import os
 from datetime import datetime
 
-# Path to the scraper script
-SCRAPER_PATH = os.path.join(os.path.dirname(__file__), "scraper.py")
+try:
+    from .database import DB_PATH, connect, init_db
+    from .browser_pool import DEFAULT_POOL_SIZE
+    from .jobs import JobQueue, DEFAULT_JOB_WORKERS
+    from .metrics import serve as serve_metrics
+    from .retention import RETENTION_INTERVAL_HOURS, run_forever as run_retention
+    from .scraper import SERVER_MAPPING
+    from .watchlist import due_entries, reschedule
+except ImportError:  # run directly as `python scheduler.py`
+    from database import DB_PATH, connect, init_db
+    from browser_pool import DEFAULT_POOL_SIZE
+    from jobs import JobQueue, DEFAULT_JOB_WORKERS
+    from metrics import serve as serve_metrics
+    from retention import RETENTION_INTERVAL_HOURS, run_forever as run_retention
+    from scraper import SERVER_MAPPING
+    from watchlist import due_entries, reschedule
 
-def run_scraper():
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting scheduled scrape...")
-    try:
-        # Run the scraper as a subprocess
-        subprocess.run(["python", SCRAPER_PATH], check=True)
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Scrape finished successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error running scraper: {e}")
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+# How often the watchlist is checked for due entries
+TICK_SECONDS = float(os.environ.get("WATCHLIST_TICK_SECONDS", "30"))
 
-# Schedule the job every 15 minutes
-schedule.every(15).minutes.do(run_scraper)
 
-# Also run it once immediately on startup
-print("Scheduler started. Running first scrape now...")
-run_scraper()
+class WatchlistScheduler:
+    """Dispatches due watchlist entries to a JobQueue.
 
-if __name__ == "__main__":
-    try:
+    Each entry is rescheduled as it is dispatched, with an interval taken
+    from its recent price volatility (see watchlist.interval_for), so
+    fast-moving items come back often and flat ones rarely. The queue's
+    workers and browser pool are shared with POST /scrape when the API
+    runs the scheduler in-process.
+    """
+
+    def __init__(self, jobs, db_path=None, tick=TICK_SECONDS):
+        self.jobs = jobs
+        self.db_path = db_path or DB_PATH
+        self.tick = tick
+        self._task = None
+
+    def claim_due(self, now=None):
+        """Reschedules every due entry; returns [(query, server_name, next_run)] to submit.
+
+        Only SQLite work (the volatility queries behind reschedule), so it can
+        run in a thread; the submissions belong on the queue's event loop.
+        """
+        now = now or datetime.now()
+        conn = connect(self.db_path)
+        try:
+            due = []
+            for entry_id, query, server_id, server_name in due_entries(conn, now):
+                due.append((query, server_name, reschedule(conn, entry_id, query, server_id, now)))
+            conn.commit()
+            return due
+        finally:
+            conn.close()
+
+    def submit(self, due, now=None):
+        """Queues claimed entries; returns the submitted jobs."""
+        now = now or datetime.now()
+        submitted = []
+        for query, server_name, next_run in due:
+            job, coalesced = self.jobs.submit(query, server_name)
+            submitted.append(job)
+            print(f"[{now.strftime('%H:%M:%S')}] Watchlist: '{query}' on {server_name} -> job {job.id}"
+                  f"{' (joined)' if coalesced else ''}, next at {next_run.strftime('%H:%M')}")
+        return submitted
+
+    def run_once(self, now=None):
+        """Queues every due entry; returns the submitted jobs."""
+        return self.submit(self.claim_due(now), now)
+
+    async def run_forever(self):
         while True:
-            schedule.run_pending()
-            time.sleep(1)
-    except KeyboardInterrupt:
-        print("Scheduler stopped.")
+            try:
+                # Off the loop: in the API process it also serves requests and SSE streams
+                now = datetime.now()
+                self.submit(await asyncio.to_thread(self.claim_due, now), now)
+            except Exception as e:
+                print(f"Watchlist tick failed: {e}")
+            await asyncio.sleep(self.tick)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run_forever())
+        return self
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+def add_entry(db_path, query, server_name):
+    """Adds (query, server) to the watchlist, due immediately.
+
+    Raises ValueError for a server the scraper does not know, which it
+    would otherwise quietly scrape as Marmara.
+    """
+    if server_name not in SERVER_MAPPING:
+        raise ValueError(f"Unknown server '{server_name}'")
+    conn = connect(db_path)
+    conn.execute("INSERT OR IGNORE INTO servers (name) VALUES (?)", (server_name,))
+    conn.execute("""
+        INSERT OR IGNORE INTO watchlist (query, server_id, next_run_at)
+        VALUES (?, (SELECT id FROM servers WHERE name = ?), ?)
+    """, (query, server_name, datetime.now()))
+    conn.commit()
+    conn.close()
+
+async def main(workers, pool_size):
+    jobs = await JobQueue(workers, pool_size).start()
+    scheduler = WatchlistScheduler(jobs).start()
+    # Pruning and vacuum run alongside the scrapes, in short batches
+    retention = asyncio.create_task(run_retention()) if RETENTION_INTERVAL_HOURS else None
+    print(f"Scheduler started (tick {scheduler.tick:.0f}s, {jobs.workers} workers, {pool_size} pages).")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        if retention:
+            retention.cancel()
+        await scheduler.stop()
+        await jobs.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Watchlist-driven scrape scheduler")
+    parser.add_argument("--add", metavar="QUERY", help="Add QUERY to the watchlist and exit")
+    parser.add_argument("--server", default=os.environ.get("SERVER_NAME", "Marmara"))
+    parser.add_argument("--workers", type=int, default=DEFAULT_JOB_WORKERS, help="Concurrent scrape jobs")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="Browser pages shared by the jobs")
+    parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("METRICS_PORT", "0")),
+                        help="Serve Prometheus metrics on this port (0: off)")
+    args = parser.parse_args()
+
+    init_db()
+    if args.add:
+        try:
+            add_entry(DB_PATH, args.add, args.server)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Watching '{args.add}' on {args.server}.")
+    else:
+        if args.metrics_port:
+            serve_metrics(args.metrics_port)
+        try:
+            asyncio.run(main(args.workers, args.pool_size))
+        except KeyboardInterrupt:
+            print("Scheduler stopped.")
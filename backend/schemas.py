@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
 class ServerBase(BaseModel):
@@ -21,6 +21,7 @@ class ItemBase(BaseModel):
 class ListingBonusBase(BaseModel):
     bonus_name: str
     bonus_value: Optional[str] = None
+    value_num: Optional[float] = None
     
     class Config:
         from_attributes = True
@@ -39,3 +40,39 @@ class ListingOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+class WatchlistIn(BaseModel):
+    query: str
+    server: str = "Marmara"
+
+class WatchlistOut(BaseModel):
+    id: int
+    query: str
+    server: ServerBase
+    enabled: bool
+    interval_minutes: Optional[float] = None
+    volatility: Optional[float] = None
+    last_run_at: Optional[datetime] = None
+    next_run_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class AlertRuleIn(BaseModel):
+    item: str
+    server: Optional[str] = None  # every server
+    max_unit_price: int
+    bonus: List[str] = []  # thresholds like "Ortalama Zarar>=40"
+    sink: Literal["log", "webhook", "sse"] = "log"
+    target: Optional[str] = None  # webhook URL
+
+class AlertRuleOut(BaseModel):
+    id: int
+    item: ItemBase
+    server: Optional[ServerBase] = None
+    max_unit_price: int
+    bonus: List[str] = []
+    sink: str
+    target: Optional[str] = None
+    enabled: bool
+    created_at: Optional[datetime] = None
@@ -1,19 +1,58 @@
 import os
-import sqlite3
 import asyncio
-import random
-import sys
-import json
 import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
+
+import numpy as np
+
+try:
+    from .browser_pool import BrowserPool, DEFAULT_POOL_SIZE
+    from .capture import ResponseCapture, listings_from_payload, CAPTURE_DIR
+    from .corpus import CORPUS_DIR, record_page
+    from .parsing import parse_listing_rows, listing_signature
+    from .database import DB_PATH, init_db as init_schema
+    from .db_writer import BulkWriter
+    from .readiness import READY_TIMEOUT_MS, NO_DATA_TEXT, mark_table, wait_for_redraw
+    from .search_index import item_ids_sql, resolve_alias
+    from .price_stats import load_listings, robust_stats
+    from .history_rollup import record_point
+    from . import history_store
+    from .alerts import alert_engine
+    from .events import HISTORY_POINT, event_bus, publish_batch
+    from .data_version import bump
+    from .metrics import DB_ROWS_WRITTEN, SCRAPE_JOBS, SCRAPE_PAGES, SCRAPE_PHASE_SECONDS, SCRAPE_ROWS
+except ImportError:  # run directly as `python scraper.py`
+    from browser_pool import BrowserPool, DEFAULT_POOL_SIZE
+    from capture import ResponseCapture, listings_from_payload, CAPTURE_DIR
+    from corpus import CORPUS_DIR, record_page
+    from parsing import parse_listing_rows, listing_signature
+    from database import DB_PATH, init_db as init_schema
+    from db_writer import BulkWriter
+    from readiness import READY_TIMEOUT_MS, NO_DATA_TEXT, mark_table, wait_for_redraw
+    from search_index import item_ids_sql, resolve_alias
+    from price_stats import load_listings, robust_stats
+    from history_rollup import record_point
+    import history_store
+    from alerts import alert_engine
+    from events import HISTORY_POINT, event_bus, publish_batch
+    from data_version import bump
+    from metrics import DB_ROWS_WRITTEN, SCRAPE_JOBS, SCRAPE_PAGES, SCRAPE_PHASE_SECONDS, SCRAPE_ROWS
 
 # Configuration
-DB_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "metin2.db")
-SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "database", "schema.sql")
-URL = "https://metin2alerts.com/store"
-HISTORY_EXPORT_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "exports")
+URL = os.environ.get("STORE_URL", "https://metin2alerts.com/store")
+# Read listings from intercepted store responses instead of the rendered table
+CAPTURE_MODE = os.environ.get("SCRAPER_CAPTURE", "0") == "1"
+RECORD_CAPTURES = os.environ.get("SCRAPER_RECORD_CAPTURES", "0") == "1"
+# Save every result page read to a replay corpus ("1" for data/fixtures/corpus, or a directory)
+RECORD_CORPUS = os.environ.get("SCRAPER_RECORD_CORPUS", "0")
+if RECORD_CORPUS in ("", "0"):
+    RECORD_CORPUS = None
+elif RECORD_CORPUS == "1":
+    RECORD_CORPUS = CORPUS_DIR
+# Legacy networkidle + fixed sleeps instead of readiness signals (for timing comparisons)
+FIXED_WAITS = os.environ.get("SCRAPER_FIXED_WAITS", "0") == "1"
 
 SERVER_MAPPING = {
     "Marmara": "409",
@@ -39,649 +78,484 @@ SERVER_MAPPING = {
 
 def init_db():
     """Initialize the database with the schema."""
-    os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
-    os.makedirs(HISTORY_EXPORT_DIR, exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-    
-    with open(SCHEMA_PATH, 'r', encoding='utf-8') as f:
-        schema = f.read()
-        cursor.executescript(schema)
-    
-    conn.commit()
-    conn.close()
+    init_schema(DB_PATH)
     print(f"Database initialized at {DB_PATH}")
 
-def parse_price(price_str):
-    """Clean and convert price strings like '1 w', '50 m', '10.000'."""
-    if not price_str: return 0
-    clean_str = price_str.lower().replace('.', '').strip()
-    
-    multiplier = 1
-    if 'w' in clean_str:
-        multiplier = 100000000
-        clean_str = clean_str.replace('w', '')
-    elif 'm' in clean_str:
-        multiplier = 1000000
-        clean_str = clean_str.replace('m', '')
-    elif 'k' in clean_str:
-        multiplier = 1000
-        clean_str = clean_str.replace('k', '')
-        
-    try:
-        return int(float(clean_str) * multiplier)
-    except ValueError:
-        return 0
+async def analyze_market(search_query, server_name=None):
+    """Calculates market stats per item and server and saves them to price_history.
+
+    With `server_name` only that server's series get a new point. Runs on
+    the DB thread, like save_to_db.
+    """
+    await on_db_thread(_analyze_market, search_query, server_name)
 
-async def analyze_market(search_query):
-    """Calculates market stats and saves to price_history."""
+def _analyze_market(search_query, server_name):
     print(f"Analyzing market for '{search_query}'...")
-    conn = sqlite3.connect(DB_PATH)
+    # Share the sweep's connection instead of opening one per query
+    conn = get_writer().conn
     cursor = conn.cursor()
     
     try:
-        # We analyze listings for the items matching the search query
-        # Calculate unit_price in SQL: total_price_yang / quantity
-        # Filter where quantity > 0
-        
-        query = """
+        # Take the write lock up front: a deferred BEGIN that has to upgrade its read
+        # lock fails with SQLITE_BUSY at once instead of waiting out busy_timeout
+        cursor.execute("BEGIN IMMEDIATE")
+        # Stats for the items matching the search query come from market_summary,
+        # which the writer keeps up to date: one row per item and server, not per listing
+        match_sql, params = item_ids_sql(search_query)
+        server_id = None
+        if server_name:
+            row = cursor.execute("SELECT id FROM servers WHERE name = ?", (server_name,)).fetchone()
+            if row is None:
+                conn.rollback()
+                return
+            server_id = row[0]
+        query = f"""
             SELECT 
+                i.id,
                 i.name,
-                COUNT(*) as total_listings,
-                MIN(l.total_price_yang / l.quantity) as min_unit_price,
-                AVG(l.total_price_yang / l.quantity) as avg_unit_price
-            FROM listings l
-            JOIN items i ON l.item_id = i.id
-            WHERE i.name LIKE ? AND l.quantity > 0
-            GROUP BY i.name
+                sv.id,
+                sv.name,
+                s.listing_count as total_listings,
+                s.min_unit_price,
+                s.sum_unit_price * 1.0 / s.listing_count as avg_unit_price
+            FROM market_summary s
+            JOIN items i ON s.item_id = i.id
+            JOIN servers sv ON s.server_id = sv.id
+            WHERE s.item_id IN ({match_sql}) {"AND s.server_id = :server_id" if server_id else ""}
         """
         
-        cursor.execute(query, (f"%{search_query}%",))
+        cursor.execute(query, {**params, "server_id": server_id})
         results = cursor.fetchall()
+
+        # Median, percentiles and outlier-trimmed means in one vectorized pass over the listings
+        item_ids, server_ids, totals, quantities = load_listings(conn, match_sql, params, server_id)
+        robust = robust_stats(np.column_stack([item_ids, server_ids]), totals, quantities)
         
         timestamp = datetime.now()
+        points = []
         
         for row in results:
-            item_name, total, min_price, avg_price = row
+            item_id, item_name, row_server_id, row_server_name, total, min_price, avg_price = row
+            stats = robust.get((item_id, row_server_id), {})
             
             # Save to history
-            cursor.execute("""
-                INSERT INTO price_history (item_name, avg_unit_price, min_unit_price, total_listings, timestamp)
-                VALUES (?, ?, ?, ?, ?)
-            """, (item_name, int(avg_price), int(min_price), total, timestamp))
+            values = {"avg_unit_price": int(avg_price), "min_unit_price": int(min_price),
+                      "total_listings": total, **stats}
+            cursor.execute(f"""
+                INSERT INTO price_history (item_id, server_id, item_name, timestamp, {", ".join(history_store.COLUMNS)})
+                VALUES (?, ?, ?, ?, {", ".join("?" * len(history_store.COLUMNS))})
+            """, (item_id, row_server_id, item_name, timestamp,
+                  *(values.get(column) for column in history_store.COLUMNS)))
+            record_point(cursor, item_id, row_server_id, timestamp, int(avg_price), int(min_price), total)
             
-            print(f"Recorded history for {item_name}: Avg {int(avg_price):,} Yang, Min {int(min_price):,} Yang, Count {total}")
-            
-            # Export JSON for this item
-            export_history_to_json(item_name, cursor)
+            print(f"Recorded history for {item_name} on {row_server_name}: Avg {int(avg_price):,} Yang, "
+                  f"Min {int(min_price):,} Yang, Median {stats.get('median_unit_price') or 0:,} Yang, Count {total}")
+            points.append((item_id, item_name, row_server_id, row_server_name, values))
             
+        if points:
+            bump(cursor, [(row_server_id, item_id) for item_id, _, row_server_id, _, _ in points])
         conn.commit()
-        
     except Exception as e:
+        if conn.in_transaction:
+            conn.rollback()
         print(f"Error in market analysis: {e}")
-    finally:
-        conn.close()
+        # The job records the query as failed
+        raise
 
-def export_history_to_json(item_name, cursor):
-    """Exports price history for an item to JSON for Chart.js."""
+    # The points are committed; failing to mirror them must not fail the job,
+    # whose retry would record them a second time
+    DB_ROWS_WRITTEN.inc(len(points), table="price_history", op="insert")
     try:
-        cursor.execute("""
-            SELECT timestamp, avg_unit_price, min_unit_price, total_listings 
-            FROM price_history 
-            WHERE item_name = ? 
-            ORDER BY timestamp ASC
-        """, (item_name,))
-        
-        rows = cursor.fetchall()
-        data = [
-            {
-                "timestamp": row[0],
-                "avg_unit_price": row[1],
-                "min_unit_price": row[2],
-                "total_listings": row[3]
-            } 
-            for row in rows
-        ]
-        
-        # Clean filename
-        safe_name = "".join([c for c in item_name if c.isalnum() or c in (' ', '-', '_')]).strip().replace(' ', '_')
-        filepath = os.path.join(HISTORY_EXPORT_DIR, f"history_{safe_name}.json")
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-            
-        print(f"Exported history to {filepath}")
-        
+        # O(1) append per point to the binary store; JSON exports are made on demand from it
+        for item_id, _, row_server_id, _, values in points:
+            history_store.append(item_id, row_server_id, timestamp, values)
     except Exception as e:
-        print(f"Error exporting JSON for {item_name}: {e}")
-
-# Common item name mappings (Short/Slang -> Full Game Name)
-ITEM_NAME_MAPPINGS = {
-    "dolunay": "Dolunay Kılıcı",
-    "kdp": "Kırmızı Demir Pala",
-    "syk": "Siyah Yuvarlak Kalkan",
-    "gby": "Geyik Boynuzu Yay",
-    "zehir": "Zehir Kılıcı",
-    "kin": "Kin Kılıcı",
-    "siyah çelik": "Siyah Çelik Zırh",
-    "mavi çelik": "Mavi Çelik Zırh",
-    "beşgen": "Beşgen Kalkan",
-    "orkide": "Orkide Çan",
-    "aslan ağzı": "Aslan Ağzı Kalkan",
-    "sahine": "Şahin Kalkan",
-    "kaplan": "Kaplan Kalkan",
-    "abonoz": "Abonoz Küpe",
-    "cennet": "Cennetin Gözü Kolye"
-}
-
-async def scrape_store(search_query=None, server_name=None):
-
-    if not search_query:
-
-        search_query = os.environ.get("SEARCH_QUERY")
-
-    
-
-    if not server_name:
-
-        server_name = os.environ.get("SERVER_NAME", "Marmara")
-
-    
-
-    if not search_query:
-
-        print("No search query provided.")
-
-        return
-
-
-
-    # Get server value from mapping
-
-    server_value = SERVER_MAPPING.get(server_name, "409") # Default to Marmara if not found
-
-    print(f"Scraping for server: {server_name} (Value: {server_value})")
-
-
-
-    # Generate list of queries to run
-
-    queries_to_run = []
-
-    
+        print(f"Appending history points to the history store failed: {e}")
+    try:
+        event_bus.publish_many([{"type": HISTORY_POINT, "item": item_name, "server": row_server_name,
+                                 "timestamp": timestamp.isoformat(), **values}
+                                for _, item_name, _, row_server_name, values in points])
+    except Exception as e:
+        print(f"Publishing history points failed: {e}")
 
+def build_query_queue(search_query):
+    """Expands a search into the list of store queries to run."""
     # Check if query has a plus sign (specific level search)
-
     if "+" in search_query:
+        return [search_query]
 
-        queries_to_run.append(search_query)
+    # It's a generic search, let's expand it
+    # 1. Add the base name itself (for materials/stones that don't have +)
+    base_name = resolve_alias(search_query)
+    queries_to_run = [base_name]
 
-    else:
-
-        # It's a generic search, let's expand it
-
-        # 1. Add the base name itself (for materials/stones that don't have +)
+    # 2. Add +0 to +9 iterations for equipment
+    # We assume if it's a generic search for equipment, user wants all levels
+    print(f"Detected generic search '{search_query}'. Expanding to +0...+9 scan.")
+    for i in range(10):
+        queries_to_run.append(f"{base_name}+{i}")
 
-        base_name = ITEM_NAME_MAPPINGS.get(search_query.lower(), search_query)
+    return queries_to_run
 
-        queries_to_run.append(base_name)
-
-        
+async def open_store(slot, server_value):
+    """Brings a pooled page to the store with `server_value` selected.
 
-        # 2. Add +0 to +9 iterations for equipment
-
-        # We assume if it's a generic search for equipment, user wants all levels
-
-        print(f"Detected generic search '{search_query}'. Expanding to +0...+9 scan.")
-
-        for i in range(10):
-
-            queries_to_run.append(f"{base_name}+{i}")
-
-
-
-    print(f"Planned search queue: {queries_to_run}")
-
-    
-
-    async with async_playwright() as p:
-
-        browser = await p.chromium.launch(headless=True)
-
-        # Create context once
-
-        context = await browser.new_context()
-
-        page = await context.new_page()
-
-        
-
-        try:
-
-            # Go to store once
+    Pages keep their state between jobs, so this only navigates on first use
+    and only re-selects when the slot was last used for another server.
+    """
+    page = slot.page
 
+    if not slot.loaded:
+        with SCRAPE_PHASE_SECONDS.time(phase="navigate"):
             await page.goto(URL, timeout=60000)
-
             await page.wait_for_load_state("networkidle")
+        slot.loaded = True
+        slot.server_value = None
 
-            
-
-            # Select Server
-
-            try:
-
-                selects = await page.query_selector_all("select")
-
-                if selects:
-
-                    await page.select_option("select", value=server_value)
-
-                    await page.wait_for_load_state("networkidle")
-
-                    await asyncio.sleep(2)
-
-            except Exception as e:
-
-                print(f"Error selecting server: {e}")
-
-
-
-            # Iterate through all generated queries
-
-            for current_query in queries_to_run:
-
-                print(f"\n>>> Scraper processing: '{current_query}'")
-
-                
-
-                # Search
-
-                try:
-
-                    search_input = page.locator("#item-search-input")
-
-                    # Ensure input is clear
-
-                    await search_input.click()
-
-                    await search_input.fill("")
-
-                    await asyncio.sleep(0.5)
-
-                    await search_input.type(current_query, delay=100)
-
-                    await asyncio.sleep(0.5)
-
-                    await search_input.press("Enter")
-
-                    await page.wait_for_load_state("networkidle")
-
-                    await asyncio.sleep(2) # Give a bit more time for results
-
-                except Exception as e:
-
-                    print(f"Error searching for {current_query}: {e}")
-
-                    continue
-
-
-
-                # Pagination Loop for Current Query
-
-                all_listings = []
-
-                page_num = 1
-
-                
-
-                while True:
-
-                    print(f"   Page {page_num} for {current_query}")
-
-                    try:
-
-                        # Check if no results
-
-                        no_data = page.get_by_text("No data available in table")
-
-                        if await no_data.count() > 0 and await no_data.is_visible():
-
-                             print("   No results found.")
-
-                             break
-
-                        
-
-                        await page.wait_for_selector("tbody tr", timeout=5000)
-
-                    except:
-
-                        print("   No rows found or timeout.")
-
-                        break
-
-                    
-
-                    content = await page.content()
-
-                    soup = BeautifulSoup(content, 'html.parser')
-
-                    rows = soup.select("tbody tr")
-
-                    
-
-                    if not rows or (len(rows) == 1 and "No data" in rows[0].text):
-
-                        print("   No data rows.")
-
-                        break
-
-
-
-                    print(f"   Found {len(rows)} rows.")
-
-                    
-
-                    for row in rows:
-
-                        try:
-
-                            cols = row.find_all('td')
-
-                            if len(cols) < 5: continue
-
-                            
-
-                            info_col = cols[1]
-
-                            name_div = info_col.find('div', class_=lambda x: x and 'font-medium' in x)
-
-                            item_name = ""
-
-                            special_bonuses = []
-
-                            
-
-                            if name_div:
-
-                                name_spans = name_div.find_all('span')
-
-                                special_bonuses = [s.get_text(strip=True) for s in name_spans]
+    if CAPTURE_MODE and slot.capture is None:
+        slot.capture = ResponseCapture(record_dir=CAPTURE_DIR if RECORD_CAPTURES else None).attach(page)
 
-                                for s in name_spans: s.extract()
-
-                                item_name = name_div.get_text(strip=True)
-
-                            else:
-
-                                item_name = info_col.get_text(strip=True)
-
-                            
-
-                            # Only add if it actually matches our query loosely
-
-                            # (Prevents generic 'Dolunay' search from polluting specific '+9' buckets if site fuzzy matches)
-
-                            # But since we iterate, we trust the scraper's query context.
-
-                            
-
-                            bonus_div = info_col.find('div', class_=lambda x: x and 'text-xs' in x and 'text-gray-400' in x)
-
-                            bonuses = []
-
-                            if bonus_div:
-
-                                bonuses = [s.get_text(strip=True) for s in bonus_div.find_all('span')]
-
-                            bonuses.extend(special_bonuses)
-
-                            
-
-                            quantity = parse_price(cols[2].get_text(strip=True)) or 1
-
-                            yang = parse_price(cols[3].get_text(strip=True))
-
-                            won = parse_price(cols[4].get_text(strip=True))
-
-                            seller = cols[5].get_text(strip=True) if len(cols) > 5 else "Unknown"
-
-                            
-
-                            total_yang = (won * 100_000_000) + yang
-
-                            unit_price = total_yang / quantity
-
-                            
-
-                            all_listings.append({
-
-                                "item_name": item_name,
-
-                                "seller": seller,
-
-                                "quantity": quantity,
-
-                                "price_won": won,
-
-                                "price_yang": yang,
-
-                                "total_yang": total_yang,
-
-                                "unit_price": unit_price,
-
-                                "bonuses": bonuses
-
-                            })
-
-                        except Exception:
-
-                            continue
-
-                    
-
-                    # Next Page
-
-                    next_button = None
-
-                    candidates = page.locator("button:has-text('>')")
-
-                    if await candidates.count() > 0: next_button = candidates.first
-
-                    
-
-                    if next_button and await next_button.is_visible() and not await next_button.is_disabled():
-
-                        await next_button.click()
-
-                        await page.wait_for_load_state("networkidle")
-
-                        await asyncio.sleep(1)
-
-                        page_num += 1
-
-                    else:
-
-                        break
-
-                
-
-                # Save results for this specific query immediately
-
-                if all_listings:
-
-                    unique_listings = []
-
-                    seen = set()
-
-                    for item in all_listings:
-
-                        sig = (item['item_name'], item['seller'], item['total_yang'], item['quantity'])
-
-                        if sig not in seen:
-
-                            seen.add(sig)
-
-                            unique_listings.append(item)
-
-                    
-
-                    await save_to_db(unique_listings, current_query, server_name)
-
-                    await analyze_market(current_query) # Create history point for this specific item/+
-
-
-
-        except Exception as e:
-
-            print(f"Scrape session error: {e}")
-
-        finally:
-
-            await browser.close()
-
-
-
-async def save_to_db(listings, search_query, server_name):
-
-    conn = sqlite3.connect(DB_PATH)
-
-    cursor = conn.cursor()
-
-    # Ensure server exists and get its ID
-
-    cursor.execute("INSERT OR IGNORE INTO servers (name) VALUES (?)", (server_name,))
-
-    cursor.execute("SELECT id FROM servers WHERE name=?", (server_name,))
-
-    server_id = cursor.fetchone()[0]
-
-    
-
-    if search_query:
-
-         # Only delete listings for THIS server and THIS search query
-
-         cursor.execute("""
-
-            DELETE FROM listings 
-
-            WHERE server_id = ? AND item_id IN (SELECT id FROM items WHERE name LIKE ?)
-
-         """, (server_id, f"%{search_query}%"))
-
-         cursor.execute("DELETE FROM listing_bonuses WHERE listing_id NOT IN (SELECT id FROM listings)")
-
-    
+    if slot.server_value == server_value:
+        return
 
-    count = 0
+    try:
+        selects = await page.query_selector_all("select")
+        if selects:
+            mark = await mark_table(page)
+            with SCRAPE_PHASE_SECONDS.time(phase="select_server"):
+                await page.select_option("select", value=server_value)
+            # Only redraws when a search is already shown; the next search waits for its own result
+            await wait_until_ready(page, mark, settle=2, required=False)
+        slot.server_value = server_value
+    except Exception as e:
+        print(f"Error selecting server: {e}")
+
+async def wait_until_ready(page, mark, capture=None, settle=1, required=True):
+    """Waits for the store to render the result of the step taken after `mark` (see mark_table).
+
+    Returns the captured data payload in capture mode, else None. Raises
+    TimeoutError when the table does not settle on data rows or the "No
+    data" row in time (unless not `required`). With FIXED_WAITS the old networkidle + fixed `settle` sleep
+    is used instead, which is kept for comparing timings against the stub store.
+    """
+    with SCRAPE_PHASE_SECONDS.time(phase="wait"):
+        if FIXED_WAITS:
+            payload = await capture.next_payload() if capture else None
+            await page.wait_for_load_state("networkidle")
+            await asyncio.sleep(settle)
+            return payload
+
+        payload = None
+        if capture:
+            payload = await capture.next_payload(READY_TIMEOUT_MS / 1000)
+        # Even with a payload in hand the pager must have re-rendered before we read it
+        if required:
+            await wait_for_redraw(page, mark)
+        else:
+            await wait_for_redraw(page, mark, settle * 1000, required=False)
+        return payload
+
+async def read_table(page):
+    """Reads the current results page from the rendered table (HTML fallback).
+
+    Returns None when the store shows its "No data" row. Raises when the
+    table holds no readable rows either: an empty result closes every
+    active listing of the query, so it must never come from a half-drawn table.
+    """
+    no_data = page.get_by_text(NO_DATA_TEXT)
+    if await no_data.count() > 0 and await no_data.is_visible():
+        print("   No results found.")
+        return None
+
+    await page.wait_for_selector("tbody tr", timeout=5000)
+    with SCRAPE_PHASE_SECONDS.time(phase="content"):
+        content = await page.content()
+    with SCRAPE_PHASE_SECONDS.time(phase="parse"):
+        listings = await asyncio.to_thread(parse_listing_rows, content)
+    if not listings:
+        raise RuntimeError("Results table has neither data rows nor the no-data marker")
+    return listings
+
+async def scrape_query(page, current_query, capture=None, on_page=None, record=None):
+    """Searches one query on an already prepared page and walks all result pages.
+
+    With a ResponseCapture attached, each page is read straight from the
+    store's data response and the rendered table is only parsed when no
+    usable payload arrives. `on_page(rows)` is called after every page read,
+    and `record(page_num, html)` with the rendered page when recording a corpus.
+    Returns (listings, pages_visited).
+    """
+    if capture:
+        capture.clear()
+
+    # Search
+    mark = await mark_table(page)
+    with SCRAPE_PHASE_SECONDS.time(phase="search"):
+        search_input = page.locator("#item-search-input")
+        if FIXED_WAITS:
+            # Ensure input is clear
+            await search_input.click()
+            await search_input.fill("")
+            await asyncio.sleep(0.5)
+            await search_input.type(current_query, delay=100)
+            await asyncio.sleep(0.5)
+        else:
+            # fill() replaces the value and fires the input event in one step
+            await search_input.fill(current_query)
+        await search_input.press("Enter")
+
+    payload = await wait_until_ready(page, mark, capture, settle=2)
+
+    # Pagination Loop for Current Query
+    all_listings = []
+    page_num = 1
 
+    while True:
+        print(f"   Page {page_num} for {current_query}")
+
+        listings, source = None, "payload"
+        if payload is not None:
+            with SCRAPE_PHASE_SECONDS.time(phase="parse"):
+                listings = await asyncio.to_thread(listings_from_payload, payload)
+        if listings is None:
+            listings, source = await read_table(page), "html"
+        if not listings:
+            print("   No data rows.")
+            break
+
+        print(f"   Found {len(listings)} rows.")
+        SCRAPE_PAGES.inc(source=source)
+        SCRAPE_ROWS.inc(len(listings), source=source)
+        if record:
+            await asyncio.to_thread(record, page_num, await page.content())
+        all_listings.extend(listings)
+        if on_page:
+            on_page(len(listings))
+
+        # Next Page
+        with SCRAPE_PHASE_SECONDS.time(phase="paginate"):
+            next_button = None
+            candidates = page.locator("button:has-text('>')")
+            if await candidates.count() > 0: next_button = candidates.first
+
+            has_next = next_button and await next_button.is_visible() and not await next_button.is_disabled()
+            if has_next:
+                mark = await mark_table(page)
+                await next_button.click()
+        if not has_next:
+            break
+        payload = await wait_until_ready(page, mark, capture, settle=1)
+        page_num += 1
+
+    return all_listings, page_num
+
+def dedupe_listings(listings):
+    """Drops listings seen more than once across result pages."""
+    unique_listings = []
+    seen = set()
     for item in listings:
+        sig = listing_signature(item)
+        if sig not in seen:
+            seen.add(sig)
+            unique_listings.append(item)
+    return unique_listings
 
-        cursor.execute("INSERT OR IGNORE INTO items (name, category) VALUES (?, ?)", (item['item_name'], "General"))
-
-        item_id = cursor.execute("SELECT id FROM items WHERE name=?", (item['item_name'],)).fetchone()[0]
-
-        
-
-        cursor.execute("""
+async def run_job(pool, server_name, current_query, on_page=None):
+    """Runs one (server, query) job on a pooled page and stores its results.
 
-            INSERT INTO listings (server_id, item_id, seller_name, quantity, price_won, price_yang, total_price_yang)
-
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-
-        """, (server_id, item_id, item['seller'], item['quantity'], item['price_won'], item['price_yang'], item['total_yang']))
-
-        
-
-        listing_id = cursor.lastrowid
+    Returns a timing record for the job.
+    """
+    server_value = SERVER_MAPPING.get(server_name, "409") # Default to Marmara if not found
+    queued_at = time.perf_counter()
+    result = {"server": server_name, "query": current_query, "pages": 0, "listings": 0, "ok": False}
 
-        for bonus in item['bonuses']:
+    async with pool.lease(server_value) as slot:
+        started_at = time.perf_counter()
+        print(f"\n>>> [page {slot.index}] Scraper processing: '{current_query}' on {server_name}")
+        try:
+            await open_store(slot, server_value)
+            ready_at = time.perf_counter()
+
+            record = None
+            if RECORD_CORPUS:
+                def record(page_num, html):
+                    record_page(RECORD_CORPUS, server_name, server_value, current_query, page_num, html)
+            all_listings, pages = await scrape_query(slot.page, current_query, slot.capture, on_page, record)
+            scraped_at = time.perf_counter()
+
+            # Save results for this specific query immediately. An empty result is
+            # saved too: it closes the listings of an item that sold out.
+            with SCRAPE_PHASE_SECONDS.time(phase="dedupe"):
+                unique_listings = dedupe_listings(all_listings)
+            with SCRAPE_PHASE_SECONDS.time(phase="save"):
+                await save_to_db(unique_listings, current_query, server_name)
+            if unique_listings:
+                with SCRAPE_PHASE_SECONDS.time(phase="analyze"):
+                    await analyze_market(current_query, server_name) # Create history point for this specific item/+ and server
+            result["listings"] = len(unique_listings)
+
+            result.update(pages=pages, ok=True,
+                          setup=ready_at - started_at, scrape=scraped_at - ready_at,
+                          store=time.perf_counter() - scraped_at)
+        except Exception as e:
+            # Page may be half-way through a search; make the next job start clean
+            slot.reset()
+            print(f"Error searching for {current_query} on {server_name}: {e}")
+
+    finished_at = time.perf_counter()
+    SCRAPE_JOBS.inc(outcome="ok" if result["ok"] else "error")
+    result["wait"] = started_at - queued_at
+    result["elapsed"] = finished_at - started_at
+    print(f"[job] {server_name} / '{current_query}' on page {slot.index}: "
+          f"{result['pages']} pages, {result['listings']} listings in {result['elapsed']:.1f}s "
+          f"(queued {result['wait']:.1f}s)")
+    return result
+
+async def run_jobs(jobs, pool=None, pool_size=None, on_page=None):
+    """Spreads (server_name, query) jobs over a browser pool.
+
+    Uses `pool` when given (and leaves it open), otherwise starts a temporary
+    pool of `pool_size` pages for the duration of the call. `on_page` is
+    passed through to scrape_query for progress reporting.
+    """
+    owns_pool = pool is None
+    if owns_pool:
+        pool = await BrowserPool(pool_size or DEFAULT_POOL_SIZE).start()
+
+    sweep_start = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(run_job(pool, server, query, on_page) for server, query in jobs))
+    finally:
+        if owns_pool:
+            await pool.close()
+            close_writer()
 
-            if bonus:
+    wall = time.perf_counter() - sweep_start
+    busy = sum(r["elapsed"] for r in results)
+    print(f"\nFinished {len(results)} jobs on {pool.size} pages in {wall:.1f}s "
+          f"(job time {busy:.1f}s, effective parallelism x{busy / wall if wall else 0:.2f})")
+    return results
 
-                cursor.execute("INSERT INTO listing_bonuses (listing_id, bonus_name, bonus_value) VALUES (?, ?, ?)", (listing_id, bonus, ""))
+async def scrape_store(search_query=None, server_name=None, pool=None, on_page=None):
+    if not search_query:
+        search_query = os.environ.get("SEARCH_QUERY")
 
-        count += 1
+    if not server_name:
+        server_name = os.environ.get("SERVER_NAME", "Marmara")
 
-            
+    if not search_query:
+        print("No search query provided.")
+        return
 
-    conn.commit()
+    print(f"Scraping for server: {server_name} (Value: {SERVER_MAPPING.get(server_name, '409')})")
 
-    conn.close()
+    # Generate list of queries to run
+    queries_to_run = build_query_queue(search_query)
+    print(f"Planned search queue: {queries_to_run}")
 
-    print(f"Saved {count} listings for {server_name}.")
+    return await run_jobs([(server_name, q) for q in queries_to_run], pool=pool, on_page=on_page)
+
+async def scrape_sweep(search_query, server_names=None, pool=None, pool_size=None):
+    """Scans `search_query` on many servers (all known servers by default) concurrently."""
+    server_names = server_names or list(SERVER_MAPPING)
+    queries_to_run = build_query_queue(search_query)
+    print(f"Sweeping {len(server_names)} servers x {len(queries_to_run)} queries")
+
+    # Group jobs by server so pooled pages can stay on their selected server
+    jobs = [(server, q) for server in server_names for q in queries_to_run]
+    return await run_jobs(jobs, pool=pool, pool_size=pool_size)
+
+_writer = None
+# The shared writer connection is only used from this one thread: it keeps the SQLite
+# writes, the stats and the history file appends off the event loop and serializes them
+_db_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+
+async def on_db_thread(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_db_thread, fn, *args)
+
+def get_writer():
+    """Shared BulkWriter so a whole sweep reuses one connection and item-id cache."""
+    global _writer
+    if _writer is None:
+        _writer = BulkWriter(DB_PATH)
+        # Alert rules are checked against each batch's new listings once it commits,
+        # and live feed clients get the added and removed listings
+        _writer.listeners.append(alert_engine.on_batch)
+        _writer.listeners.append(publish_batch)
+    return _writer
+
+def close_writer():
+    """Closes the shared writer once the work already queued on the DB thread is done."""
+    _db_thread.submit(_close_writer).result()
+
+def _close_writer():
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
 
+async def save_to_db(listings, search_query, server_name):
+    return await on_db_thread(_save_to_db, listings, search_query, server_name)
 
+def _save_to_db(listings, search_query, server_name):
+    stats = get_writer().write(listings, search_query, server_name)
+    DB_ROWS_WRITTEN.inc(stats["inserted"], table="listings", op="insert")
+    DB_ROWS_WRITTEN.inc(stats["removed"], table="listings", op="remove")
+    print(f"Synced {len(listings)} listings for {server_name}: {stats['inserted']} new, "
+          f"{stats['removed']} removed, {stats['unchanged']} unchanged.")
+    return stats
 
 async def run_bot(interval_minutes=20):
-
     """Infinite loop for the bot."""
-
     print(f"Starting Market Bot (Interval: {interval_minutes} mins)")
-
     search_query = os.environ.get("SEARCH_QUERY", "Dolunay") # Default item to watch
-
     server_name = os.environ.get("SERVER_NAME", "Marmara")
-
     
-
     while True:
-
         print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Bot execution started for {server_name}...")
-
         await scrape_store(search_query, server_name)
-
         print(f"[{datetime.now().strftime('%H:%M:%S')}] Sleeping for {interval_minutes} minutes...")
-
         await asyncio.sleep(interval_minutes * 60)
 
-
-
 if __name__ == "__main__":
-
     parser = argparse.ArgumentParser(description="Metin2 Market Scraper & Bot")
-
     parser.add_argument("--bot", action="store_true", help="Run in continuous bot mode")
-
     parser.add_argument("--query", type=str, help="Search query (override env var)")
-
     parser.add_argument("--server", type=str, help="Server name (override env var)")
-
     parser.add_argument("--interval", type=int, default=20, help="Bot interval in minutes")
-
+    parser.add_argument("--all-servers", action="store_true", help="Sweep every server in SERVER_MAPPING")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="Concurrent browser pages")
+    parser.add_argument("--capture", action="store_true", help="Read listings from intercepted store responses")
+    parser.add_argument("--record-captures", action="store_true", help="Save intercepted responses as test fixtures")
+    parser.add_argument("--record-corpus", action="store_true",
+                        help="Save every result page to the replay corpus (see corpus.py)")
     
-
     args = parser.parse_args()
-
     
-
     # Initialize DB first
-
     init_db()
-
     
-
     if args.query:
-
         os.environ["SEARCH_QUERY"] = args.query
-
     if args.server:
-
         os.environ["SERVER_NAME"] = args.server
-
+    if args.capture or args.record_captures:
+        CAPTURE_MODE = True
+        RECORD_CAPTURES = args.record_captures
+    if args.record_corpus:
+        RECORD_CORPUS = RECORD_CORPUS or CORPUS_DIR
         
-
     if args.bot:
-
         try:
-
             asyncio.run(run_bot(args.interval))
-
         except KeyboardInterrupt:
-
             print("Bot stopped by user.")
-
+    elif args.all_servers:
+        query = os.environ.get("SEARCH_QUERY")
+        if not query:
+            print("No search query provided.")
+        else:
+            asyncio.run(scrape_sweep(query, pool_size=args.pool_size))
     else:
-
         asyncio.run(scrape_store())
+
@@ -0,0 +1,113 @@
+"""Item-name search over the `items_fts` trigram index.
+
+Names are stored folded (Turkish-aware lower case, diacritics dropped), so
+'kilic', 'KILIÇ' and 'Kılıç' all find 'Dolunay Kılıcı'. The FTS5 trigram
+tokenizer serves `LIKE '%term%'` from the index for terms of 3+ characters;
+shorter terms scan the (small) folded table instead of the listings join.
+"""
+
+# Common item name mappings (Short/Slang -> Full Game Name)
+ITEM_NAME_MAPPINGS = {
+    "dolunay": "Dolunay Kılıcı",
+    "kdp": "Kırmızı Demir Pala",
+    "syk": "Siyah Yuvarlak Kalkan",
+    "gby": "Geyik Boynuzu Yay",
+    "zehir": "Zehir Kılıcı",
+    "kin": "Kin Kılıcı",
+    "siyah çelik": "Siyah Çelik Zırh",
+    "mavi çelik": "Mavi Çelik Zırh",
+    "beşgen": "Beşgen Kalkan",
+    "orkide": "Orkide Çan",
+    "aslan ağzı": "Aslan Ağzı Kalkan",
+    "sahine": "Şahin Kalkan",
+    "kaplan": "Kaplan Kalkan",
+    "abonoz": "Abonoz Küpe",
+    "cennet": "Cennetin Gözü Kolye"
+}
+
+# str.lower() maps 'I' to 'i' and 'İ' to 'i̇'; Turkish wants 'ı' and 'i'
+_TURKISH_UPPER = str.maketrans({"I": "ı", "İ": "i"})
+_ASCII = str.maketrans("ıçğöşüâîû", "icgosuaiu")
+# GLOB/LIKE wildcards never occur in item names; strip them from user input
+_WILDCARDS = str.maketrans("", "", "%_*?[]")
+
+def fold(text):
+    """Case- and diacritic-insensitive form of an item name or search term."""
+    return text.translate(_TURKISH_UPPER).lower().translate(_ASCII)
+
+_ALIASES = {fold(alias): name for alias, name in ITEM_NAME_MAPPINGS.items()}
+
+def resolve_alias(query):
+    """Full game name for a slang query ('KDP' -> 'Kırmızı Demir Pala'), else the query."""
+    return _ALIASES.get(fold(query.strip()), query)
+
+def search_terms(query):
+    """Folded substrings to look for: the query itself plus its alias, if any."""
+    term = fold(query.strip()).translate(_WILDCARDS)
+    terms = [term]
+    alias = fold(resolve_alias(query.strip()))
+    if alias != term:
+        terms.append(alias)
+    return [t for t in terms if t]
+
+def item_ids_sql(query, prefix="term"):
+    """SQL selecting the ids of items matching `query`, with its named parameters.
+
+    Usable as `item_id IN (<sql>)` from both sqlite3 and SQLAlchemy `text()`.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return "SELECT id FROM items WHERE 0", {}
+    params = {f"{prefix}{i}": f"%{term}%" for i, term in enumerate(terms)}
+    sql = " UNION ".join(f"SELECT rowid FROM items_fts WHERE folded LIKE :{name}" for name in params)
+    return sql, params
+
+def sync_items(conn):
+    """Indexes items added since the last sync.
+
+    Item ids only grow and names never change, so this is an append of
+    everything past the highest indexed rowid. Runs inside the caller's
+    transaction.
+    """
+    conn.create_function("tr_fold", 1, fold, deterministic=True)
+    conn.execute("""
+        INSERT INTO items_fts (rowid, folded)
+        SELECT id, tr_fold(name) FROM items
+        WHERE id > (SELECT COALESCE(MAX(rowid), 0) FROM items_fts)
+    """)
+
+def suggest(conn, query, limit=10):
+    """Autocomplete candidates for `query` as [(id, name, alias_of)].
+
+    Slang aliases ('kdp', 'gby') also match on a prefix of the alias. Exact
+    matches rank first, then alias hits, then name prefixes, then any
+    substring; shorter names win ties.
+    """
+    term = fold(query.strip()).translate(_WILDCARDS)
+    if not term:
+        return []
+    aliased = {fold(name): alias for alias, name in ITEM_NAME_MAPPINGS.items() if fold(alias).startswith(term)}
+
+    sql, params = item_ids_sql(query)
+    alias_hit = []
+    for i, name in enumerate(aliased):
+        params[f"alias{i}"] = f"%{name}%"
+        sql += f" UNION SELECT rowid FROM items_fts WHERE folded LIKE :alias{i}"
+        alias_hit.append(f"f.folded LIKE :alias{i}")
+    params.update(exact=term, prefix=f"{term}%", limit=limit)
+    alias_rank = f"({' OR '.join(alias_hit)}) DESC," if alias_hit else ""
+
+    rows = conn.execute(f"""
+        SELECT i.id, i.name, f.folded
+        FROM items_fts f JOIN items i ON i.id = f.rowid
+        WHERE f.rowid IN ({sql})
+        ORDER BY f.folded = :exact DESC,
+                 {alias_rank}
+                 f.folded LIKE :prefix DESC,
+                 length(f.folded), f.folded
+        LIMIT :limit
+    """, params).fetchall()
+    return [
+        (item_id, name, next((alias for canonical, alias in aliased.items() if canonical in folded), None))
+        for item_id, name, folded in rows
+    ]
@@ -0,0 +1,84 @@
+import math
+import struct
+
+# Relative accuracy of quantiles read back from a sketch (1%)
+RELATIVE_ACCURACY = 0.01
+
+_PAIR = struct.Struct("<iI")
+
+
+class PriceSketch:
+    """Log-bucketed histogram of unit prices that supports removals.
+
+    Each positive price falls into bucket ceil(log_gamma(price)), so any
+    quantile comes back within RELATIVE_ACCURACY of the true value no matter
+    how wide the price range is. Unlike a min or a mean, the counts can be
+    decremented when a listing disappears, and sketches for several servers
+    merge by adding counts.
+    """
+
+    def __init__(self, buckets=None, zeros=0, accuracy=RELATIVE_ACCURACY):
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = buckets or {}
+        self.zeros = zeros
+
+    @property
+    def count(self):
+        return self.zeros + sum(self.buckets.values())
+
+    def _index(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value, n=1):
+        if value <= 0:
+            self.zeros += n
+            return
+        index = self._index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + n
+
+    def remove(self, value, n=1):
+        if value <= 0:
+            self.zeros = max(0, self.zeros - n)
+            return
+        index = self._index(value)
+        left = self.buckets.get(index, 0) - n
+        if left > 0:
+            self.buckets[index] = left
+        else:
+            self.buckets.pop(index, None)
+
+    def merge(self, other):
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.zeros += other.zeros
+        return self
+
+    def quantile(self, q):
+        """Approximate q-quantile (0..1) of the prices added, or None if empty."""
+        total = self.count
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                # Midpoint of (gamma^(i-1), gamma^i] in relative terms
+                return int(2 * self.gamma ** index / (self.gamma + 1))
+        return int(2 * self.gamma ** max(self.buckets) / (self.gamma + 1))
+
+    def to_bytes(self):
+        """Compact storage form: zero count, then (bucket, count) pairs."""
+        pairs = b"".join(_PAIR.pack(i, n) for i, n in sorted(self.buckets.items()))
+        return struct.pack("<I", self.zeros) + pairs
+
+    @classmethod
+    def from_bytes(cls, data):
+        if not data:
+            return cls()
+        zeros = struct.unpack_from("<I", data)[0]
+        buckets = dict(_PAIR.iter_unpack(data[4:]))
+        return cls(buckets, zeros)
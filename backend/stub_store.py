@@ -0,0 +1,155 @@
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+STUB_HTML_PATH = os.path.join(os.path.dirname(__file__), "stub", "store.html")
+
+# Mirrors scraper.SERVER_MAPPING without importing playwright
+STUB_SERVERS = {"Marmara": "409", "Bagjanamu": "418", "Barbaros": "57", "Dandanakan": "51"}
+STUB_ITEMS = ["Dolunay Kılıcı", "Kırmızı Demir Pala", "Siyah Yuvarlak Kalkan", "Zehir Kılıcı"]
+BONUS_POOL = ["Ortalama Zarar %{}", "Beceri Hasarı %{}", "Ölümsüzlere karşı güçlü +%{}", "Kritik Vuruş Şansı %{}"]
+SELLERS = ["Ali", "Veli", "Ayşe", "Mert", "Zeynep", "Kaan", "Deniz", "Ece"]
+
+def render_cells(listing):
+    """Renders one listing in the store's row markup, one string per <td>."""
+    specials = "".join(f'<span class="text-purple-800 font-bold">{s}</span>' for s in listing.get("specials", []))
+    bonuses = "".join(
+        f'<span class="inline-block px-2 py-1 mr-1 mb-1 text-xs rounded bg-epic-900 text-epic-200 ">{b}</span>'
+        for b in listing["bonuses"]
+    )
+    info = (f'<div class="font-medium text-white text-sm">{listing["item_name"]} {specials}</div>'
+            f'<div class="text-xs text-gray-400">{bonuses}</div>')
+    return [
+        '<img src="/items/placeholder.png">',
+        info,
+        str(listing["quantity"]),
+        f'{listing["price_yang"]:,}'.replace(",", "."),
+        str(listing["price_won"]),
+        listing["seller"],
+    ]
+
+def generate_listings(server_value, query):
+    """Deterministic fake result set for (server, query)."""
+    query = query.strip()
+    base = query.split("+")[0].strip().lower()
+    names = [name for name in STUB_ITEMS if base and base in name.lower()]
+    if not names:
+        return []
+
+    rng = random.Random(zlib.crc32(f"{server_value}|{query}".encode("utf-8")))
+    if "+" in query:
+        variants = [query]
+    else:
+        variants = [n for name in names for n in [name] + [f"{name}+{i}" for i in range(10)]]
+
+    listings = []
+    for _ in range(rng.randint(5, 120)):
+        listings.append({
+            "item_name": rng.choice(variants),
+            "seller": rng.choice(SELLERS),
+            "quantity": rng.choice([1, 1, 1, 2, 5]),
+            "price_yang": rng.randint(1, 99_999) * 1000,
+            "price_won": rng.randint(0, 40),
+            "bonuses": [b.format(rng.randint(1, 60)) for b in rng.sample(BONUS_POOL, rng.randint(0, 3))],
+        })
+    return listings
+
+class StubStore:
+    """Local stand-in for the store page, served over HTTP for offline timing runs.
+
+    The page renders results from /api/store/search after `latency` seconds,
+    so scraper waits can be measured without touching metin2alerts.com.
+    `source(server_value, query)` returns a query's rows, which `render`
+    turns into cell markup; a recorded corpus (corpus.py) passes rows that
+    are already cells.
+    """
+
+    def __init__(self, latency=0.25, page_size=20, source=generate_listings, render=render_cells,
+                 servers=STUB_SERVERS):
+        self.latency = latency
+        self.page_size = page_size
+        self.source = source
+        self.render = render
+        self.servers = servers
+        self.requests = 0
+        self._httpd = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/store"
+
+    def search(self, server_value, query, page):
+        listings = self.source(server_value, query)
+        pages = (len(listings) + self.page_size - 1) // self.page_size
+        chunk = listings[(page - 1) * self.page_size: page * self.page_size]
+        return {
+            "recordsTotal": len(listings),
+            "recordsFiltered": len(listings),
+            "pages": pages,
+            "data": [self.render(l) for l in chunk],
+        }
+
+    def start(self, port=0):
+        store = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, body, content_type):
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+                if url.path in ("/", "/store"):
+                    with open(STUB_HTML_PATH, 'rb') as f:
+                        self._send(f.read(), "text/html; charset=utf-8")
+                elif url.path == "/api/store/servers":
+                    servers = [{"name": n, "value": v} for n, v in store.servers.items()]
+                    self._send(json.dumps(servers).encode("utf-8"), "application/json")
+                elif url.path == "/api/store/search":
+                    store.requests += 1
+                    time.sleep(store.latency)
+                    payload = store.search(params.get("server", ""), params.get("q", ""), int(params.get("page", 1)))
+                    self._send(json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json")
+                else:
+                    self.send_error(404)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+if __name__ == "__main__":
+    with StubStore() as store:
+        print(f"Stub store running at {store.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
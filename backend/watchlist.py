@@ -0,0 +1,76 @@
+import os
+import statistics
+from datetime import timedelta
+
+try:
+    from .search_index import item_ids_sql
+except ImportError:  # run from inside backend/ as a script
+    from search_index import item_ids_sql
+
+# Rescan bounds for a watchlist entry, in minutes
+MIN_INTERVAL = float(os.environ.get("WATCHLIST_MIN_INTERVAL", "5"))
+MAX_INTERVAL = float(os.environ.get("WATCHLIST_MAX_INTERVAL", "240"))
+# Used until an entry has enough history to measure
+DEFAULT_INTERVAL = 30.0
+# Recent price_history snapshots per item that volatility is measured over
+VOLATILITY_WINDOW = 12
+MIN_POINTS = 3
+# Coefficient of variation at which the interval is half of MAX_INTERVAL
+REFERENCE_CV = 0.02
+
+def coefficient_of_variation(prices):
+    prices = [p for p in prices if p]
+    if len(prices) < MIN_POINTS:
+        return None
+    mean = statistics.fmean(prices)
+    return statistics.pstdev(prices) / mean if mean else None
+
+def volatility(conn, query, server_id, window=VOLATILITY_WINDOW):
+    """How much the query's prices have moved lately on a server, or None without enough history.
+
+    Measured per item on the last `window` min unit prices in price_history;
+    the most volatile item (e.g. one '+N' bucket of a generic query) decides.
+    """
+    match_sql, params = item_ids_sql(query)
+    rows = conn.execute(f"""
+        SELECT item_id, min_unit_price FROM (
+            SELECT item_id, min_unit_price,
+                   ROW_NUMBER() OVER (PARTITION BY item_id ORDER BY timestamp DESC) AS recency
+            FROM price_history
+            WHERE item_id IN ({match_sql}) AND server_id = :server_id
+        )
+        WHERE recency <= :window
+    """, {**params, "server_id": server_id, "window": window}).fetchall()
+
+    prices = {}
+    for item_id, price in rows:
+        prices.setdefault(item_id, []).append(price)
+    cvs = [cv for cv in map(coefficient_of_variation, prices.values()) if cv is not None]
+    return max(cvs) if cvs else None
+
+def interval_for(cv):
+    """Minutes until the next scan: MAX_INTERVAL for flat prices, shrinking as they move."""
+    if cv is None:
+        return DEFAULT_INTERVAL
+    return min(MAX_INTERVAL, max(MIN_INTERVAL, MAX_INTERVAL / (1 + cv / REFERENCE_CV)))
+
+def due_entries(conn, now):
+    """Enabled entries whose next run has come, as (id, query, server_id, server_name), most overdue first."""
+    return conn.execute("""
+        SELECT w.id, w.query, w.server_id, s.name
+        FROM watchlist w JOIN servers s ON s.id = w.server_id
+        WHERE w.enabled = 1 AND w.next_run_at <= ?
+        ORDER BY w.next_run_at
+    """, (now,)).fetchall()
+
+def reschedule(conn, entry_id, query, server_id, now):
+    """Records a dispatch and sets the entry's next run from its current volatility."""
+    cv = volatility(conn, query, server_id)
+    interval = interval_for(cv)
+    next_run = now + timedelta(minutes=interval)
+    conn.execute("""
+        UPDATE watchlist
+        SET last_run_at = ?, next_run_at = ?, interval_minutes = ?, volatility = ?
+        WHERE id = ?
+    """, (now, next_run, interval, cv, entry_id))
+    return next_run
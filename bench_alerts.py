@@ -0,0 +1,85 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from backend.alerts import AlertEngine, _matches_bonuses, bonus_values
+from backend.bonuses import parse_filter
+
+# One scraped batch of new listings checked against every alert rule: a
+# nested scan over all rules versus the engine's item-indexed lookup.
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "backend", "database", "schema.sql")
+BONUSES = ["Ortalama Zarar %{}", "Beceri Hasarı %{}", "Ölümsüzlere karşı güçlü +%{}"]
+FILTERS = ["Ortalama Zarar>=40", "Beceri Hasarı>=20"]
+
+def populate(path, rules, items, servers, seed=19):
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        conn.executescript(f.read())
+    rng = random.Random(seed)
+    conn.executemany(
+        "INSERT INTO alert_rules (item_id, server_id, max_unit_price, bonus_filters, sink) VALUES (?, ?, ?, ?, 'log')",
+        ((rng.randint(1, items), rng.choice([None, rng.randint(1, servers)]), rng.randint(1, 50) * 100_000,
+          json.dumps(rng.sample(FILTERS, rng.randint(0, 2)))) for _ in range(rules)))
+    conn.commit()
+    return conn
+
+def listings(total, items, seed=19):
+    rng = random.Random(seed)
+    return [{
+        "id": i, "item_id": rng.randint(1, items), "item_name": "", "seller": f"Seller{i}",
+        "quantity": rng.randint(1, 200), "total_price_yang": rng.randint(1, 500) * 1_000_000,
+        "bonuses": [b.format(rng.randint(1, 60)) for b in rng.sample(BONUSES, 2)],
+    } for i in range(total)]
+
+def naive(conn, server_id, batch):
+    """Every rule against every listing, rules re-read from the table per batch."""
+    rules = [(rule_id, item_id, rule_server, max_price, [parse_filter(f) for f in json.loads(filters)])
+             for rule_id, item_id, rule_server, max_price, filters in
+             conn.execute("SELECT id, item_id, server_id, max_unit_price, bonus_filters FROM alert_rules")]
+    matches = []
+    for listing in batch:
+        unit_price = listing["total_price_yang"] // max(listing["quantity"], 1)
+        for rule_id, item_id, rule_server, max_price, filters in rules:
+            if item_id == listing["item_id"] and rule_server in (None, server_id) and unit_price <= max_price \
+                    and (not filters or _matches_bonuses(filters, bonus_values(listing["bonuses"]))):
+                matches.append((rule_id, listing["id"]))
+    return matches
+
+def indexed(conn, server_id, batch):
+    engine = AlertEngine(sinks={})
+    engine.refresh(conn)
+    return [(rule.id, listing["id"]) for rule, listing in engine.match(server_id, batch)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alert rules against a batch: nested scan vs item index")
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--listings", type=int, default=50_000)
+    parser.add_argument("--items", type=int, default=2_000)
+    parser.add_argument("--servers", type=int, default=8)
+    parser.add_argument("--sample", type=int, default=2_000,
+                        help="listings the nested scan actually runs on; its time is scaled to the batch")
+    args = parser.parse_args()
+
+    batch = listings(args.listings, args.items)
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = populate(os.path.join(tmp, "alerts.db"), args.rules, args.items, args.servers)
+
+        sample = batch[:args.sample]
+        start = time.perf_counter()
+        expected = naive(conn, 1, sample)
+        scan = (time.perf_counter() - start) * len(batch) / len(sample)
+        print(f"nested scan: {scan * 1000:10.1f} ms (scaled from {len(sample):,} listings)")
+
+        start = time.perf_counter()
+        matched = indexed(conn, 1, batch)
+        elapsed = time.perf_counter() - start
+        print(f"    indexed: {elapsed * 1000:10.1f} ms, {len(matched):,} alerts "
+              f"for {args.listings:,} listings x {args.rules:,} rules")
+        conn.close()
+
+    assert sorted(expected) == sorted(m for m in matched if m[1] < len(sample))
+    print(f"Speedup: x{scan / elapsed:.0f}")
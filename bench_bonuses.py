@@ -0,0 +1,66 @@
+import argparse
+import os
+import random
+import re
+import sqlite3
+import tempfile
+import time
+
+from backend.bonuses import backfill, listing_ids_sql, parse_filter
+
+# "Listings with Ortalama Zarar >= 40 and Beceri Hasarı >= 20": scanning
+# every bonus string in Python versus indexed range scans on the parsed
+# (bonus_type_id, value_num) columns.
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "backend", "database", "schema.sql")
+BONUSES = ["Ortalama Zarar %{}", "Beceri Hasarı %{}", "Ölümsüzlere karşı güçlü +%{}", "Kritik Vuruş Şansı %{}"]
+FILTERS = ["Ortalama Zarar>=40", "Beceri Hasarı>=20"]
+
+def populate(path, total, seed=5):
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        conn.executescript(f.read())
+    rng = random.Random(seed)
+    conn.executemany("INSERT INTO listing_bonuses (listing_id, bonus_name, bonus_value) VALUES (?, ?, '')",
+                     ((i, b.format(rng.randint(1, 60))) for i in range(total) for b in rng.sample(BONUSES, 3)))
+    conn.commit()
+    return conn
+
+def string_scan(conn):
+    """What a bonus filter used to take: every bonus row, matched as text."""
+    patterns = [(re.compile(r"^Ortalama Zarar %(-?\d+)$"), 40), (re.compile(r"^Beceri Hasarı %(-?\d+)$"), 20)]
+    hits = [set() for _ in patterns]
+    for listing_id, text in conn.execute("SELECT listing_id, bonus_name FROM listing_bonuses"):
+        for (pattern, threshold), found in zip(patterns, hits):
+            match = pattern.match(text)
+            if match and int(match[1]) >= threshold:
+                found.add(listing_id)
+    return set.intersection(*hits)
+
+def indexed(conn):
+    sql, params = listing_ids_sql([parse_filter(f) for f in FILTERS])
+    return {row[0] for row in conn.execute(sql, params)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bonus threshold filters: string scan vs indexed")
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        conn = populate(os.path.join(tmp, "bonuses.db"), args.listings)
+        print(f"{args.listings:,} listings x 3 bonuses ready in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        updated = backfill(conn)
+        conn.commit()
+        print(f"Backfilled {updated:,} bonus rows in {time.perf_counter() - start:.1f}s")
+
+        timings = {}
+        for name, fn in (("string scan", string_scan), ("indexed", indexed)):
+            start = time.perf_counter()
+            result = fn(conn)
+            timings[name] = (time.perf_counter() - start, result)
+            print(f"{name:>11}: {timings[name][0] * 1000:8.1f} ms, {len(result):,} listings")
+        conn.close()
+
+    assert timings["string scan"][1] == timings["indexed"][1]
+    print(f"Speedup: x{timings['string scan'][0] / timings['indexed'][0]:.0f}")
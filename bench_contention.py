@@ -0,0 +1,104 @@
+import argparse
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# One writer process syncing sweeps through BulkWriter while several reader
+# threads hit /market/listings, run once on SQLite's stock settings and once with the
+# tuned pragma profile. Each profile runs in its own process because the
+# profile and DB path are read at import time.
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+def write_loop(duration, batch, results):
+    """Writer process, like a scraper sweeping while the API serves."""
+    from backend.db_writer import BulkWriter
+    from bench_save import synthetic_batches
+
+    batches = list(synthetic_batches(batch * 40, batch))
+    stats = {"listings": 0, "batches": 0, "errors": 0}
+    writer = BulkWriter(os.environ["METIN2_DB_PATH"])
+    deadline = time.perf_counter() + duration
+    i = 0
+    while time.perf_counter() < deadline:
+        query, listings = batches[i % len(batches)]
+        # Shift prices each pass so every sweep really inserts and removes rows
+        shifted = [dict(l, total_yang=l["total_yang"] + i) for l in listings]
+        try:
+            writer.write(shifted, query, "Marmara")
+            stats["listings"] += len(shifted)
+            stats["batches"] += 1
+        except Exception:
+            stats["errors"] += 1
+        i += 1
+    writer.close()
+    results.put(stats)
+
+def worker(duration, readers, batch):
+    from fastapi.testclient import TestClient
+    from backend.database import init_db, SQLITE_PROFILE
+    from backend.main import app
+
+    init_db()
+    stop = threading.Event()
+    latencies, reader_errors = [], []
+
+    def read_loop():
+        with TestClient(app) as client:
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    response = client.get("/market/listings", params={"server": "Marmara", "limit": 100})
+                    if response.status_code != 200:
+                        reader_errors.append(response.status_code)
+                        continue
+                except Exception as e:
+                    reader_errors.append(type(e).__name__)
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    results = multiprocessing.Queue()
+    writer = multiprocessing.Process(target=write_loop, args=(duration, batch, results))
+    threads = [threading.Thread(target=read_loop) for _ in range(readers)]
+    writer.start()
+    for t in threads:
+        t.start()
+    writer_stats = results.get()
+    writer.join()
+    stop.set()
+    for t in threads:
+        t.join()
+
+    print(f"[{SQLITE_PROFILE:>7}] writer: {writer_stats['listings'] / duration:8,.0f} listings/s "
+          f"({writer_stats['batches']} batches, {writer_stats['errors']} errors)")
+    print(f"[{SQLITE_PROFILE:>7}] readers: {len(latencies)} requests, "
+          f"p50 {percentile(latencies, 50):.1f}ms, p95 {percentile(latencies, 95):.1f}ms, "
+          f"p99 {percentile(latencies, 99):.1f}ms, {len(reader_errors)} errors")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reader latency / writer throughput under contention")
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=1000, help="Listings per writer batch")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.duration, args.readers, args.batch)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in ("default", "tuned"):
+            env = dict(os.environ, METIN2_SQLITE_PROFILE=profile,
+                       METIN2_DB_PATH=os.path.join(tmp, f"{profile}.db"))
+            subprocess.run([sys.executable, __file__, "--worker", "--duration", str(args.duration),
+                            "--readers", str(args.readers), "--batch", str(args.batch)],
+                           env=env, check=True)
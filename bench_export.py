@@ -0,0 +1,77 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# The export reads the app's database; point it at a throwaway one first
+TMP = tempfile.mkdtemp()
+os.environ["METIN2_DB_PATH"] = os.path.join(TMP, "export.db")
+
+from backend.routers import export
+
+# Whole-table listings export: fetchall into a list of dicts and one JSON
+# dump, versus the streaming endpoint's batched cursor and NDJSON chunks.
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "backend", "database", "schema.sql")
+SQL = """
+    SELECT t.id, s.name, i.name, t.seller_name, t.quantity, t.price_won, t.price_yang,
+           t.total_price_yang, t.seen_at, t.removed_at
+    FROM listings t JOIN servers s ON s.id = t.server_id JOIN items i ON i.id = t.item_id
+"""
+
+def populate(path, total, items=2_000, seed=17):
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        conn.executescript(f.read())
+    rng = random.Random(seed)
+    conn.executemany("INSERT INTO servers (id, name) VALUES (?, ?)", [(1, "Marmara"), (2, "Lodos")])
+    conn.executemany("INSERT INTO items (id, name, category) VALUES (?, ?, 'General')",
+                     ((i, f"Item{i} Kılıcı+{i % 10}") for i in range(1, items + 1)))
+    conn.executemany("""
+        INSERT INTO listings (server_id, item_id, seller_name, quantity, total_price_yang, seen_at)
+        VALUES (?, ?, ?, ?, ?, '2026-05-01 12:00:00')
+    """, ((rng.randint(1, 2), rng.randint(1, items), f"Seller{i % 5000}", 1, rng.randint(10**6, 10**9))
+          for i in range(total)))
+    conn.commit()
+    conn.close()
+
+def buffered(sink):
+    conn = sqlite3.connect(os.environ["METIN2_DB_PATH"])
+    rows = [dict(zip(export.LISTING_COLUMNS, row)) for row in conn.execute(SQL).fetchall()]
+    sink.write(json.dumps(rows, ensure_ascii=False).encode())
+    conn.close()
+    return len(rows)
+
+def streamed(sink):
+    count = 0
+    for chunk in export._ndjson(export.LISTING_COLUMNS, export._batches(SQL, {})):
+        sink.write(chunk)
+        count += chunk.count(b"\n")
+    return count
+
+def measure(name):
+    """Runs one variant in this (fresh) process: rows, seconds and peak RSS in MB."""
+    with open(os.devnull, "wb") as sink:
+        start = time.perf_counter()
+        rows = {"buffered": buffered, "streamed": streamed}[name](sink)
+        elapsed = time.perf_counter() - start
+    return rows, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Listings export: buffered JSON vs streamed NDJSON")
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    populate(os.environ["METIN2_DB_PATH"], args.listings)
+    print(f"{args.listings:,} listings ready in {time.perf_counter() - start:.1f}s")
+
+    for name in ("buffered", "streamed"):
+        # A process per variant so each peak RSS is its own
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            rows, elapsed, peak = pool.submit(measure, name).result()
+        print(f"{name:>9}: {rows:,} rows in {elapsed:5.2f}s ({rows / elapsed:,.0f} rows/s), peak RSS {peak:7.1f} MB")
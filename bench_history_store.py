@@ -0,0 +1,73 @@
+import argparse
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from backend.history_store import COLUMNS, append, export_json, read
+
+# Cost of recording a history point as an item's history grows: re-querying
+# the whole history and rewriting an indented JSON file (the old export)
+# versus one append to the binary store.
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "backend", "database", "schema.sql")
+
+def values(i):
+    return {column: 40_000_000 + (i * 7919 + n) % 1_000_000 for n, column in enumerate(COLUMNS)}
+
+def rewrite_json(conn, path, timestamp, point):
+    conn.execute(f"""
+        INSERT INTO price_history (item_id, server_id, item_name, timestamp, {", ".join(COLUMNS)})
+        VALUES (1, 1, 'Dolunay Kılıcı+9', ?, {", ".join("?" * len(COLUMNS))})
+    """, (timestamp, *point.values()))
+    rows = conn.execute(f"""
+        SELECT timestamp, {", ".join(COLUMNS)} FROM price_history WHERE item_id = 1 AND server_id = 1
+        ORDER BY timestamp ASC
+    """).fetchall()
+    data = [{"timestamp": row[0], **dict(zip(COLUMNS, row[1:]))} for row in rows]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    conn.commit()
+
+def run(points, record, window):
+    """Total time, and mean time per point over the last `window` points."""
+    start = datetime(2026, 1, 1)
+    times = []
+    for i in range(points):
+        began = time.perf_counter()
+        record(start + timedelta(minutes=15 * i), values(i))
+        times.append(time.perf_counter() - began)
+    return sum(times), sum(times[-window:]) / window
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="History export: JSON rewrite vs binary append")
+    parser.add_argument("--points", type=int, default=2_000)
+    parser.add_argument("--window", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = sqlite3.connect(os.path.join(tmp, "history.db"))
+        with open(SCHEMA_PATH, encoding='utf-8') as f:
+            conn.executescript(f.read())
+        json_path = os.path.join(tmp, "history.json")
+        store = os.path.join(tmp, "store")
+
+        results = {
+            "json rewrite": run(args.points, lambda ts, point: rewrite_json(conn, json_path, ts, point), args.window),
+            "append": run(args.points, lambda ts, point: append(1, 1, ts, point, store), args.window),
+        }
+        for name, (total, last) in results.items():
+            print(f"{name:>12}: {total:7.2f}s total, {last * 1000:8.3f} ms/point at {args.points:,} points")
+        conn.close()
+
+        start = time.perf_counter()
+        column = read(1, 1, store)["min_unit_price"]
+        mapped = time.perf_counter() - start
+        start = time.perf_counter()
+        export_json(1, 1, os.path.join(tmp, "export.json"), store)
+        print(f"mmap read of {len(column):,} points {mapped * 1000:.2f} ms, "
+              f"on-demand JSON export {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    old, new = results["json rewrite"][1], results["append"][1]
+    print(f"Per-point speedup at {args.points:,} points: x{old / new:.0f}")
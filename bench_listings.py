@@ -0,0 +1,115 @@
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# Offset pagination + lazy relations (old get_listings) versus keyset cursor +
+# eager loading, at increasing depth into a large listings table.
+TEMP_DIR = None
+if "METIN2_DB_PATH" not in os.environ:
+    TEMP_DIR = tempfile.mkdtemp()
+    os.environ["METIN2_DB_PATH"] = os.path.join(TEMP_DIR, "bench_listings.db")
+
+from sqlalchemy import event
+
+from backend import models, schemas
+from backend.database import DB_PATH, SessionLocal, engine, init_db
+from backend.routers.market import get_listings, encode_cursor
+
+def populate(total, seed=3):
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    if conn.execute("SELECT COUNT(*) FROM listings").fetchone()[0] >= total:
+        conn.close()
+        return
+    rng = random.Random(seed)
+    conn.execute("INSERT OR IGNORE INTO servers (name) VALUES ('Marmara')")
+    conn.executemany("INSERT OR IGNORE INTO items (name, category) VALUES (?, 'General')",
+                     [(f"Item{i} Kılıcı+{i % 10}",) for i in range(2000)])
+    start = datetime(2026, 1, 1)
+
+    def rows():
+        for i in range(1, total + 1):
+            won, yang = rng.randint(0, 40), rng.randint(0, 99_999) * 1000
+            yield (i, 1, rng.randint(1, 2000), f"Seller{rng.randint(1, 20000)}", rng.choice([1, 1, 2, 5]),
+                   won, yang, won * 100_000_000 + yang, start + timedelta(seconds=i // 3))
+
+    conn.executemany("""
+        INSERT INTO listings (id, server_id, item_id, seller_name, quantity, price_won, price_yang, total_price_yang, seen_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, rows())
+    conn.executemany("INSERT INTO listing_bonuses (listing_id, bonus_name, bonus_value) VALUES (?, ?, '')",
+                     ((i, f"Ortalama Zarar %{i % 60}") for i in range(1, total + 1)))
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+
+def legacy_page(db, skip, limit, sort_by):
+    """The old get_listings body plus response_model serialization."""
+    query = db.query(models.Listing)
+    query = query.join(models.Server).filter(models.Server.name == "Marmara")
+    if sort_by == "newest":
+        query = query.order_by(models.Listing.seen_at.desc())
+    elif sort_by == "price_asc":
+        query = query.order_by(models.Listing.total_price_yang.asc())
+    listings = query.offset(skip).limit(limit).all()
+    return [schemas.ListingOut.model_validate(l).model_dump() for l in listings]
+
+def cursor_at(skip, sort_by):
+    """The cursor a client would hold after paging `skip` rows deep."""
+    if not skip:
+        return None
+    order = {"newest": "seen_at DESC, id DESC", "price_asc": "total_price_yang ASC, id ASC"}[sort_by]
+    value_col = "seen_at" if sort_by == "newest" else "total_price_yang"
+    conn = sqlite3.connect(DB_PATH)
+    value, last_id = conn.execute(
+        f"SELECT {value_col}, id FROM listings ORDER BY {order} LIMIT 1 OFFSET ?", (skip - 1,)).fetchone()
+    conn.close()
+    return encode_cursor(sort_by, value, last_id)
+
+def keyset_page(db, cursor, limit, sort_by):
+    # Returns the serialized JSON response
+    return get_listings(0, limit, "Marmara", None, sort_by, cursor, [], db)
+
+def measure(fn, position, limit, sort_by, repeat=3):
+    queries = [0]
+    count = lambda *args: queries.__setitem__(0, queries[0] + 1)
+    best = None
+    for _ in range(repeat):
+        db = SessionLocal()
+        queries[0] = 0
+        event.listen(engine, "before_cursor_execute", count)
+        start = time.perf_counter()
+        fn(db, position, limit, sort_by)
+        elapsed = time.perf_counter() - start
+        event.remove(engine, "before_cursor_execute", count)
+        db.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, queries[0]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/market/listings latency by page depth")
+    parser.add_argument("--listings", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    populate(args.listings)
+    print(f"{args.listings:,} listings ready in {time.perf_counter() - t:.1f}s ({DB_PATH})")
+
+    depths = [d for d in (0, 1_000, 10_000, 100_000, 500_000, 900_000) if d < args.listings]
+    for sort_by in ("newest", "price_asc"):
+        print(f"\nsort_by={sort_by}, limit={args.limit}")
+        print(f"{'depth':>9} | {'offset+lazy':>20} | {'keyset+eager':>20}")
+        for depth in depths:
+            legacy_ms, legacy_q = measure(legacy_page, depth, args.limit, sort_by)
+            keyset_ms, keyset_q = measure(keyset_page, cursor_at(depth, sort_by), args.limit, sort_by)
+            print(f"{depth:>9,} | {legacy_ms:9.1f}ms {legacy_q:4d} q | {keyset_ms:9.1f}ms {keyset_q:4d} q")
+
+    if TEMP_DIR:
+        engine.dispose()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
@@ -0,0 +1,42 @@
+import argparse
+import time
+
+# Cost of recording metrics on the hot paths: one observation per scrape
+# phase, counter bumps per page and two observations per API request.
+from backend.metrics import PHASE_BUCKETS, Counter, Histogram, render
+
+def per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e9
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-call cost of counters and histograms")
+    parser.add_argument("--repeat", type=int, default=500_000)
+    parser.add_argument("--routes", type=int, default=30)
+    args = parser.parse_args()
+
+    registry = []
+    pages = Counter("pages_total", "Pages", ["source"], registry=registry)
+    phases = Histogram("phase_seconds", "Phases", ["phase"], PHASE_BUCKETS, registry=registry)
+    latency = Histogram("latency_seconds", "Latency", ["method", "route", "status"], registry=registry)
+
+    def timed():
+        with phases.time(phase="parse"):
+            pass
+
+    results = [
+        ("counter inc", per_call(lambda: pages.inc(source="html"), args.repeat)),
+        ("histogram observe", per_call(lambda: latency.observe(0.004, method="GET", route="/market/listings",
+                                                               status=200), args.repeat)),
+        ("histogram time()", per_call(timed, args.repeat)),
+    ]
+    for name, ns in results:
+        print(f"{name:>18}: {ns:6.0f} ns per call")
+
+    for i in range(args.routes):
+        latency.observe(0.01, method="GET", route=f"/route/{i}", status=200)
+    start = time.perf_counter()
+    body = render(registry)
+    print(f"Rendering {args.routes} routes: {len(body):,} bytes in {(time.perf_counter() - start) * 1000:.2f} ms")
@@ -0,0 +1,35 @@
+import argparse
+import time
+
+from backend.parsing import ROW_PARSERS, get_row_parser
+
+from test_parser import build_page
+
+def bench(parser, html, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        listings = parser.parse(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return listings, best
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Row parser backend benchmark")
+    arg_parser.add_argument("--rows", type=int, default=5000)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    html = build_page(args.rows)
+    print(f"{args.rows} rows, {len(html) / 1024:.0f} KiB of markup, best of {args.repeat}")
+
+    reference, ref_time = bench(get_row_parser("soup"), html, args.repeat)
+    assert len(reference) == args.rows
+    print(f"{'soup':>6}: {args.rows / ref_time:10,.0f} rows/s")
+
+    for name in ROW_PARSERS:
+        if name == "soup":
+            continue
+        listings, elapsed = bench(get_row_parser(name), html, args.repeat)
+        assert listings == reference, f"{name} output differs from the soup reference"
+        print(f"{name:>6}: {args.rows / elapsed:10,.0f} rows/s  (x{ref_time / elapsed:.1f}, output identical)")
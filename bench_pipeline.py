@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+# The whole scrape -> save_to_db -> analyze_market pipeline, replayed from a
+# corpus of recorded result pages (backend/corpus.py) on the local stub
+# store: a reproducible baseline with no network access.
+TEMP_DIR = None
+if "METIN2_DB_PATH" not in os.environ:
+    TEMP_DIR = tempfile.mkdtemp()
+    os.environ["METIN2_DB_PATH"] = os.path.join(TEMP_DIR, "bench_pipeline.db")
+
+from backend import scraper
+from backend.browser_pool import BrowserPool
+from backend.corpus import CORPUS_DIR, Corpus, synthesize
+from backend.database import DB_PATH, init_db
+from backend.metrics import DB_ROWS_WRITTEN, SCRAPE_PAGES, SCRAPE_PHASE_SECONDS, SCRAPE_ROWS
+
+PHASES = ("navigate", "select_server", "search", "wait", "paginate", "content", "parse", "dedupe", "save", "analyze")
+
+def snapshot():
+    return {
+        "pages": sum(SCRAPE_PAGES.value(source=source) for source in ("payload", "html")),
+        "rows": sum(SCRAPE_ROWS.value(source=source) for source in ("payload", "html")),
+        "written": sum(DB_ROWS_WRITTEN.value(table=table, op=op)
+                       for table, op in (("listings", "insert"), ("listings", "remove"), ("price_history", "insert"))),
+        **{phase: (SCRAPE_PHASE_SECONDS.count(phase=phase), SCRAPE_PHASE_SECONDS.sum(phase=phase))
+           for phase in PHASES},
+    }
+
+async def replay(pool, searches):
+    start = time.perf_counter()
+    # Every search at once; scrape_store fans its query queue out over the pool's pages
+    await asyncio.gather(*(scraper.scrape_store(search, server_name, pool) for server_name, search in searches))
+    scraper.close_writer()
+    return time.perf_counter() - start
+
+def report(label, elapsed, before, after):
+    pages, rows = after["pages"] - before["pages"], after["rows"] - before["rows"]
+    phases = {phase: (after[phase][0] - before[phase][0], after[phase][1] - before[phase][1]) for phase in PHASES}
+    db = phases["save"][1] + phases["analyze"][1]
+    print(f"\n{label}: {pages} pages, {rows:,} rows in {elapsed:.2f}s -> "
+          f"{pages / elapsed:.1f} pages/s, {rows / elapsed:,.0f} rows/s")
+    print(f"  DB write time {db:.2f}s (save {phases['save'][1]:.2f}s, analyze {phases['analyze'][1]:.2f}s), "
+          f"{after['written'] - before['written']:,} rows written")
+    for phase, (count, seconds) in phases.items():
+        if count:
+            print(f"  {phase:>13}: {seconds:7.2f}s over {count:5} calls ({seconds / count * 1000:7.1f} ms each)")
+
+async def main(corpus, pool_size, latency, repeat):
+    searches = corpus.searches()
+    with corpus.store(latency) as store:
+        scraper.URL = store.url
+        async with BrowserPool(pool_size) as pool:
+            # The first pass inserts everything; later ones find the listings unchanged
+            for n in range(repeat):
+                before = snapshot()
+                elapsed = await replay(pool, searches)
+                report("cold" if n == 0 else f"warm #{n}", elapsed, before, snapshot())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline scrape -> save -> analyze replay from a page corpus")
+    parser.add_argument("--corpus", default=CORPUS_DIR,
+                        help="Recorded corpus (a synthetic one from the stub generator if it has no pages)")
+    parser.add_argument("--pool-size", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated store response time in seconds")
+    parser.add_argument("--capture", action="store_true", help="Read pages from intercepted responses")
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    corpus = Corpus(args.corpus)
+    synthetic = None
+    if not corpus.pages:
+        synthetic = tempfile.mkdtemp()
+        synthesize(synthetic)
+        corpus = Corpus(synthetic)
+    init_db()
+    scraper.CAPTURE_MODE = args.capture
+    print(f"Corpus {synthetic or args.corpus}: {len(corpus.servers)} servers, {len(corpus.rows)} queries, "
+          f"{corpus.pages} pages ({len(corpus.searches())} searches); DB {DB_PATH}")
+
+    asyncio.run(main(corpus, args.pool_size, args.latency, args.repeat))
+
+    if synthetic:
+        shutil.rmtree(synthetic, ignore_errors=True)
+    if TEMP_DIR:
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
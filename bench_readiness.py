@@ -0,0 +1,49 @@
+import argparse
+import asyncio
+import time
+
+from backend import scraper
+from backend.browser_pool import BrowserPool
+from backend.stub_store import StubStore
+
+# Measures scrape_query time against the local stub store, with the legacy
+# fixed sleeps versus readiness signals. No network access needed.
+
+async def time_queries(store, queries, fixed_waits):
+    scraper.FIXED_WAITS = fixed_waits
+    scraper.URL = store.url
+
+    async with BrowserPool(1) as pool:
+        async with pool.lease() as slot:
+            await scraper.open_store(slot, scraper.SERVER_MAPPING["Marmara"])
+
+            start = time.perf_counter()
+            pages = rows = 0
+            for query in queries:
+                listings, visited = await scraper.scrape_query(slot.page, query)
+                pages += visited
+                rows += len(listings)
+            elapsed = time.perf_counter() - start
+
+    return elapsed, pages, rows
+
+async def main(latency, query):
+    queries = scraper.build_query_queue(query)
+    with StubStore(latency=latency) as store:
+        print(f"Stub store at {store.url}, latency {latency * 1000:.0f}ms, {len(queries)} queries")
+
+        results = {}
+        for label, fixed in (("fixed sleeps", True), ("readiness", False)):
+            elapsed, pages, rows = await time_queries(store, queries, fixed)
+            results[label] = elapsed
+            print(f"{label:>12}: {elapsed:6.1f}s for {pages} pages / {rows} rows "
+                  f"({elapsed / max(pages, 1):.2f}s per page)")
+
+    print(f"Speedup: x{results['fixed sleeps'] / results['readiness']:.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fixed sleeps vs readiness waits on the stub store")
+    parser.add_argument("--latency", type=float, default=0.25, help="Simulated store response time in seconds")
+    parser.add_argument("--query", type=str, default="Dolunay")
+    args = parser.parse_args()
+    asyncio.run(main(args.latency, args.query))
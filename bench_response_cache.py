@@ -0,0 +1,63 @@
+import argparse
+import shutil
+import time
+
+# A dashboard load (listings, top items, servers) served from SQLite every
+# time, from the response cache, and revalidated by a browser holding ETags.
+from bench_listings import TEMP_DIR, populate
+
+from fastapi.testclient import TestClient
+
+from backend.database import DB_PATH, engine, init_db
+from backend.main import app
+from backend.response_cache import response_cache
+
+DASHBOARD = [
+    ("/market/listings", {"server": "Marmara"}),
+    ("/market/stats/top-items", {}),
+    ("/market/servers", {}),
+]
+
+def load(client, etags=None):
+    sent = 0
+    for path, params in DASHBOARD:
+        headers = {"If-None-Match": etags[path]} if etags else {}
+        response = client.get(path, params=params, headers=headers)
+        assert response.status_code == (304 if etags else 200)
+        sent += len(response.content)
+    return sent
+
+def measure(client, repeat, cold=False, etags=None):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        if cold:
+            response_cache.clear()
+        sent = load(client, etags)
+    return (time.perf_counter() - start) / repeat * 1000, sent
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard load: uncached vs cached vs 304")
+    parser.add_argument("--listings", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    populate(args.listings)
+    # Fills market_summary for the listings populate() wrote directly
+    init_db()
+    print(f"{args.listings:,} listings ready in {time.perf_counter() - t:.1f}s ({DB_PATH})")
+
+    with TestClient(app) as client:
+        etags = {path: client.get(path, params=params).headers["etag"] for path, params in DASHBOARD}
+        results = [
+            ("uncached", measure(client, args.repeat, cold=True)),
+            ("cached", measure(client, args.repeat)),
+            ("304", measure(client, args.repeat, etags=etags)),
+        ]
+    for name, (ms, sent) in results:
+        print(f"{name:>9}: {ms:7.2f} ms per load, {sent:,} bytes of body")
+    print(f"Speedup: x{results[0][1][0] / results[1][1][0]:.0f} cached, x{results[0][1][0] / results[2][1][0]:.0f} with 304")
+
+    if TEMP_DIR:
+        engine.dispose()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
@@ -0,0 +1,86 @@
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+# A year of 15-minute history for a few items: database size and chart
+# query latency as history piles up, then after a retention pass.
+TEMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(TEMP_DIR, "bench.db"))
+
+from backend import retention
+from backend.database import DB_PATH, connect, init_db
+from backend.history_rollup import query_history, record_point
+
+NOW = datetime(2026, 6, 1)
+
+def populate(conn, items, days):
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR IGNORE INTO servers (name) VALUES ('Marmara')")
+    server_id = cursor.execute("SELECT id FROM servers WHERE name = 'Marmara'").fetchone()[0]
+    item_ids = []
+    for n in range(items):
+        cursor.execute("INSERT OR IGNORE INTO items (name, category) VALUES (?, 'Weapon')", (f"Bench Item {n}",))
+        item_ids.append(cursor.execute("SELECT id FROM items WHERE name = ?", (f"Bench Item {n}",)).fetchone()[0])
+    start = NOW - timedelta(days=days)
+    for item_id in item_ids:
+        for i in range(days * 96):
+            ts = start + timedelta(minutes=15 * i)
+            price = 1_000_000 + (i * 7919) % 500_000
+            cursor.execute("""
+                INSERT INTO price_history (item_id, server_id, item_name, avg_unit_price, min_unit_price,
+                                           total_listings, timestamp)
+                VALUES (?, ?, 'Bench Item', ?, ?, 10, ?)
+            """, (item_id, server_id, price, price, ts))
+            record_point(cursor, item_id, server_id, ts, price, price, 10)
+        conn.commit()
+    return item_ids, server_id
+
+def size_mb(conn):
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    return pages * conn.execute("PRAGMA page_size").fetchone()[0] / 1e6
+
+def latency(conn, item_ids, server_id, days, repeat):
+    """Best ms to chart the last `days` days of every item."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item_id in item_ids:
+            query_history(conn, item_id, server_id, start=NOW - timedelta(days=days))
+        elapsed = (time.perf_counter() - start) / len(item_ids) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def report(label, conn, item_ids, server_id, repeat):
+    raw = conn.execute("SELECT COUNT(*) FROM price_history").fetchone()[0]
+    rollups = conn.execute("SELECT COUNT(*) FROM price_history_rollup").fetchone()[0]
+    print(f"{label:>8}: {size_mb(conn):7.1f} MB, {raw:,} raw points, {rollups:,} rollup rows; chart "
+          + ", ".join(f"{days}d {latency(conn, item_ids, server_id, days, repeat):.2f} ms"
+                      for days in (7, 90, 365)))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database size and chart latency before and after retention")
+    parser.add_argument("--items", type=int, default=10)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    init_db()
+    conn = connect(DB_PATH)
+    t = time.perf_counter()
+    item_ids, server_id = populate(conn, args.items, args.days)
+    print(f"{args.items} items x {args.days} days of 15-minute history in {time.perf_counter() - t:.1f}s ({DB_PATH})")
+    report("before", conn, item_ids, server_id, args.repeat)
+
+    t = time.perf_counter()
+    stats = retention.run(conn, NOW, store_root=os.path.join(TEMP_DIR, "history"))
+    batches = sum(-(-rows // retention.RETENTION_BATCH) for rows in stats["history"].values())
+    print(f"Retention: {stats['history']} in {batches} batches, "
+          f"{stats['reclaimed_bytes'] / 1e6:.1f} MB reclaimed, {time.perf_counter() - t:.1f}s")
+    report("after", conn, item_ids, server_id, args.repeat)
+
+    conn.close()
+    if os.environ["METIN2_DB_PATH"].startswith(TEMP_DIR):
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
@@ -0,0 +1,117 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from backend.db_writer import BulkWriter
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "backend", "database", "schema.sql")
+BONUSES = ["Ortalama Zarar %{}", "Beceri Hasarı %{}", "Ölümsüzlere karşı güçlü +%{}", "Kritik Vuruş Şansı %{}"]
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        conn.executescript(f.read())
+    conn.commit()
+    conn.close()
+
+def synthetic_batches(total, batch_size, seed=7):
+    """Yields (query, listings) batches shaped like one scrape_store query each."""
+    rng = random.Random(seed)
+    for b in range(total // batch_size):
+        query = f"Item{b % 40} Kılıcı+{b % 10}"
+        listings = []
+        for i in range(batch_size):
+            won, yang, qty = rng.randint(0, 30), rng.randint(0, 99_999) * 1000, rng.choice([1, 1, 2, 5])
+            listings.append({
+                "item_name": query if i % 4 else f"{query} ({i % 7})",
+                "seller": f"Seller{rng.randint(1, 5000)}",
+                "quantity": qty,
+                "price_won": won,
+                "price_yang": yang,
+                "total_yang": won * 100_000_000 + yang,
+                "bonuses": [t.format(rng.randint(1, 60)) for t in rng.sample(BONUSES, rng.randint(1, 3))],
+            })
+        yield query, listings
+
+def legacy_save(db_path, listings, search_query, server_name):
+    """The pre-BulkWriter save_to_db: new connection and per-row statements.
+
+    Returns the number of rows it changed.
+    """
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR IGNORE INTO servers (name) VALUES (?)", (server_name,))
+    cursor.execute("SELECT id FROM servers WHERE name=?", (server_name,))
+    server_id = cursor.fetchone()[0]
+
+    if search_query:
+        cursor.execute("""
+            DELETE FROM listings
+            WHERE server_id = ? AND item_id IN (SELECT id FROM items WHERE name LIKE ?)
+        """, (server_id, f"%{search_query}%"))
+        cursor.execute("DELETE FROM listing_bonuses WHERE listing_id NOT IN (SELECT id FROM listings)")
+
+    for item in listings:
+        cursor.execute("INSERT OR IGNORE INTO items (name, category) VALUES (?, ?)", (item['item_name'], "General"))
+        item_id = cursor.execute("SELECT id FROM items WHERE name=?", (item['item_name'],)).fetchone()[0]
+        cursor.execute("""
+            INSERT INTO listings (server_id, item_id, seller_name, quantity, price_won, price_yang, total_price_yang)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (server_id, item_id, item['seller'], item['quantity'], item['price_won'], item['price_yang'], item['total_yang']))
+        listing_id = cursor.lastrowid
+        for bonus in item['bonuses']:
+            if bonus:
+                cursor.execute("INSERT INTO listing_bonuses (listing_id, bonus_name, bonus_value) VALUES (?, ?, ?)", (listing_id, bonus, ""))
+    conn.commit()
+    changed = conn.total_changes
+    conn.close()
+    return changed
+
+def run_legacy(db_path, batches):
+    start = time.perf_counter()
+    for query, listings in batches:
+        legacy_save(db_path, listings, query, "Marmara")
+    return time.perf_counter() - start
+
+def run_bulk(db_path, batches):
+    start = time.perf_counter()
+    writer = BulkWriter(db_path)
+    for query, listings in batches:
+        writer.write(listings, query, "Marmara")
+    writer.close()
+    return time.perf_counter() - start
+
+def counts(db_path):
+    """(items, active listings); the bulk writer keeps removed listings around, so only active ones compare."""
+    conn = sqlite3.connect(db_path)
+    result = [
+        conn.execute("SELECT COUNT(*) FROM items").fetchone()[0],
+        conn.execute("SELECT COUNT(*) FROM listings WHERE removed_at IS NULL").fetchone()[0],
+    ]
+    conn.close()
+    return result
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="save_to_db: per-row vs BulkWriter")
+    parser.add_argument("--listings", type=int, default=100_000)
+    parser.add_argument("--batch", type=int, default=1000, help="Listings per scraped query")
+    args = parser.parse_args()
+
+    batches = list(synthetic_batches(args.listings, args.batch))
+    n_bonuses = sum(len(l["bonuses"]) for _, batch in batches for l in batch)
+    print(f"{args.listings:,} listings with {n_bonuses:,} bonuses in {len(batches)} batches")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name, runner in (("legacy", run_legacy), ("bulk", run_bulk)):
+            path = os.path.join(tmp, f"{name}.db")
+            make_db(path)
+            elapsed = runner(path, batches)
+            results[name] = (elapsed, counts(path))
+            print(f"{name:>7}: {elapsed:7.2f}s  ({args.listings / elapsed:,.0f} listings/s)  rows={results[name][1]}")
+
+    assert results["legacy"][1] == results["bulk"][1], "writers left different row counts"
+    print(f"Speedup: x{results['legacy'][0] / results['bulk'][0]:.1f}")
@@ -0,0 +1,61 @@
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from backend.search_index import item_ids_sql, sync_items
+
+# Item lookup by substring: LIKE '%q%' over items.name versus the items_fts
+# trigram index, as the catalog grows.
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "backend", "database", "schema.sql")
+SYLLABLES = ["do", "lu", "nay", "kı", "lı", "zeh", "ir", "kal", "kan", "şa", "hin", "mı", "de", "pa",
+             "la", "yay", "kü", "pe", "kol", "ye", "zır", "çe", "lik", "si", "ma", "vi", "ge", "bo", "or", "çan"]
+TYPES = ["Kılıcı", "Kalkan", "Zırh", "Yay", "Küpe", "Kolye", "Pala", "Çan"]
+# Real item names always present; queries hit a handful of items each
+KNOWN = ["Dolunay Kılıcı", "Zehir Kılıcı", "Kırmızı Demir Pala", "Şahin Kalkan", "Geyik Boynuzu Yay"]
+QUERIES = ["dolunay kılıcı+9", "zehir", "kdp", "sahin kalkan", "boynuzu yay+3"]
+
+def make_catalog(path, size, seed=11):
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        conn.executescript(f.read())
+    rng = random.Random(seed)
+    names = {f"{base}+{level}" for base in KNOWN for level in range(10)}
+    while len(names) < size:
+        word = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))).capitalize()
+        names.add(f"{word} {rng.choice(TYPES)}+{rng.randint(0, 9)}")
+    conn.executemany("INSERT OR IGNORE INTO items (name, category) VALUES (?, 'General')", ((n,) for n in names))
+    sync_items(conn)
+    conn.commit()
+    return conn
+
+def like_lookup(conn, query):
+    return conn.execute("SELECT id FROM items WHERE name LIKE ?", (f"%{query}%",)).fetchall()
+
+def index_lookup(conn, query):
+    sql, params = item_ids_sql(query)
+    return conn.execute(sql, params).fetchall()
+
+def measure(fn, conn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in QUERIES:
+            fn(conn, query)
+    return (time.perf_counter() - start) / (repeat * len(QUERIES)) * 1000
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Item-name lookup latency by catalog size")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 500_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'items':>9} | {'LIKE %q%':>10} | {'trigram':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            conn = make_catalog(os.path.join(tmp, f"{size}.db"), size)
+            like_ms = measure(like_lookup, conn, args.repeat)
+            index_ms = measure(index_lookup, conn, args.repeat)
+            print(f"{size:>9,} | {like_ms:8.2f}ms | {index_ms:8.2f}ms")
+            conn.close()
@@ -0,0 +1,74 @@
+import argparse
+import json
+import shutil
+import time
+from typing import List
+
+# A large /market/listings page: ORM objects validated through
+# response_model=List[ListingOut] and encoded with the stdlib (the old
+# get_listings) versus the flat projection encoded with orjson.
+from bench_listings import TEMP_DIR, populate
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import joinedload, selectinload
+
+from backend import models, schemas
+from backend.database import DB_PATH, SessionLocal, engine
+from backend.routers.market import get_listings
+
+LISTINGS = TypeAdapter(List[schemas.ListingOut])
+
+def response_model(db, limit):
+    """The old path: eager-loaded ORM rows, validated and dumped per row, then json.dumps."""
+    load = time.perf_counter()
+    listings = db.query(models.Listing) \
+        .filter(models.Listing.server_id == 1, models.Listing.removed_at.is_(None)) \
+        .order_by(models.Listing.seen_at.desc(), models.Listing.id.desc()) \
+        .options(joinedload(models.Listing.server), joinedload(models.Listing.item),
+                 selectinload(models.Listing.bonuses)) \
+        .limit(limit).all()
+    encode = time.perf_counter()
+    body = json.dumps(LISTINGS.dump_python(LISTINGS.validate_python(listings), mode="json"),
+                      ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, encode - load, time.perf_counter() - encode
+
+def fast_path(db, limit):
+    start = time.perf_counter()
+    body = get_listings(0, limit, "Marmara", None, "newest", None, [], db).body
+    return body, time.perf_counter() - start, 0.0
+
+def measure(fn, limit, repeat):
+    best = None
+    for _ in range(repeat):
+        db = SessionLocal()
+        start = time.perf_counter()
+        body, load, encode = fn(db, limit)
+        total = time.perf_counter() - start
+        db.close()
+        if best is None or total < best[0]:
+            best = (total, load, encode, body)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/market/listings serialization per 10k rows")
+    parser.add_argument("--listings", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    t = time.perf_counter()
+    populate(args.listings)
+    print(f"{args.listings:,} listings ready in {time.perf_counter() - t:.1f}s ({DB_PATH})")
+
+    per = 10_000 / args.limit
+    old_total, old_load, old_encode, old_body = measure(response_model, args.limit, args.repeat)
+    new_total, _, _, new_body = measure(fast_path, args.limit, args.repeat)
+    assert json.loads(old_body) == json.loads(new_body)
+    print(f"response_model: {old_total * per * 1000:7.1f} ms per 10k rows "
+          f"(load {old_load * per * 1000:.1f} ms, validate+encode {old_encode * per * 1000:.1f} ms)")
+    print(f"     fast path: {new_total * per * 1000:7.1f} ms per 10k rows (query, build and encode)")
+    print(f"Speedup: x{old_total / new_total:.1f}, same {len(new_body):,}-byte body")
+
+    if TEMP_DIR:
+        engine.dispose()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
@@ -0,0 +1,87 @@
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from backend.price_stats import load_listings, robust_stats
+
+# Robust per-item stats over the whole listings table: one SQL query per item
+# with the maths in Python, versus one bulk load and a single NumPy pass.
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "backend", "database", "schema.sql")
+
+def populate(path, total, items, seed=13):
+    conn = sqlite3.connect(path)
+    with open(SCHEMA_PATH, encoding='utf-8') as f:
+        conn.executescript(f.read())
+    rng = random.Random(seed)
+    conn.executemany("INSERT INTO items (id, name, category) VALUES (?, ?, 'General')",
+                     ((i, f"Item{i} Kılıcı") for i in range(1, items + 1)))
+
+    def rows():
+        for i in range(total):
+            quantity = rng.choice([1, 1, 2, 5, 200])
+            unit = int(rng.lognormvariate(17, 0.4))
+            if rng.random() < 0.01:
+                unit *= 1000  # troll listing
+            yield (rng.randint(1, 2), rng.randint(1, items), f"Seller{i % 5000}", quantity, unit * quantity)
+
+    conn.executemany("""
+        INSERT INTO listings (server_id, item_id, seller_name, quantity, total_price_yang) VALUES (?, ?, ?, ?, ?)
+    """, rows())
+    conn.commit()
+    return conn
+
+def per_item(conn):
+    """Per-group SQL plus pure-Python statistics."""
+    results = {}
+    item_ids = [row[0] for row in conn.execute("SELECT DISTINCT item_id FROM listings")]
+    for item_id in item_ids:
+        rows = conn.execute("""
+            SELECT total_price_yang, quantity FROM listings
+            WHERE item_id = ? AND removed_at IS NULL AND quantity > 0
+        """, (item_id,)).fetchall()
+        unit = sorted(t // q for t, q in rows)
+        if len(unit) < 2:
+            continue
+        p25, p50, p75 = statistics.quantiles(unit, n=4, method="inclusive")
+        lo, hi = p25 - 1.5 * (p75 - p25), p75 + 1.5 * (p75 - p25)
+        kept = [(t, q) for t, q in rows if lo <= t // q <= hi]
+        results[item_id] = (round(p50), round(statistics.fmean(t // q for t, q in kept)),
+                            round(sum(t for t, _ in kept) / sum(q for _, q in kept)))
+    return results
+
+def vectorized(conn):
+    start = time.perf_counter()
+    item_ids, _, totals, quantities = load_listings(conn)
+    loaded = time.perf_counter()
+    stats = robust_stats(item_ids, totals, quantities)
+    print(f"           (bulk load {loaded - start:.2f}s, vectorized pass {time.perf_counter() - loaded:.2f}s)")
+    return {k: (s["median_unit_price"], s["trimmed_mean_unit_price"], s["weighted_unit_price"])
+            for k, s in stats.items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Robust price stats: per-item SQL vs NumPy")
+    parser.add_argument("--listings", type=int, default=2_000_000)
+    parser.add_argument("--items", type=int, default=2_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        conn = populate(os.path.join(tmp, "stats.db"), args.listings, args.items)
+        print(f"{args.listings:,} listings over {args.items:,} items ready in {time.perf_counter() - start:.1f}s")
+
+        timings = {}
+        for name, fn in (("per-item", per_item), ("numpy", vectorized)):
+            start = time.perf_counter()
+            results = fn(conn)
+            timings[name] = (time.perf_counter() - start, results)
+            print(f"{name:>9}: {timings[name][0]:6.2f}s for {len(results):,} items")
+        conn.close()
+
+    slow, fast = timings["per-item"][1], timings["numpy"][1]
+    mismatched = [k for k in slow if abs(slow[k][0] - fast[k][0]) > 1 or abs(slow[k][1] - fast[k][1]) > 1]
+    assert not mismatched, f"results differ for items {mismatched[:5]}"
+    print(f"Speedup: x{timings['per-item'][0] / timings['numpy'][0]:.1f}")
@@ -0,0 +1,64 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from bench_save import make_db, synthetic_batches, legacy_save
+from backend.db_writer import BulkWriter
+
+# Re-scrapes the same market several times with a small fraction of listings
+# sold/relisted between sweeps, and compares rows written by the old
+# delete-and-reinsert save against the incremental sync.
+
+def churn(batches, rate, rng):
+    """Next sweep: replaces `rate` of each batch's listings with fresh ones."""
+    swept = []
+    for query, listings in batches:
+        listings = [dict(l) for l in listings]
+        for i in rng.sample(range(len(listings)), int(len(listings) * rate)):
+            listings[i]["seller"] = f"Relist{rng.randint(1, 10**9)}"
+        swept.append((query, listings))
+    return swept
+
+def run(name, path, sweeps):
+    writer = BulkWriter(path) if name == "incremental" else None
+    written = []
+    start = time.perf_counter()
+    for batches in sweeps:
+        rows = 0
+        for query, listings in batches:
+            if writer:
+                before = writer.conn.total_changes
+                writer.write(listings, query, "Marmara")
+                rows += writer.conn.total_changes - before
+            else:
+                rows += legacy_save(path, listings, query, "Marmara")
+        written.append(rows)
+    elapsed = time.perf_counter() - start
+    if writer:
+        writer.close()
+    return elapsed, written
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rows written per sweep: delete-and-reinsert vs incremental sync")
+    parser.add_argument("--listings", type=int, default=20_000)
+    parser.add_argument("--sweeps", type=int, default=5)
+    parser.add_argument("--churn", type=float, default=0.05, help="Fraction of listings that change per sweep")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    # One batch per distinct query so a sweep covers the market exactly once
+    first = [b for i, b in enumerate(synthetic_batches(args.listings, 1000)) if i < 40]
+    sweeps = [first]
+    for _ in range(args.sweeps - 1):
+        sweeps.append(churn(sweeps[-1], args.churn, rng))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("legacy", "incremental"):
+            path = os.path.join(tmp, f"{name}.db")
+            make_db(path)
+            elapsed, written = run(name, path, sweeps)
+            later = written[1:] or written
+            print(f"{name:>12}: {elapsed:6.2f}s, rows written per sweep {written} "
+                  f"(avg after first: {sum(later) / len(later):,.0f})")
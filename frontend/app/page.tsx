@@ -5,9 +5,12 @@ import Navbar from '@/components/Navbar';
 import StatsCard from '@/components/StatsCard';
 import ListingTable from '@/components/ListingTable';
 import PriceChart from '@/components/PriceChart';
-import { getListings, getTopItems, getPriceHistory, triggerScrape, getServers, Listing, PricePoint } from '@/lib/api';
+import { getListings, getTopItems, getPriceHistory, triggerScrape, getServers, subscribeMarketEvents, listingFromEvent, Listing, PricePoint } from '@/lib/api';
 import { TrendingUp, ShoppingCart, Server, LineChart, Search, RefreshCw, ChevronDown } from 'lucide-react';
 
+// Same page size as /market/listings, newest first
+const LIVE_LISTING_LIMIT = 100;
+
 export default function Home() {
   const [listings, setListings] = useState<Listing[]>([]);
   const [topItems, setTopItems] = useState<{name: string, count: number}[]>([]);
@@ -45,7 +48,7 @@ export default function Home() {
 
         if (topItemsData.length > 0 && !selectedItemForChart) {
             setSelectedItemForChart(topItemsData[0].name);
-            const history = await getPriceHistory(topItemsData[0].name);
+            const history = await getPriceHistory(topItemsData[0].name, currentServer);
             setPriceHistory(history);
         }
       } catch (error: any) {
@@ -60,6 +63,34 @@ export default function Home() {
     fetchData(null, selectedServer);
   }, [selectedServer]);
 
+  // Live updates instead of re-polling: the backend pushes listing changes for this server and search
+  useEffect(() => {
+      return subscribeMarketEvents(
+          { types: ['listing-added', 'listing-removed'], servers: [selectedServer], q: activeFilter || undefined },
+          event => {
+              if (event.type === 'listing-added') {
+                  setListings(prev => [listingFromEvent(event), ...prev].slice(0, LIVE_LISTING_LIMIT));
+              } else if (event.type === 'listing-removed') {
+                  setListings(prev => prev.filter(listing => listing.id !== event.id));
+              }
+          },
+          () => fetchData(activeFilter, selectedServer)
+      );
+  }, [selectedServer, activeFilter]);
+
+  // ...and new price history points of the charted item
+  useEffect(() => {
+      if (!selectedItemForChart) return;
+      return subscribeMarketEvents(
+          { types: ['history-point'], servers: [selectedServer], items: [selectedItemForChart] },
+          event => {
+              if (event.type === 'history-point') {
+                  setPriceHistory(prev => [...prev, { date: event.timestamp, avg_price: event.avg_unit_price }]);
+              }
+          }
+      );
+  }, [selectedServer, selectedItemForChart]);
+
   const handleScrape = async () => {
       if (!searchQuery) return;
       setScraping(true);
@@ -87,7 +118,7 @@ export default function Home() {
   const handleTopItemClick = async (itemName: string) => {
       setSelectedItemForChart(itemName);
       try {
-          const history = await getPriceHistory(itemName);
+          const history = await getPriceHistory(itemName, selectedServer);
           setPriceHistory(history);
       } catch (e) {
           console.error("Failed to fetch history for", itemName, e);
@@ -67,14 +67,143 @@ export interface PricePoint {
   avg_price: number;
 }
 
-export const getPriceHistory = async (itemName: string) => {
-    const response = await api.get<PricePoint[]>('/market/stats/price-history', {
-        params: { item_name: itemName }
+export interface HistoryPoint {
+  timestamp: string;
+  avg_unit_price: number;
+  min_unit_price: number;
+  total_listings: number;
+  // Present when the server answered with bucketed rollups (X-Bucket != raw)
+  open?: number;
+  high?: number;
+  low?: number;
+  close?: number;
+}
+
+// The chart is a few hundred pixels wide; ask for about that many points.
+// History is kept per server; leave `server` out to combine every server.
+export const getPriceHistory = async (itemName: string, server?: string, maxPoints = 300) => {
+    const response = await api.get<HistoryPoint[]>('/market/stats/price-history', {
+        params: { item_name: itemName, server, max_points: maxPoints }
     });
+    return response.data.map(point => ({ date: point.timestamp, avg_price: point.avg_unit_price }) as PricePoint);
+}
+
+export interface PriceComparison {
+  bucket: string;
+  timestamps: string[];
+  // One entry per (item, server); values line up with `timestamps`, null where there was no scrape
+  series: { item: string; server: string; min_unit_price: (number | null)[]; avg_unit_price: (number | null)[] }[];
+}
+
+// One item across many servers, or many items on one server, in a single request
+export const getPriceComparison = async (items: string[], servers: string[], maxPoints = 300) => {
+    const params = new URLSearchParams();
+    items.forEach(item => params.append('item', item));
+    servers.forEach(server => params.append('server', server));
+    params.append('max_points', String(maxPoints));
+    const response = await api.get<PriceComparison>('/market/stats/compare', { params });
     return response.data;
 }
 
-export const triggerScrape = async (query: string, server: string) => {
-    const response = await api.post<{ message: string, output?: string, error?: string }>('/scrape', { query, server });
+export interface ScrapeJob {
+  id: string;
+  query: string;
+  server: string;
+  status: 'queued' | 'running' | 'done' | 'failed';
+  progress: { pages: number; listings: number };
+  stored: number | null;
+  failed_queries: number;
+  error: string | null;
+  timings: { queued: number | null; running: number | null };
+}
+
+export const getScrapeJob = async (jobId: string) => {
+    const response = await api.get<ScrapeJob>(`/scrape/${jobId}`);
     return response.data;
 }
+
+// Queues a scrape and polls the job until it finishes; onProgress sees every poll
+export const triggerScrape = async (query: string, server: string, onProgress?: (job: ScrapeJob) => void) => {
+    const response = await api.post<{ job_id: string, status: string, coalesced: boolean }>('/scrape', { query, server });
+    let job = await getScrapeJob(response.data.job_id);
+    while (job.status === 'queued' || job.status === 'running') {
+        onProgress?.(job);
+        await new Promise(resolve => setTimeout(resolve, 2000));
+        job = await getScrapeJob(job.id);
+    }
+    if (job.status === 'failed') {
+        throw new Error(job.error || 'Scrape failed');
+    }
+    return job;
+}
+
+export interface ListingAddedEvent {
+  type: 'listing-added';
+  item: string;
+  server: string;
+  id: number;
+  seller_name: string;
+  quantity: number;
+  price_won: number;
+  price_yang: number;
+  total_price_yang: number;
+  seen_at: string;
+  bonuses: string[];
+}
+
+export interface ListingRemovedEvent {
+  type: 'listing-removed';
+  item: string;
+  server: string;
+  id: number;
+  removed_at: string;
+}
+
+export interface HistoryPointEvent {
+  type: 'history-point';
+  item: string;
+  server: string;
+  timestamp: string;
+  avg_unit_price: number;
+  min_unit_price: number;
+  total_listings: number;
+}
+
+export type MarketEvent = ListingAddedEvent | ListingRemovedEvent | HistoryPointEvent;
+
+export interface EventFilter {
+  types?: MarketEvent['type'][];
+  servers?: string[];
+  items?: string[];  // exact item names
+  q?: string;        // an item search, matched like getListings' itemName
+}
+
+// Listings pushed by the live feed, in the shape getListings returns
+export const listingFromEvent = (event: ListingAddedEvent): Listing => ({
+  id: event.id,
+  item: { name: event.item, category: 'General', image_url: null },
+  server: { name: event.server },
+  seller_name: event.seller_name,
+  quantity: event.quantity,
+  price_won: event.price_won,
+  price_yang: event.price_yang,
+  total_price_yang: event.total_price_yang,
+  seen_at: event.seen_at,
+  bonuses: event.bonuses.map(bonus => ({ bonus_name: bonus, bonus_value: '' })),
+});
+
+// Live feed of market changes over Server-Sent Events, instead of polling.
+// onResync fires when this client fell behind and missed events: refetch then.
+// EventSource reconnects by itself; call the returned function to close it.
+export const subscribeMarketEvents = (filter: EventFilter, onEvent: (event: MarketEvent) => void, onResync?: () => void) => {
+    const params = new URLSearchParams();
+    filter.types?.forEach(type => params.append('type', type));
+    filter.servers?.forEach(server => params.append('server', server));
+    filter.items?.forEach(item => params.append('item', item));
+    if (filter.q) params.append('q', filter.q);
+    const source = new EventSource(`${API_URL}/events/stream?${params}`);
+    const handle = (message: MessageEvent) => onEvent(JSON.parse(message.data) as MarketEvent);
+    (filter.types ?? ['listing-added', 'listing-removed', 'history-point']).forEach(type => source.addEventListener(type, handle));
+    source.addEventListener('resync', () => onResync?.());
+    return () => source.close();
+}
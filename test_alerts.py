@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend import alerts, scraper
+from backend.alerts import alert_engine, stream_sink
+from backend.database import init_db
+from backend.events import event_bus
+from backend.main import app
+
+ITEM = "Bambu Yelpaze+3"
+
+def listing(seller, total, quantity=1, bonuses=()):
+    return {"item_name": ITEM, "seller": seller, "quantity": quantity, "price_won": 0, "price_yang": 0,
+            "total_yang": total, "bonuses": list(bonuses)}
+
+def save(listings, server):
+    async def run():
+        await scraper.save_to_db(listings, ITEM, server)
+        scraper.close_writer()
+
+    asyncio.run(run())
+
+class Webhook(BaseHTTPRequestHandler):
+    received = []
+
+    def do_POST(self):
+        Webhook.received.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+def test_rules_fire_on_new_listings_only():
+    init_db()
+    hook = HTTPServer(("127.0.0.1", 0), Webhook)
+    threading.Thread(target=hook.serve_forever, daemon=True).start()
+    captured = []
+    sinks, alert_engine.sinks = alert_engine.sinks, {**alerts.SINKS, "log": lambda alert, target: captured.append(alert)}
+    try:
+        with TestClient(app) as client:
+            rules = [
+                {"item": ITEM, "server": "Chimera", "max_unit_price": 1_000_000},
+                {"item": ITEM, "max_unit_price": 500_000, "bonus": ["Ortalama Zarar>=40"]},
+                {"item": ITEM, "server": "Oceana", "max_unit_price": 2_000_000, "sink": "webhook",
+                 "target": f"http://127.0.0.1:{hook.server_port}/alerts"},
+            ]
+            ids = []
+            for rule in rules:
+                response = client.post("/alerts/rules", json=rule)
+                assert response.status_code == 201, response.text
+                ids.append(response.json()["id"])
+            assert [r["server"] and r["server"]["name"] for r in client.get("/alerts/rules").json()][-3:] == \
+                ["Chimera", None, "Oceana"]
+            assert client.post("/alerts/rules", json={"item": ITEM, "max_unit_price": 1,
+                                                      "bonus": ["Ortalama Zarar"]}).status_code == 400
+            assert client.post("/alerts/rules", json={"item": ITEM, "max_unit_price": 1,
+                                                      "sink": "webhook"}).status_code == 400
+            assert client.delete("/alerts/rules/999999").status_code == 404
+
+        save([listing("Cheap", 900_000), listing("Stack", 4_000_000, quantity=5),
+              listing("Pricey", 3_000_000), listing("Od", 400_000, bonuses=["Ortalama Zarar %47"])], "Chimera")
+        # Stack is 800k per unit; Pricey is over every limit
+        assert sorted((ids.index(a["rule_id"]), a["seller"]) for a in captured) == \
+            [(0, "Cheap"), (0, "Od"), (0, "Stack"), (1, "Od")]
+        od = [a for a in captured if a["seller"] == "Od"]
+        assert len(od) == 2 and od[0]["unit_price"] == 400_000 and od[0]["server"] == "Chimera"
+
+        # The same listings again are unchanged, not new: no alerts
+        captured.clear()
+        save([listing("Cheap", 900_000), listing("Stack", 4_000_000, quantity=5),
+              listing("Pricey", 3_000_000), listing("Od", 400_000, bonuses=["Ortalama Zarar %47"])], "Chimera")
+        assert captured == []
+
+        # On Oceana the server-less rule fails its bonus threshold; the webhook rule takes both
+        save([listing("Weak", 100_000, bonuses=["Ortalama Zarar %10"]), listing("Hook", 1_500_000)], "Oceana")
+        assert captured == []
+        deadline = time.time() + 5
+        while len(Webhook.received) < 2 and time.time() < deadline:
+            time.sleep(0.05)
+        assert sorted(a["seller"] for a in Webhook.received) == ["Hook", "Weak"]
+    finally:
+        alert_engine.sinks = sinks
+        hook.shutdown()
+
+def test_sse_sink_publishes_alert_events():
+    async def run():
+        alert = {"rule_id": 1, "item": ITEM, "server": "Chimera"}
+        async with event_bus.subscribe(types=["alert"]) as alerts, event_bus.subscribe(types=["history-point"]) as other:
+            threading.Thread(target=stream_sink, args=(alert, None)).start()
+            event = await asyncio.wait_for(alerts.queue.get(), 5)
+            return event, other.queue.qsize()
+
+    event, other = asyncio.run(run())
+    assert event == {"type": "alert", "rule_id": 1, "item": ITEM, "server": "Chimera"} and other == 0
+
+if __name__ == "__main__":
+    test_rules_fire_on_new_listings_only()
+    test_sse_sink_publishes_alert_events()
+    print("Alerts OK.")
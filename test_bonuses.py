@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import tempfile
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend.bonuses import backfill, parse_bonus, parse_filter
+from backend.database import init_db
+from backend.db_writer import BulkWriter
+from backend.main import app
+
+DB_PATH = os.environ["METIN2_DB_PATH"]
+
+def test_parse_bonus():
+    assert parse_bonus("Ortalama Zarar %45") == ("Ortalama Zarar", 45)
+    assert parse_bonus("Beceri Hasarı %-13") == ("Beceri Hasarı", -13)
+    assert parse_bonus("Ölümsüzlere karşı güçlü +%20") == ("Ölümsüzlere karşı güçlü", 20)
+    assert parse_bonus("Karanlığın gücü 7 (2,1,4)") == ("Karanlığın gücü", 7)
+    assert parse_bonus("Max. HP +2000") == ("Max. HP", 2000)
+    assert parse_bonus("Sersemletme Şansı") == ("Sersemletme Şansı", None)
+    assert parse_filter("olumsuzlere karsi guclu >= 20") == ("olumsuzlere karsi guclu", ">=", 20)
+
+def seed():
+    init_db()
+    writer = BulkWriter(DB_PATH)
+    listings = [{
+        "item_name": "Kartal Yayı+7", "seller": f"Seller{i}", "quantity": 1,
+        "price_won": 0, "price_yang": 0, "total_yang": 5_000_000 + i,
+        "bonuses": [f"Ortalama Zarar %{i * 5}", f"Ölümsüzlere karşı güçlü +%{i % 4 * 10}"],
+    } for i in range(12)]
+    writer.write(listings, "Kartal Yayı+7", "Tigerghost")
+    writer.close()
+
+def test_bonus_filters():
+    seed()
+    conn = sqlite3.connect(DB_PATH)
+    rows = conn.execute("""
+        SELECT b.bonus_value, b.value_num, t.name FROM listing_bonuses b
+        JOIN bonus_types t ON t.id = b.bonus_type_id
+        JOIN listings l ON l.id = b.listing_id
+        JOIN servers s ON s.id = l.server_id
+        WHERE b.bonus_name = 'Ortalama Zarar %45' AND s.name = 'Tigerghost'
+    """).fetchall()
+    assert rows == [("45", 45.0, "Ortalama Zarar")]
+    conn.close()
+
+    with TestClient(app) as client:
+        def sellers(*bonus):
+            response = client.get("/market/listings", params={"server": "Tigerghost", "bonus": list(bonus)})
+            assert response.status_code == 200, response.text
+            return sorted(int(row["seller_name"][6:]) for row in response.json())
+
+        assert sellers("Ortalama Zarar>=40") == [8, 9, 10, 11]
+        # Several thresholds must all hold; names fold like item search
+        assert sellers("ORTALAMA ZARAR >= 20", "olumsuzlere karsi guclu>=30") == [7, 11]
+        assert sellers("Ortalama Zarar<10") == [0, 1]
+        assert sellers("Ortalama Zarar=25") == [5]
+        assert sellers("Kritik Vuruş Şansı>=1") == []
+        response = client.get("/market/listings", params={"bonus": "Ortalama Zarar 40"})
+        assert response.status_code == 400
+
+def test_backfill_parses_legacy_rows():
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    conn.execute("INSERT INTO listing_bonuses (listing_id, bonus_name, bonus_value) VALUES (-1, 'Beceri Hasarı %-13', '')")
+    conn.execute("INSERT INTO listing_bonuses (listing_id, bonus_name, bonus_value) VALUES (-1, 'Yarı insanlara karşı güçlü +%10', '')")
+    assert backfill(conn) == 2
+    rows = conn.execute("""
+        SELECT t.name, b.value_num, b.bonus_value FROM listing_bonuses b
+        JOIN bonus_types t ON t.id = b.bonus_type_id WHERE b.listing_id = -1 ORDER BY b.value_num
+    """).fetchall()
+    assert rows == [("Beceri Hasarı", -13.0, "-13"), ("Yarı insanlara karşı güçlü", 10.0, "10")]
+    assert backfill(conn) == 0
+    conn.close()
+
+if __name__ == "__main__":
+    test_parse_bonus()
+    test_bonus_filters()
+    test_backfill_parses_legacy_rows()
+    print("Bonuses OK.")
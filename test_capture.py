@@ -0,0 +1,69 @@
+import asyncio
+import glob
+import json
+import os
+
+from backend.capture import ResponseCapture, listings_from_payload, CAPTURE_DIR
+
+# Replays recorded store responses (data/fixtures/captures) through the capture
+# pipeline offline. Record new fixtures with: python scraper.py --query X --record-captures
+
+class FakeRequest:
+    def __init__(self, resource_type):
+        self.resource_type = resource_type
+
+class FakeResponse:
+    """Just enough of playwright's Response for ResponseCapture."""
+
+    def __init__(self, url, payload, resource_type="xhr", content_type="application/json"):
+        self.url = url
+        self.request = FakeRequest(resource_type)
+        self.headers = {"content-type": content_type}
+        self._payload = payload
+
+    async def json(self):
+        return self._payload
+
+def load_fixtures():
+    return sorted(glob.glob(os.path.join(CAPTURE_DIR, "*.json")))
+
+async def replay(fixture):
+    capture = ResponseCapture()
+    capture.on_response(FakeResponse(fixture["url"], fixture["payload"]))
+    payload = await capture.next_payload(timeout=1)
+    return listings_from_payload(payload)
+
+def test_replay_fixtures():
+    fixtures = load_fixtures()
+    assert fixtures, "no capture fixtures found"
+
+    for path in fixtures:
+        with open(path, encoding='utf-8') as f:
+            fixture = json.load(f)
+
+        listings = asyncio.run(replay(fixture))
+        print(f"{os.path.basename(path)}: {listings and len(listings)} listings")
+        assert listings is not None, f"{path}: payload not recognised as listing data"
+
+        # Hand-checked fixtures carry the expected output; raw recordings only need to map
+        if "expected" in fixture:
+            assert listings == fixture["expected"], path
+        for listing in listings:
+            assert listing["item_name"] and listing["quantity"] > 0
+
+def test_ignores_non_data_responses():
+    capture = ResponseCapture()
+    assert not capture.matches(FakeResponse("https://metin2alerts.com/api/store/search", {}, resource_type="image"))
+    assert not capture.matches(FakeResponse("https://metin2alerts.com/static/app.js", {}, content_type="text/javascript"))
+    assert not capture.matches(FakeResponse("https://cdn.example.com/config.json", {}))
+    assert capture.matches(FakeResponse("https://metin2alerts.com/api/store/search?q=x", {}))
+
+def test_unknown_payload_falls_back():
+    assert listings_from_payload({"status": "ok"}) is None
+    assert listings_from_payload([{"foo": 1}]) is None
+
+if __name__ == "__main__":
+    test_replay_fixtures()
+    test_ignores_non_data_responses()
+    test_unknown_payload_falls_back()
+    print("All capture replays passed.")
@@ -0,0 +1,54 @@
+import json
+import tempfile
+from urllib.request import urlopen
+
+from backend.capture import listings_from_payload
+from backend.corpus import Corpus, record_page, synthesize
+from backend.parsing import parse_listing_rows
+from backend.stub_store import STUB_SERVERS, generate_listings, render_cells
+
+def rendered_table(listings):
+    """A results page as the browser renders it (see stub/store.html)."""
+    rows = "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in render_cells(l)) + "</tr>" for l in listings)
+    return f"<html><body><table><thead><tr><th>Item</th></tr></thead><tbody>{rows}</tbody></table></body></html>"
+
+def test_recorded_pages_replay_identically():
+    root = tempfile.mkdtemp()
+    listings = generate_listings("409", "Zehir Kılıcı+7")
+    pages = [listings[i:i + 20] for i in range(0, len(listings), 20)]
+    assert len(pages) > 1
+    for number, chunk in enumerate(pages, 1):
+        assert record_page(root, "Marmara", "409", "Zehir Kılıcı+7 ", number, rendered_table(chunk)) == len(chunk)
+
+    corpus = Corpus(root)
+    assert corpus.pages == len(pages) and corpus.page_size == 20
+    assert corpus.servers == {"Marmara": "409"} and corpus.searches() == [("Marmara", "Zehir Kılıcı+7")]
+    store = corpus.store()
+    for number, chunk in enumerate(pages, 1):
+        # What the replayed store sends is what the live page showed
+        payload = store.search("409", "Zehir Kılıcı+7", number)
+        assert payload["pages"] == len(pages)
+        assert listings_from_payload(payload) == parse_listing_rows(rendered_table(chunk))
+    assert store.search("409", "Unknown", 1)["data"] == []
+
+def test_synthetic_corpus_is_served_over_http():
+    root = tempfile.mkdtemp()
+    synthesize(root, servers={"Barbaros": STUB_SERVERS["Barbaros"]}, items=["Siyah Yuvarlak Kalkan"])
+    corpus = Corpus(root)
+    # Base names expand to their +0..+9 variants in scrape_store
+    assert corpus.searches() == [("Barbaros", "Siyah Yuvarlak Kalkan")]
+    assert len(corpus.rows) == 11 and corpus.page_size == 20
+
+    with corpus.store(latency=0) as store:
+        base = store.url.rsplit("/", 1)[0]
+        servers = json.load(urlopen(f"{base}/api/store/servers"))
+        payload = json.load(urlopen(f"{base}/api/store/search?server=57&q=Siyah%20Yuvarlak%20Kalkan%2B3&page=1"))
+    assert servers == [{"name": "Barbaros", "value": "57"}]
+    expected = generate_listings("57", "Siyah Yuvarlak Kalkan+3")
+    assert payload["recordsTotal"] == len(expected)
+    assert [l["seller"] for l in listings_from_payload(payload)] == [l["seller"] for l in expected[:20]]
+
+if __name__ == "__main__":
+    test_recorded_pages_replay_identically()
+    test_synthetic_corpus_is_served_over_http()
+    print("Corpus OK.")
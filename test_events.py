@@ -0,0 +1,131 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend import scraper
+from backend.database import init_db
+from backend.events import EventBus, event_bus
+from backend.main import app
+from backend.routers.events import sse_events
+
+ITEM = "Buz Yelpaze+2"
+
+def event(item, server="Hydra", type="listing-added", **fields):
+    return {"type": type, "item": item, "server": server, **fields}
+
+def drain(subscription):
+    return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+
+def test_bus_filters_and_fans_out_across_threads():
+    async def run():
+        bus = EventBus(buffer=2)
+        async with bus.subscribe(items=[ITEM]) as by_item, \
+                bus.subscribe(query="YELPAZE", servers=["Hydra"]) as by_query, \
+                bus.subscribe(types=["history-point"]) as history, \
+                bus.subscribe() as everything:
+            events = [event(ITEM, n=0), event("Bambu Yelpaze+3", n=1), event(ITEM, "Chimera", n=2),
+                      event("Zehir Kalkanı", type="history-point", n=3)]
+            publisher = threading.Thread(target=bus.publish_many, args=(events,))
+            publisher.start()
+            publisher.join()
+            await asyncio.sleep(0.05)
+            received = [[e["n"] for e in drain(s)] for s in (by_item, by_query, history, everything)]
+        assert not bus.has_subscribers
+        return received, everything.dropped
+
+    received, dropped = asyncio.run(run())
+    assert received == [[0, 2], [0, 1], [3], [0, 1]]
+    # A full buffer drops events instead of blocking the writer, and counts them for a resync
+    assert dropped == 2
+
+def test_subscribing_while_another_thread_publishes():
+    bus = EventBus(buffer=10)
+    stop, errors = threading.Event(), []
+
+    def publish():
+        try:
+            while not stop.is_set():
+                bus.publish_many([event(ITEM), event("Bambu Yelpaze+3")])
+        except Exception as e:
+            errors.append(e)
+
+    async def churn():
+        for i in range(2000):
+            async with bus.subscribe(items=[ITEM, f"Yelpaze+{i % 7}"]), bus.subscribe():
+                await asyncio.sleep(0)
+
+    async def run():
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        try:
+            await churn()
+        finally:
+            stop.set()
+            publisher.join()
+    asyncio.run(run())
+    assert errors == [] and not bus.has_subscribers
+
+def test_scrape_publishes_listing_and_history_events():
+    init_db()
+
+    def listing(seller, total):
+        return {"item_name": ITEM, "seller": seller, "quantity": 1, "price_won": 0, "price_yang": total,
+                "total_yang": total, "bonuses": ["Ortalama Zarar %12"]}
+
+    async def run():
+        async with event_bus.subscribe(servers=["Hydra"]) as subscription:
+            await scraper.save_to_db([listing("Ayaz", 300_000), listing("Kirpi", 500_000)], ITEM, "Hydra")
+            await scraper.analyze_market(ITEM, "Hydra")
+            await scraper.save_to_db([listing("Ayaz", 300_000), listing("Sis", 250_000)], ITEM, "Hydra")
+            scraper.close_writer()
+            await asyncio.sleep(0.05)
+            return drain(subscription)
+
+    events = asyncio.run(run())
+    assert [(e["type"], e.get("seller_name")) for e in events] == [
+        ("listing-added", "Ayaz"), ("listing-added", "Kirpi"), ("history-point", None),
+        ("listing-added", "Sis"), ("listing-removed", None),
+    ]
+    added, removed, point = events[0], events[4], events[2]
+    assert added["item"] == ITEM and added["server"] == "Hydra" and added["bonuses"] == ["Ortalama Zarar %12"]
+    assert removed["id"] == events[1]["id"] and removed["item"] == ITEM
+    assert point["min_unit_price"] == 300_000 and point["avg_unit_price"] == 400_000
+
+def test_sse_stream():
+    class Request:
+        # Connected for the first few checks only
+        def __init__(self, checks):
+            self.checks = checks
+
+        async def is_disconnected(self):
+            self.checks -= 1
+            return self.checks < 0
+
+    async def run():
+        bus = EventBus(buffer=1)
+        async with bus.subscribe() as subscription:
+            bus.publish_many([event(ITEM, n=0), event(ITEM, n=1)])
+            await asyncio.sleep(0.05)
+            return [chunk async for chunk in sse_events(Request(3), subscription, keepalive=0.01)]
+
+    chunks = asyncio.run(run())
+    assert chunks[0] == 'event: resync\ndata: {"dropped": 1}\n\n'
+    assert chunks[1].startswith("event: listing-added\n") and json.loads(chunks[1].split("data: ")[1])["n"] == 0
+    assert chunks[2:] == [": keep-alive\n\n", ": keep-alive\n\n"]
+
+    with TestClient(app) as client:
+        assert client.get("/events/stream", params={"type": "listing-sold"}).status_code == 400
+
+if __name__ == "__main__":
+    test_bus_filters_and_fans_out_across_threads()
+    test_subscribing_while_another_thread_publishes()
+    test_scrape_publishes_listing_and_history_events()
+    test_sse_stream()
+    print("Events OK.")
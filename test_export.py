@@ -0,0 +1,87 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend import scraper
+from backend.database import connect, init_db
+from backend.main import app
+from backend.routers import export
+
+ITEM = "Ejderha Yayı+5"
+
+def seed():
+    """Idempotent, so every test seeds for itself whatever ran before it."""
+    init_db()
+    listings = [{
+        "item_name": ITEM if i % 3 else "Ejderha Kalkanı", "seller": f"Seller{i}", "quantity": 1,
+        "price_won": 0, "price_yang": 0, "total_yang": 10_000_000 + i, "bonuses": [],
+    } for i in range(30)]
+
+    async def run():
+        # Unchanged listings are left alone; the history point is only recorded once
+        await scraper.save_to_db(listings, ITEM, "Germania")
+        conn = connect()
+        recorded = conn.execute("SELECT 1 FROM price_history WHERE item_name = ?", (ITEM,)).fetchone()
+        conn.close()
+        if not recorded:
+            await scraper.analyze_market(ITEM, "Germania")
+        scraper.close_writer()
+
+    asyncio.run(run())
+
+def test_streams_filtered_ndjson_and_csv():
+    seed()
+    # Several batches per export
+    batch, export.EXPORT_BATCH = export.EXPORT_BATCH, 7
+    try:
+        check_exports()
+    finally:
+        export.EXPORT_BATCH = batch
+
+def check_exports():
+    with TestClient(app) as client:
+        response = client.get("/market/export/listings", params={"server": "Germania", "item": "ejderha yayi"},
+                              headers={"Accept-Encoding": "identity"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert "content-encoding" not in response.headers
+        rows = [json.loads(line) for line in response.text.splitlines()]
+        assert len(rows) == 20 and {row["item"] for row in rows} == {ITEM}
+        assert set(rows[0]) == set(export.LISTING_COLUMNS) and rows[0]["server"] == "Germania"
+
+        response = client.get("/market/export/listings", params={"server": "Germania", "format": "csv"})
+        assert response.headers["content-encoding"] == "gzip"
+        table = list(csv.reader(io.StringIO(response.text)))
+        assert tuple(table[0]) == export.LISTING_COLUMNS and len(table) == 31
+
+        response = client.get("/market/export/listings", params={"server": "Atlantis", "format": "csv"})
+        assert response.text.strip() == ",".join(export.LISTING_COLUMNS)
+
+        response = client.get("/market/export/history", params={"server": "Germania", "item": ITEM})
+        points = [json.loads(line) for line in response.text.splitlines()]
+        assert len(points) == 1 and points[0]["min_unit_price"] == 10_000_001
+
+        assert client.get("/market/export/history", params={"format": "xml"}).status_code == 422
+
+def test_gzip_body_is_a_valid_gzip_stream():
+    seed()
+    with TestClient(app) as client:
+        with client.stream("GET", "/market/export/listings", params={"server": "Germania"},
+                           headers={"Accept-Encoding": "gzip"}) as response:
+            raw = b"".join(response.iter_raw())
+    lines = gzip.decompress(raw).decode().splitlines()
+    assert len(lines) == 30
+
+if __name__ == "__main__":
+    test_streams_filtered_ndjson_and_csv()
+    test_gzip_body_is_a_valid_gzip_stream()
+    print("Export OK.")
@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from backend import history_store
+from backend.history_store import COLUMNS, HEADER, RECORD, append, export_json, read, series_path
+
+START = datetime(2026, 5, 4, 12, 0, 0, 250_000)
+
+def point(i):
+    values = {column: 1_000_000 + i * 10 + n for n, column in enumerate(COLUMNS)}
+    values["p90_unit_price"] = None if i % 3 == 0 else values["p90_unit_price"]
+    return values
+
+def test_appends_are_memory_mapped_columns():
+    root = tempfile.mkdtemp()
+    assert len(read(7, 1, root)) == 0
+    for i in range(500):
+        append(7, 1, START + timedelta(minutes=15 * i), point(i), root)
+    append(8, 1, START, point(0), root)
+
+    records = read(7, 1, root)
+    assert len(records) == 500 and records.dtype == RECORD
+    assert os.path.getsize(series_path(7, 1, root)) == HEADER.size + 500 * RECORD.itemsize
+    assert records["min_unit_price"][42] == point(42)["min_unit_price"]
+    assert datetime.fromtimestamp(records["timestamp"][-1]) == START + timedelta(minutes=15 * 499)
+    assert len(read(8, 1, root)) == 1
+
+def test_torn_record_is_ignored_then_overwritten():
+    root = tempfile.mkdtemp()
+    append(7, 2, START, point(1), root)
+    with open(series_path(7, 2, root), "ab") as f:
+        f.write(b"\x01" * (RECORD.itemsize // 2))  # crash half-way through an append
+    assert len(read(7, 2, root)) == 1
+    append(7, 2, START + timedelta(hours=1), point(2), root)
+    records = read(7, 2, root)
+    assert len(records) == 2 and records["avg_unit_price"][1] == point(2)["avg_unit_price"]
+
+def test_streamed_json_export_matches_points():
+    root = tempfile.mkdtemp()
+    count = history_store.EXPORT_CHUNK + 10  # more than one streamed chunk
+    for i in range(count):
+        append(9, 3, START + timedelta(minutes=i), point(i), root)
+    path = os.path.join(root, "history.json")
+    export_json(9, 3, path, root)
+    with open(path, encoding="utf-8") as f:
+        exported = json.load(f)
+    assert len(exported) == count
+    assert exported[0] == {"timestamp": str(START), **point(0)}
+    assert exported[-1] == {"timestamp": str(START + timedelta(minutes=count - 1)), **point(count - 1)}
+
+    export_json(9, 4, path, root)
+    with open(path, encoding="utf-8") as f:
+        assert json.load(f) == []
+
+def test_prune_keeps_concurrent_appends():
+    root = tempfile.mkdtemp()
+    for i in range(2000):
+        append(5, 4, START + timedelta(minutes=i), point(i), root)
+    later = START + timedelta(days=10)
+
+    def appends():
+        for i in range(300):
+            append(5, 4, later + timedelta(minutes=i), point(i), root)
+
+    writer = threading.Thread(target=appends)
+    writer.start()
+    # Every pass swaps in a pruned file while the writer keeps appending
+    while writer.is_alive():
+        history_store.prune(START + timedelta(minutes=1000), root)
+    writer.join()
+    history_store.prune(START + timedelta(minutes=1000), root)
+
+    records = read(5, 4, root)
+    assert len(records) == 1000 + 300
+    assert datetime.fromtimestamp(records["timestamp"][-1]) == later + timedelta(minutes=299)
+
+if __name__ == "__main__":
+    test_appends_are_memory_mapped_columns()
+    test_torn_record_is_ignored_then_overwritten()
+    test_streamed_json_export_matches_points()
+    test_prune_keeps_concurrent_appends()
+    print("History store OK.")
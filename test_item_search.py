@@ -0,0 +1,65 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend.database import init_db
+from backend.db_writer import BulkWriter
+from backend.main import app
+from backend.search_index import fold, resolve_alias
+
+NAMES = ["Dolunay Kılıcı", "Dolunay Kılıcı+9", "Kırmızı Demir Pala+3", "İnci Kolye", "Şahin Kalkan+1", "Zehir Kılıcı"]
+
+def seed():
+    init_db()
+    writer = BulkWriter(os.environ["METIN2_DB_PATH"])
+    writer.write([{
+        "item_name": name, "seller": "Seller", "quantity": 1,
+        "price_won": 0, "price_yang": 1000, "total_yang": 1000, "bonuses": [],
+    } for name in NAMES], "", "Lodos")
+    writer.close()
+
+def test_turkish_folding():
+    assert fold("KILIÇ") == fold("kılıç") == fold("kilic") == "kilic"
+    assert fold("İNCİ") == fold("inci")
+    assert fold("Şahin Kalkan") == "sahin kalkan"
+    assert fold("Dağ") == "dag"
+    assert resolve_alias("KDP") == "Kırmızı Demir Pala"
+    assert resolve_alias("Kin Kılıcı") == "Kin Kılıcı"
+
+def test_search_endpoint_and_listing_filter():
+    seed()
+    with TestClient(app) as client:
+        def search(q, limit=10):
+            response = client.get("/market/items/search", params={"q": q, "limit": limit})
+            assert response.status_code == 200, response.text
+            return [row["name"] for row in response.json()]
+
+        # Other tests' items share the database; every hit must match, and only ours are known
+        found = search("KILIÇ", limit=50)
+        assert all("kilic" in fold(name) for name in found)
+        assert set(found) & set(NAMES) == {"Dolunay Kılıcı", "Dolunay Kılıcı+9", "Zehir Kılıcı"}
+        assert search("İNCİ") == ["İnci Kolye"]
+        assert search("sahin") == ["Şahin Kalkan+1"]
+        # Slang aliases, also while still typing them
+        assert search("kdp") == ["Kırmızı Demir Pala+3"]
+        assert search("kd") == ["Kırmızı Demir Pala+3"]
+        # Exact name first, then longer names containing it
+        found = search("dolunay kilici", limit=50)
+        assert found[0] == "Dolunay Kılıcı" and "Dolunay Kılıcı+9" in found[1:]
+        assert search("%") == []
+
+        def listing_items(item_name):
+            rows = client.get("/market/listings", params={"server": "Lodos", "item_name": item_name}).json()
+            return sorted(row["item"]["name"] for row in rows)
+
+        assert listing_items("kilici") == ["Dolunay Kılıcı", "Dolunay Kılıcı+9", "Zehir Kılıcı"]
+        assert listing_items("kdp") == ["Kırmızı Demir Pala+3"]
+
+if __name__ == "__main__":
+    test_turkish_folding()
+    test_search_endpoint_and_listing_filter()
+    print("Item search OK.")
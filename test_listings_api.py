@@ -0,0 +1,100 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend import models, schemas
+from backend.database import SessionLocal, engine, init_db
+from backend.db_writer import BulkWriter
+from backend.main import app
+
+def seed(count=250):
+    init_db()
+    writer = BulkWriter(os.environ["METIN2_DB_PATH"])
+    listings = [{
+        "item_name": f"Dolunay Kılıcı+{i % 10}",
+        "seller": f"Seller{i}",
+        "quantity": 1 + i % 3,
+        "price_won": i % 7,
+        "price_yang": (i * 7919) % 100_000 * 1000,
+        "total_yang": (i % 7) * 100_000_000 + (i * 7919) % 100_000 * 1000,
+        "bonuses": [f"Ortalama Zarar %{i % 50}", "Beceri Hasarı %-13"],
+    } for i in range(count)]
+    writer.write(listings, "Dolunay Kılıcı", "Marmara")
+    writer.close()
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self)
+
+def walk(client, sort_by, limit=40):
+    """Follows X-Next-Cursor to the end; returns (ids, queries per page)."""
+    ids, per_page, cursor = [], [], None
+    while True:
+        params = {"server": "Marmara", "sort_by": sort_by, "limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        with QueryCounter() as counter:
+            response = client.get("/market/listings", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        per_page.append(counter.count)
+        ids.extend(row["id"] for row in page)
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return ids, per_page, page
+
+def test_keyset_pages_are_complete_and_constant_cost():
+    seed()
+    with TestClient(app) as client:
+        for sort_by in ("newest", "price_asc", "price_desc"):
+            ids, per_page, _ = walk(client, sort_by)
+            assert len(ids) == 250 and len(set(ids)) == 250, sort_by
+            # Listings + eager relations: the same handful of queries whatever the page size
+            assert max(per_page) <= 3, (sort_by, per_page)
+
+        # Keyset order matches a plain full sort
+        full = client.get("/market/listings", params={"server": "Marmara", "sort_by": "price_asc", "limit": 1000}).json()
+        ids, _, _ = walk(client, "price_asc")
+        assert ids == [row["id"] for row in full]
+        prices = [row["total_price_yang"] for row in full]
+        assert prices == sorted(prices)
+        assert full[0]["bonuses"] and full[0]["server"]["name"] == "Marmara"
+
+def test_json_matches_response_model():
+    seed()
+    with TestClient(app) as client:
+        page = client.get("/market/listings", params={"server": "Marmara", "limit": 60}).json()
+    db = SessionLocal()
+    by_id = {listing.id: listing for listing in
+             db.query(models.Listing).filter(models.Listing.id.in_([row["id"] for row in page]))}
+    # What response_model=List[ListingOut] made of the ORM objects, key order included
+    expected = [schemas.ListingOut.model_validate(by_id[row["id"]]).model_dump(mode="json") for row in page]
+    db.close()
+    assert page == expected and all(list(row) == list(want) for row, want in zip(page, expected))
+    assert page[0]["bonuses"][0]["value_num"] is not None
+
+def test_bad_cursor_is_rejected():
+    with TestClient(app) as client:
+        response = client.get("/market/listings", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+
+if __name__ == "__main__":
+    test_keyset_pages_are_complete_and_constant_cost()
+    test_json_matches_response_model()
+    test_bad_cursor_is_rejected()
+    print("Listings pagination OK.")
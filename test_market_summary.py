@@ -0,0 +1,94 @@
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend.database import init_db
+from backend.db_writer import BulkWriter
+from backend.main import app
+from backend.market_summary import rebuild
+from backend.sketch import PriceSketch
+
+DB_PATH = os.environ["METIN2_DB_PATH"]
+SERVER = "Teutonia"
+
+def batch(rng, size):
+    listings = []
+    for i in range(size):
+        quantity = rng.choice([1, 1, 2, 5])
+        total = rng.randint(1, 500) * 1_000_000 * quantity
+        listings.append({
+            "item_name": f"Kin Kılıcı+{rng.randint(0, 3)}", "seller": f"Seller{rng.randint(1, 40)}",
+            "quantity": quantity, "price_won": total // 100_000_000, "price_yang": total % 100_000_000,
+            "total_yang": total, "bonuses": [],
+        })
+    return listings
+
+def stored_summary(conn):
+    return {row[0]: row[1:] for row in conn.execute("""
+        SELECT item_id, listing_count, min_unit_price, sum_unit_price FROM market_summary
+        WHERE server_id = (SELECT id FROM servers WHERE name = ?)
+    """, (SERVER,))}
+
+def recomputed(conn):
+    return {row[0]: row[1:] for row in conn.execute("""
+        SELECT item_id, COUNT(*), MIN(total_price_yang / quantity), SUM(total_price_yang / quantity) FROM listings
+        WHERE removed_at IS NULL AND quantity > 0 AND server_id = (SELECT id FROM servers WHERE name = ?)
+        GROUP BY item_id
+    """, (SERVER,))}
+
+def test_sketch_quantiles_and_removal():
+    rng = random.Random(1)
+    prices = [rng.randint(1, 10**10) for _ in range(5000)]
+    sketch = PriceSketch()
+    for p in prices:
+        sketch.add(p)
+    for p in prices[:2000]:
+        sketch.remove(p)
+    rest = sorted(prices[2000:])
+    for q in (0.1, 0.5, 0.9):
+        exact = rest[int(q * (len(rest) - 1))]
+        assert abs(sketch.quantile(q) - exact) <= exact * 0.011, q
+    assert PriceSketch.from_bytes(sketch.to_bytes()).buckets == sketch.buckets
+
+def test_summary_tracks_churn():
+    init_db()
+    rng = random.Random(5)
+    writer = BulkWriter(DB_PATH)
+    previous = []
+    for _ in range(8):
+        # Keep about half of the last batch so rows are both claimed and removed
+        listings = previous[::2] + batch(rng, 150)
+        writer.write(listings, "Kin Kılıcı", SERVER)
+        previous = listings
+        assert stored_summary(writer.conn) == recomputed(writer.conn)
+    writer.close()
+
+    conn = sqlite3.connect(DB_PATH)
+    before = stored_summary(conn)
+    rebuild(conn)
+    assert stored_summary(conn) == before
+
+    unit_prices = sorted(t // q for t, q in conn.execute("""
+        SELECT total_price_yang, quantity FROM listings
+        WHERE removed_at IS NULL AND item_id = (SELECT id FROM items WHERE name = 'Kin Kılıcı+0')
+    """))
+    conn.close()
+
+    with TestClient(app) as client:
+        top = {row["name"]: row for row in client.get("/market/stats/top-items").json()}
+        row = top["Kin Kılıcı+0"]
+        assert row["count"] == len(unit_prices) and row["min_unit_price"] == unit_prices[0]
+        median = statistics.median_low(unit_prices)
+        assert abs(row["median_unit_price"] - median) <= median * 0.011
+
+if __name__ == "__main__":
+    test_sketch_quantiles_and_removal()
+    test_summary_tracks_churn()
+    print("Market summary OK.")
@@ -0,0 +1,95 @@
+import asyncio
+import os
+import tempfile
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.metrics import (DB_ROWS_WRITTEN, DB_STATEMENTS, HTTP_REQUEST_QUERIES, HTTP_REQUEST_SECONDS,
+                             PARSE_FAILURES, Counter, Histogram, render)
+from backend.parsing import ROW_PARSERS
+from backend.scraper import analyze_market, close_writer, save_to_db
+
+ROW = ('<tr><td></td><td><div class="font-medium">Gök Mızrağı+3</div></td>'
+       '<td>1</td><td>{yang}</td><td>0</td><td>Seller</td></tr>')
+
+def test_text_format():
+    registry = []
+    pages = Counter("pages_total", "Pages read", ["source"], registry=registry)
+    latency = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1), registry=registry)
+    pages.inc(source="html")
+    pages.inc(3, source='pay"load')
+    latency.observe(0.05, route="/a")
+    latency.observe(0.1, route="/a")
+    latency.observe(2.5, route="/a")
+
+    assert render(registry).splitlines() == [
+        "# HELP pages_total Pages read",
+        "# TYPE pages_total counter",
+        'pages_total{source="html"} 1',
+        'pages_total{source="pay\\"load"} 3',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 2',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 2.65',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+def test_parse_failures_are_counted():
+    html = "<table><tbody>" + ROW.format(yang="1.000") + ROW.format(yang="1e999") + "</tbody></table>"
+    for name, parser in ROW_PARSERS.items():
+        before = PARSE_FAILURES.value(parser=name)
+        # int(inf) raises inside the row loop, which skips the row
+        assert len(parser().parse(html)) == 1
+        assert PARSE_FAILURES.value(parser=name) == before + 1
+
+def test_endpoint_latency_and_queries():
+    route = "/alerts/rules/{rule_id}"
+    before = HTTP_REQUEST_SECONDS.count(method="DELETE", route=route, status=404)
+    queries = HTTP_REQUEST_QUERIES.count(method="DELETE", route=route)
+    statements = HTTP_REQUEST_QUERIES.sum(method="DELETE", route=route)
+    with TestClient(app) as client:
+        assert client.get("/market/servers").status_code == 200
+        assert client.delete("/alerts/rules/987654").status_code == 404
+        response = client.get("/metrics")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+
+    # Labelled by route template, not by the raw path
+    assert HTTP_REQUEST_SECONDS.count(method="DELETE", route=route, status=404) == before + 1
+    assert HTTP_REQUEST_QUERIES.count(method="DELETE", route=route) == queries + 1
+    assert HTTP_REQUEST_QUERIES.sum(method="DELETE", route=route) > statements
+    assert 'route="/market/servers",status="200"' in response.text
+    assert "# TYPE metin2_scrape_phase_seconds histogram" in response.text
+
+def test_rows_written():
+    listings = [{"item_name": "Gök Mızrağı+3", "seller": f"Seller{i}", "quantity": 1, "price_won": 0,
+                 "price_yang": 1_000_000 + i, "total_yang": 1_000_000 + i, "bonuses": []} for i in range(5)]
+    inserted = DB_ROWS_WRITTEN.value(table="listings", op="insert")
+    removed = DB_ROWS_WRITTEN.value(table="listings", op="remove")
+    points = DB_ROWS_WRITTEN.value(table="price_history", op="insert")
+    statements = DB_STATEMENTS.value(source="background")
+
+    async def run():
+        await save_to_db(listings, "Gök Mızrağı+3", "Kronos")
+        await save_to_db(listings[:3], "Gök Mızrağı+3", "Kronos")
+        await analyze_market("Gök Mızrağı+3", "Kronos")
+    asyncio.run(run())
+    close_writer()
+
+    assert DB_ROWS_WRITTEN.value(table="listings", op="insert") == inserted + 5
+    assert DB_ROWS_WRITTEN.value(table="listings", op="remove") == removed + 2
+    assert DB_ROWS_WRITTEN.value(table="price_history", op="insert") == points + 1
+    # The writer's raw sqlite3 connection is counted too, not only the API's ORM sessions
+    assert DB_STATEMENTS.value(source="background") > statements
+
+if __name__ == "__main__":
+    test_text_format()
+    test_parse_failures_are_counted()
+    test_endpoint_latency_and_queries()
+    test_rows_written()
+    print("Metrics OK.")
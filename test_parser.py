@@ -0,0 +1,44 @@
+from backend.parsing import ROW_PARSERS, get_row_parser
+
+# Sample row from test_soup.py, scaled up to a full results page
+INFO_CELL = """
+<td class="px-4 py-2">
+    <div class="font-medium text-white text-sm">Dolunay Kılıcı+{level} <span class="text-purple-800 font-bold">Karanlığın gücü 7 (2,1,4)</span>
+    </div>
+    <div class="text-xs text-gray-400">
+        <span class="inline-block px-2 py-1 mr-1 mb-1 text-xs rounded bg-epic-900 text-epic-200 ">Ortalama Zarar %{od}</span><span class="inline-block px-2 py-1 mr-1 mb-1 text-xs rounded bg-gray-600 text-gray-300 ">Beceri Hasarı %-13</span><span class="inline-block px-2 py-1 mr-1 mb-1 text-xs rounded bg-epic-900 text-epic-200 ">Ölümsüzlere karşı güçlü +%20</span>
+    </div>
+</td>
+"""
+
+def build_page(rows):
+    body = []
+    for i in range(rows):
+        body.append(
+            "<tr>"
+            '<td><img src="/items/dolunay.png"></td>'
+            + INFO_CELL.format(level=i % 10, od=20 + i % 40)
+            + f"<td>{1 + i % 3}</td><td>{(i * 7919) % 99_999}.000</td><td>{i % 50}</td><td>Seller{i % 97}</td>"
+            "</tr>"
+        )
+    return "<html><body><table><tbody>" + "".join(body) + "</tbody></table></body></html>"
+
+def test_backends_match_reference():
+    html = build_page(50)
+    reference = get_row_parser("soup").parse(html)
+    assert len(reference) == 50
+    assert reference[0]["item_name"] == "Dolunay Kılıcı+0"
+    assert reference[0]["bonuses"][-1] == "Karanlığın gücü 7 (2,1,4)"
+
+    for name in ROW_PARSERS:
+        assert get_row_parser(name).parse(html) == reference, name
+
+def test_no_data_marker():
+    html = '<table><tbody><tr><td colspan="6">No data available in table</td></tr></tbody></table>'
+    for name in ROW_PARSERS:
+        assert get_row_parser(name).parse(html) is None, name
+
+if __name__ == "__main__":
+    test_backends_match_reference()
+    test_no_data_marker()
+    print("All row parsers agree.")
@@ -0,0 +1,172 @@
+import math
+import os
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend.database import init_db
+from backend.history_rollup import pick_bucket, query_history, record_point, rebuild
+from backend.main import app
+
+DB_PATH = os.environ["METIN2_DB_PATH"]
+ITEM = "Mavi Çelik Zırh"
+SERVERS = ("Nyx", "Oceana")
+START = datetime(2026, 3, 2)  # a Monday
+POINTS = 3000                 # ~31 days of 15-minute scrapes
+
+def price(i):
+    return int(50_000_000 + 10_000_000 * math.sin(i / 50) + (i % 7) * 100_000)
+
+def other_price(i):
+    return price(i) - 1_000_000
+
+def seed():
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR IGNORE INTO items (name, category) VALUES (?, 'Armor')", (ITEM,))
+    cursor.executemany("INSERT OR IGNORE INTO servers (name) VALUES (?)", [(name,) for name in SERVERS])
+    item_id = cursor.execute("SELECT id FROM items WHERE name = ?", (ITEM,)).fetchone()[0]
+    nyx, oceana = (cursor.execute("SELECT id FROM servers WHERE name = ?", (name,)).fetchone()[0]
+                   for name in SERVERS)
+    # Every test seeds for itself; the series goes in once
+    if cursor.execute("SELECT 1 FROM price_history WHERE item_id = ?", (item_id,)).fetchone():
+        return conn, item_id
+    for i in range(POINTS):
+        ts = START + timedelta(minutes=15 * i)
+        # Oceana is scraped half as often, during the first two weeks only
+        series = [(nyx, price(i))] + ([(oceana, other_price(i))] if i % 2 == 0 and i < 1344 else [])
+        for server_id, value in series:
+            cursor.execute("""
+                INSERT INTO price_history (item_id, server_id, item_name, avg_unit_price, min_unit_price,
+                                           total_listings, timestamp)
+                VALUES (?, ?, ?, ?, ?, 10, ?)
+            """, (item_id, server_id, ITEM, value * 2, value, ts))
+            record_point(cursor, item_id, server_id, ts, value * 2, value, 10)
+    conn.commit()
+    return conn, item_id
+
+def rollup_rows(conn, item_id):
+    return conn.execute("SELECT * FROM price_history_rollup WHERE item_id = ? ORDER BY server_id, bucket, bucket_start",
+                        (item_id,)).fetchall()
+
+def test_rollups_match_rebuild_and_bound_responses():
+    conn, item_id = seed()
+    incremental = rollup_rows(conn, item_id)
+    rebuild(conn)
+    assert rollup_rows(conn, item_id) == incremental
+    conn.close()
+
+    with TestClient(app) as client:
+        def history(server="Nyx", **params):
+            response = client.get("/market/stats/price-history",
+                                  params={"item_name": ITEM, "server": server, **params})
+            assert response.status_code == 200, response.text
+            return response.json(), response.headers["X-Bucket"]
+
+        rows, resolution = history()
+        assert resolution == "1h" and len(rows) == POINTS // 4
+
+        rows, resolution = history(bucket="1d")
+        assert resolution == "1d" and len(rows) == math.ceil(POINTS / 96)
+        first_day = [price(i) for i in range(96)]
+        assert (rows[0]["open"], rows[0]["high"], rows[0]["low"], rows[0]["close"]) == \
+            (first_day[0], max(first_day), min(first_day), first_day[-1])
+        assert rows[0]["avg_unit_price"] == round(sum(p * 2 for p in first_day) / 96)
+
+        rows, resolution = history(max_points=10)
+        assert resolution == "1w" and len(rows) == 5
+
+        rows, resolution = history(**{"from": "2026-03-03T00:00:00", "to": "2026-03-03T23:59:59"})
+        assert resolution == "raw" and len(rows) == 96
+
+        rows, _ = history(downsample="lttb", max_points=100)
+        assert len(rows) == 100
+        assert rows[0]["timestamp"] < rows[-1]["timestamp"]
+
+        assert client.get("/market/stats/price-history",
+                          params={"item_name": ITEM, "bucket": "5m"}).status_code == 422
+
+        # Without a server the series of every server are merged per bucket
+        rows, resolution = history(server=None, bucket="1d")
+        assert resolution == "1d" and len(rows) == math.ceil(POINTS / 96)
+        assert rows[0]["low"] == min(other_price(i) for i in range(0, 96, 2))
+        assert rows[0]["points"] == 96 + 48
+        assert rows[-1]["low"] == min(price(i) for i in range(POINTS - POINTS % 96, POINTS))
+
+        assert history(server="Marmara-does-not-exist") == ([], "raw")
+
+def test_compare_returns_aligned_columns():
+    seed()[0].close()
+    with TestClient(app) as client:
+        response = client.get("/market/stats/compare", params={
+            "item": ITEM, "server": list(SERVERS), "bucket": "1d",
+            "from": "2026-03-02T00:00:00", "to": "2026-03-31T23:59:59",
+        })
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["bucket"] == "1d" and len(body["timestamps"]) == 30
+        nyx, oceana = body["series"]
+        assert (nyx["server"], oceana["server"]) == SERVERS
+        assert all(len(s["min_unit_price"]) == len(body["timestamps"]) for s in body["series"])
+        assert nyx["min_unit_price"][0] == min(price(i) for i in range(96))
+        assert oceana["min_unit_price"][0] == min(other_price(i) for i in range(0, 96, 2))
+        # Oceana stops after two weeks; its later buckets line up as nulls
+        assert oceana["min_unit_price"][14:] == [None] * 16 and None not in nyx["min_unit_price"]
+
+        # A long range is coarsened to stay within max_points
+        response = client.get("/market/stats/compare", params={"item": ITEM, "server": list(SERVERS),
+                                                               "max_points": 10})
+        assert response.json()["bucket"] == "1w"
+
+        response = client.get("/market/stats/compare", params={"item": ITEM, "server": "Atlantis"})
+        assert response.status_code == 404
+        response = client.get("/market/stats/compare", params={"item": [f"{ITEM}+{i}" for i in range(51)],
+                                                               "server": "Nyx"})
+        assert response.status_code == 400
+
+def test_pick_bucket_boundaries():
+    # Exactly max_points aligned buckets fit; one minute more reaches into another bucket
+    day = datetime(2026, 3, 2)
+    assert pick_bucket((day, day + timedelta(hours=9, minutes=59)), 40) == "15m"
+    assert pick_bucket((day, day + timedelta(hours=10)), 40) == "1h"
+    assert pick_bucket((day, day + timedelta(hours=9)), 10, finest="1h") == "1h"
+    assert pick_bucket((day, day + timedelta(days=1000)), 10) == "1w"
+    assert pick_bucket(None, 10) == "15m"
+
+def test_misaligned_range_stays_within_max_points():
+    # 10:14 -> 12:44 is 2.5 hours, but starts mid-bucket: 11 quarter-hour buckets, not 10
+    item = f"{ITEM}+1"
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("INSERT OR IGNORE INTO items (name, category) VALUES (?, 'Armor')", (item,))
+    cursor.execute("INSERT OR IGNORE INTO servers (name) VALUES ('Nyx')")
+    item_id = cursor.execute("SELECT id FROM items WHERE name = ?", (item,)).fetchone()[0]
+    nyx = cursor.execute("SELECT id FROM servers WHERE name = 'Nyx'").fetchone()[0]
+    first = datetime(2026, 5, 4, 10, 14)
+    for i in range(16):
+        ts = first + timedelta(minutes=10 * i)
+        cursor.execute("""
+            INSERT INTO price_history (item_id, server_id, item_name, avg_unit_price, min_unit_price,
+                                       total_listings, timestamp)
+            VALUES (?, ?, ?, 2000, 1000, 10, ?)
+        """, (item_id, nyx, item, ts))
+        record_point(cursor, item_id, nyx, ts, 2000, 1000, 10)
+    conn.commit()
+
+    rows, resolution = query_history(conn, item_id, nyx, bucket="15m", max_points=10)
+    conn.close()
+    assert resolution == "1h" and len(rows) == 3
+
+if __name__ == "__main__":
+    test_rollups_match_rebuild_and_bound_responses()
+    test_compare_returns_aligned_columns()
+    test_pick_bucket_boundaries()
+    test_misaligned_range_stays_within_max_points()
+    print("Price history API OK.")
@@ -0,0 +1,82 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from backend import history_store, scraper
+from backend.database import init_db
+from backend.main import app
+from backend.price_stats import robust_stats
+
+def reference(unit, totals, quantities):
+    """Straightforward per-group version of robust_stats."""
+    p10, p25, p50, p75, p90 = np.percentile(unit, [10, 25, 50, 75, 90])
+    iqr = p75 - p25
+    keep = (unit >= p25 - 1.5 * iqr) & (unit <= p75 + 1.5 * iqr)
+    return {
+        "median_unit_price": round(p50), "p10_unit_price": round(p10), "p25_unit_price": round(p25),
+        "p75_unit_price": round(p75), "p90_unit_price": round(p90),
+        "trimmed_mean_unit_price": round(unit[keep].mean()),
+        "weighted_unit_price": round(totals[keep].sum() / quantities[keep].sum()),
+    }
+
+def test_vectorized_stats_match_per_group_reference():
+    rng = np.random.default_rng(3)
+    keys = rng.integers(0, 50, 20_000)
+    quantities = rng.choice([1, 2, 5, 200], 20_000)
+    totals = rng.lognormal(17, 0.3, 20_000).astype(np.int64) * quantities
+    stats = robust_stats(keys, totals, quantities)
+    assert set(stats) == set(range(50))
+    for key in (0, 17, 49):
+        mask = keys == key
+        unit = totals[mask] // quantities[mask]
+        assert stats[key] == reference(unit, totals[mask], quantities[mask]), key
+
+    # (item_id, server_id) rows group the same listings by both columns
+    pairs = robust_stats(np.column_stack([keys // 10, keys % 10]), totals, quantities)
+    assert pairs[(1, 7)] == stats[17]
+
+def test_troll_listings_do_not_move_robust_stats():
+    init_db()
+    listings = [{
+        "item_name": "Turna Kılıcı+9", "seller": f"Seller{i}", "quantity": 1,
+        "price_won": 0, "price_yang": 0, "total_yang": 39_000_000 + i * 100_000, "bonuses": [],
+    } for i in range(40)]
+    # Two troll listings at 999 won
+    listings += [{
+        "item_name": "Turna Kılıcı+9", "seller": f"Troll{i}", "quantity": 1,
+        "price_won": 999, "price_yang": 0, "total_yang": 99_900_000_000, "bonuses": [],
+    } for i in range(2)]
+
+    async def run():
+        await scraper.save_to_db(listings, "Turna Kılıcı+9", "Charon")
+        await scraper.analyze_market("Turna Kılıcı+9", "Charon")
+        scraper.close_writer()
+
+    asyncio.run(run())
+    with TestClient(app) as client:
+        point = client.get("/market/stats/price-history", params={"item_name": "Turna Kılıcı+9", "server": "Charon"}).json()[-1]
+    assert point["avg_unit_price"] > 4_000_000_000
+    assert 39_000_000 <= point["median_unit_price"] <= 43_000_000
+    assert 39_000_000 <= point["trimmed_mean_unit_price"] <= 43_000_000
+    assert point["weighted_unit_price"] == point["trimmed_mean_unit_price"]
+
+    # The same point was appended to the binary history store
+    conn = sqlite3.connect(os.environ["METIN2_DB_PATH"])
+    item_id, server_id = conn.execute("""
+        SELECT i.id, s.id FROM items i, servers s WHERE i.name = 'Turna Kılıcı+9' AND s.name = 'Charon'
+    """).fetchone()
+    conn.close()
+    stored = history_store.read(item_id, server_id)[-1]
+    assert stored["median_unit_price"] == point["median_unit_price"]
+
+if __name__ == "__main__":
+    test_vectorized_stats_match_per_group_reference()
+    test_troll_listings_do_not_move_robust_stats()
+    print("Price stats OK.")
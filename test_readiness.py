@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from backend import readiness, scraper
+from backend.browser_pool import BrowserPool
+from backend.stub_store import StubStore, generate_listings
+
+# The stub store draws a "Loading..." row asynchronously while each search
+# runs, so a wait that takes any table mutation as ready reads the placeholder.
+
+async def scrape(store, queries):
+    scraper.URL = store.url
+    pool = BrowserPool(1)
+    try:
+        await pool.start()
+    except Exception as e:
+        await pool.close()
+        pytest.skip(f"Chromium cannot be launched here: {e}")
+    try:
+        async with pool.lease() as slot:
+            await scraper.open_store(slot, scraper.SERVER_MAPPING["Marmara"])
+            results = []
+            for query in queries:
+                try:
+                    results.append(await scraper.scrape_query(slot.page, query))
+                except TimeoutError as e:
+                    results.append(e)
+            return results
+    finally:
+        await pool.close()
+
+def test_loading_row_is_not_read_as_the_result():
+    with StubStore(latency=0.3) as store:
+        (listings, pages), (empty, _) = asyncio.run(scrape(store, ["Dolunay Kılıcı+3", "Bilinmeyen Eşya"]))
+    expected = generate_listings("409", "Dolunay Kılıcı+3")
+    assert pages > 1
+    assert [l["seller"] for l in listings] == [l["seller"] for l in expected]
+    assert empty == []
+
+def test_unsettled_table_times_out():
+    timeout = readiness.READY_TIMEOUT_MS
+    readiness.READY_TIMEOUT_MS = 500
+    try:
+        # Still on the loading row when the wait gives up
+        with StubStore(latency=2) as store:
+            (result,) = asyncio.run(scrape(store, ["Dolunay Kılıcı+3"]))
+    finally:
+        readiness.READY_TIMEOUT_MS = timeout
+    assert isinstance(result, TimeoutError)
+
+if __name__ == "__main__":
+    test_loading_row_is_not_read_as_the_result()
+    test_unsettled_table_times_out()
+    print("Readiness OK.")
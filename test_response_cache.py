@@ -0,0 +1,80 @@
+import os
+import tempfile
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend.database import init_db
+from backend.db_writer import BulkWriter
+from backend.main import app
+from backend.response_cache import ResponseCache, response_cache
+
+DB_PATH = os.environ["METIN2_DB_PATH"]
+FAN = "Ateş Yelpaze+1"
+SHIELD = "Ateş Kalkanı+1"
+
+def test_lru_ttl_and_budget():
+    now = [0.0]
+    cache = ResponseCache(max_bytes=10, ttl=60, clock=lambda: now[0])
+    cache.put("a", 1, b"aaaa", {})
+    cache.put("b", 1, b"bbbb", {})
+    assert cache.get("a", 1).body == b"aaaa"
+    # Over budget: "b" is the least recently used
+    cache.put("c", 1, b"cccc", {})
+    assert cache.get("b", 1) is None and len(cache) == 2 and cache.size == 8
+    # A newer data version is a miss, and drops the stale entry
+    assert cache.get("a", 2) is None and len(cache) == 1
+    now[0] = 61
+    assert cache.get("c", 1) is None and cache.size == 0
+    # Too big to ever fit: served but not kept
+    assert cache.put("d", 1, b"d" * 11, {}).etag and len(cache) == 0
+
+def write(*listings):
+    writer = BulkWriter(DB_PATH)
+    for item, seller, total in listings:
+        writer.write([{"item_name": item, "seller": seller, "quantity": 1, "price_won": 0, "price_yang": total,
+                       "total_yang": total, "bonuses": []}], item, "Pegasus")
+    writer.close()
+
+def test_cached_until_scope_changes():
+    init_db()
+    write((FAN, "Kor", 100_000), (SHIELD, "Kor", 200_000))
+    with TestClient(app) as client:
+        def get(path, **params):
+            return client.get(path, params=params)
+
+        fans = get("/market/listings", server="Pegasus", item_name="ates yelpaze")
+        assert fans.status_code == 200 and [row["seller_name"] for row in fans.json()] == ["Kor"]
+        etag = fans.headers["etag"]
+        hits = response_cache.hits
+        # Parameter order does not matter; an unchanged response comes back as a bodiless 304
+        again = client.get("/market/listings", params=[("item_name", "ates yelpaze"), ("server", "Pegasus")],
+                           headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b"" and response_cache.hits == hits + 1
+        whole_server = get("/market/listings", server="Pegasus")
+        servers = get("/market/servers")
+
+        # A commit on another item of the same server leaves the fan listings cached
+        write((SHIELD, "Duman", 150_000))
+        assert get("/market/listings", server="Pegasus", item_name="ates yelpaze").headers["etag"] == etag
+        assert response_cache.hits == hits + 2
+        assert get("/market/listings", server="Pegasus").headers["etag"] != whole_server.headers["etag"]
+        assert get("/market/servers").json() == servers.json()
+
+        # ...and one on the fan (Duman listed, Kor sold) invalidates them
+        write((FAN, "Duman", 90_000))
+        fresh = client.get("/market/listings", params={"server": "Pegasus", "item_name": "ates yelpaze"},
+                           headers={"If-None-Match": etag})
+        assert fresh.status_code == 200 and fresh.headers["etag"] != etag
+        assert [row["seller_name"] for row in fresh.json()] == ["Duman"]
+
+        history = get("/market/stats/price-history", item_name=FAN, server="Pegasus")
+        assert history.status_code == 200 and history.headers["x-bucket"] == "raw"
+        assert get("/market/stats/price-history", item_name=FAN, server="Pegasus").headers["x-bucket"] == "raw"
+
+if __name__ == "__main__":
+    test_lru_ttl_and_budget()
+    test_cached_until_scope_changes()
+    print("Response cache OK.")
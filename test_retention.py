@@ -0,0 +1,85 @@
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from backend import history_store, retention
+from backend.database import connect, init_db
+from backend.history_rollup import query_history, record_point, watermarks
+
+# Retention prunes every series, so it runs on a database of its own
+DB_PATH = os.path.join(tempfile.mkdtemp(), "retention.db")
+NOW = datetime(2026, 6, 1)
+DAYS = 120
+POLICY = {"raw": 30, "15m": 30, "1h": 60, "1d": 0, "1w": 0}
+
+def seed(store_root):
+    init_db(DB_PATH)
+    conn = connect(DB_PATH)
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO items (name, category) VALUES ('Kaplan Eldiveni+4', 'Armor')")
+    cursor.execute("INSERT INTO servers (name) VALUES ('Ares')")
+    item_id, server_id = cursor.execute("SELECT (SELECT id FROM items), (SELECT id FROM servers)").fetchone()
+    for i in range(DAYS * 24):
+        ts = NOW - timedelta(days=DAYS) + timedelta(hours=i)
+        price = 1_000_000 + i
+        cursor.execute("""
+            INSERT INTO price_history (item_id, server_id, item_name, avg_unit_price, min_unit_price, total_listings, timestamp)
+            VALUES (?, ?, 'Kaplan Eldiveni+4', ?, ?, 5, ?)
+        """, (item_id, server_id, price, price, ts))
+        record_point(cursor, item_id, server_id, ts, price, price, 5)
+        history_store.append(item_id, server_id, ts, {"min_unit_price": price}, store_root)
+    for i, removed_at in enumerate([NOW - timedelta(days=40), NOW - timedelta(days=5), None]):
+        cursor.execute("""
+            INSERT INTO listings (server_id, item_id, seller_name, quantity, total_price_yang, removed_at)
+            VALUES (?, ?, ?, 1, 1000, ?)
+        """, (server_id, item_id, f"Seller{i}", removed_at))
+        cursor.execute("INSERT INTO listing_bonuses (listing_id, bonus_name) VALUES (?, 'Savunma +20')",
+                       (cursor.lastrowid,))
+    conn.commit()
+    return conn, item_id, server_id
+
+def test_prunes_old_points_and_reads_fall_back_to_rollups():
+    store_root = tempfile.mkdtemp()
+    conn, item_id, server_id = seed(store_root)
+    full_range = query_history(conn, item_id, server_id, bucket="1h")[0]
+    assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    # Small batches: many short transactions
+    stats = retention.run(conn, NOW, POLICY, removed_days=30, batch=500, pause=0, store_root=store_root)
+    assert stats["history"]["raw"] == (DAYS - 30) * 24
+    assert stats["history"]["1h"] == (DAYS - 60) * 24 and "1d" not in stats["history"]
+    assert stats["listings"] == 1 and stats["store_points"] == (DAYS - 30) * 24
+    assert stats["reclaimed_bytes"] > 0
+    assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+    cutoff = NOW - timedelta(days=30)
+    assert conn.execute("SELECT MIN(timestamp) FROM price_history").fetchone()[0] == str(cutoff)
+    assert watermarks(conn)["raw"] == cutoff and "1d" not in watermarks(conn)
+    sellers = [row[0] for row in conn.execute("SELECT seller_name FROM listings ORDER BY id")]
+    assert sellers == ["Seller1", "Seller2"]
+    assert conn.execute("SELECT COUNT(*) FROM listing_bonuses").fetchone()[0] == 2
+    assert history_store.read(item_id, server_id, store_root)["timestamp"].min() == cutoff.timestamp()
+
+    # The last 30 days still come from raw points
+    recent, resolution = query_history(conn, item_id, server_id, start=cutoff)
+    assert resolution == "raw" and len(recent) == 30 * 24
+    # Older ranges switch to the finest rollup still covering them
+    _, resolution = query_history(conn, item_id, server_id, start=NOW - timedelta(days=40))
+    assert resolution == "1h"
+    rows, resolution = query_history(conn, item_id, server_id, start=NOW - timedelta(days=DAYS), bucket="1h")
+    assert resolution == "1d" and len(rows) == DAYS
+    assert rows[0]["min_unit_price"] == full_range[0]["min_unit_price"]
+
+    # A second pass has nothing left to do and never moves a watermark back
+    again = retention.run(conn, NOW - timedelta(days=1), POLICY, removed_days=30, batch=500, pause=0,
+                          store_root=store_root)
+    assert sum(again["history"].values()) == 0 and again["listings"] == 0
+    assert watermarks(conn)["raw"] == cutoff
+    conn.close()
+
+if __name__ == "__main__":
+    test_prunes_old_points_and_reads_fall_back_to_rollups()
+    print("Retention OK.")
@@ -0,0 +1,107 @@
+import asyncio
+import os
+import tempfile
+import threading
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend import scraper
+from backend.database import connect
+from backend.jobs import JobQueue
+from backend.main import app, scrape_jobs
+
+def test_identical_pending_jobs_coalesce():
+    async def run():
+        release = asyncio.Event()
+        started = []
+
+        async def runner(job):
+            started.append(job.id)
+            job.add_page(20)
+            await release.wait()
+
+        queue = await JobQueue(workers=1, runner=runner).start()
+        first, _ = queue.submit("Dolunay", "Marmara")
+        await asyncio.sleep(0)  # worker picks up the first job
+        second, coalesced_second = queue.submit("Dolunay", "Marmara")
+        third, coalesced_third = queue.submit("dolunay ", "Marmara")
+        other, coalesced_other = queue.submit("Dolunay", "Lodos")
+
+        # The running job is not joined; the waiting one is
+        assert first.status == "running"
+        assert second is not first and not coalesced_second
+        assert third is second and coalesced_third and second.requests == 2
+        assert other is not second and not coalesced_other
+
+        release.set()
+        await queue._queue.join()
+        await queue.stop()
+        assert started == [first.id, second.id, other.id]
+        assert [j.status for j in (first, second, other)] == ["done"] * 3
+        assert first.to_dict()["progress"] == {"pages": 1, "listings": 20}
+
+    asyncio.run(run())
+
+def test_failed_job_reports_error():
+    async def run():
+        async def runner(job):
+            raise RuntimeError("store unreachable")
+
+        queue = await JobQueue(workers=1, runner=runner).start()
+        job, _ = queue.submit("Zehir", "Marmara")
+        await queue._queue.join()
+        await queue.stop()
+        assert job.status == "failed" and "store unreachable" in job.error
+        assert job.to_dict()["timings"]["running"] is not None
+
+    asyncio.run(run())
+
+def test_scrape_endpoint_returns_job_immediately():
+    async def runner(job):
+        job.add_page(5)
+
+    scrape_jobs.runner = runner
+    with TestClient(app) as client:
+        response = client.post("/scrape", json={"query": "Dolunay", "server": "Marmara"})
+        assert response.status_code == 202, response.text
+        job_id = response.json()["job_id"]
+
+        status = client.get(f"/scrape/{job_id}").json()
+        while status["status"] in ("queued", "running"):
+            status = client.get(f"/scrape/{job_id}").json()
+        assert status["status"] == "done" and status["progress"]["pages"] == 1
+
+        assert client.get("/scrape/nope").status_code == 404
+        assert client.post("/scrape", json={"query": "Dolunay", "server": "Atlantis"}).status_code == 400
+
+def test_writes_run_off_the_event_loop():
+    listings = [{"item_name": "Kartal Yayı+5", "seller": f"Seller{i}", "quantity": 1, "price_won": 0,
+                 "price_yang": 2_000_000 + i, "total_yang": 2_000_000 + i, "bonuses": []} for i in range(3)]
+    threads = []
+
+    async def run():
+        writer = await scraper.on_db_thread(scraper.get_writer)
+        writer.listeners.append(lambda conn, batch: threads.append(threading.current_thread().name))
+        try:
+            await scraper.save_to_db(listings, "Kartal Yayı+5", "Europe")
+            await scraper.analyze_market("Kartal Yayı+5", "Europe")
+        finally:
+            writer.listeners.pop()
+    asyncio.run(run())
+    scraper.close_writer()
+
+    assert threads and all(name.startswith("db-writer") for name in threads)
+    conn = connect()
+    points = conn.execute("SELECT COUNT(*) FROM price_history WHERE item_name = 'Kartal Yayı+5'").fetchone()[0]
+    conn.close()
+    assert points == 1
+
+if __name__ == "__main__":
+    test_identical_pending_jobs_coalesce()
+    test_failed_job_reports_error()
+    test_scrape_endpoint_returns_job_immediately()
+    test_writes_run_off_the_event_loop()
+    print("Scrape jobs OK.")
@@ -0,0 +1,111 @@
+import asyncio
+import os
+import tempfile
+from contextlib import asynccontextmanager
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from backend import history_store, scraper
+from backend.database import connect, init_db
+
+ITEM = "Yılan Kılıcı+4"
+
+class Slot:
+    index = 0
+    page = None
+    capture = None
+
+    def reset(self):
+        pass
+
+class Pool:
+    """Hands out one page-less slot; scrape_query is replaced, so no browser is needed."""
+
+    @asynccontextmanager
+    async def lease(self, server_value=None):
+        yield Slot()
+
+def run_scrapes(results):
+    """Runs run_job once per entry of `results`, each the listings that scrape 'returns'."""
+    real_open_store, real_scrape_query = scraper.open_store, scraper.scrape_query
+
+    async def open_store(slot, server_value):
+        pass
+
+    async def run():
+        jobs = []
+        for listings in results:
+            async def scrape_query(page, query, capture=None, on_page=None, record=None, listings=listings):
+                return list(listings), 1
+            scraper.scrape_query = scrape_query
+            jobs.append(await scraper.run_job(Pool(), "Safir", ITEM))
+        return jobs
+
+    scraper.open_store = open_store
+    try:
+        return asyncio.run(run())
+    finally:
+        scraper.open_store, scraper.scrape_query = real_open_store, real_scrape_query
+        scraper.close_writer()
+
+def test_scraper_init_db():
+    # The `python scraper.py` entry point runs this before anything else
+    scraper.init_db()
+    conn = connect()
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+    assert {"listings", "price_history", "price_history_rollup"} <= tables
+
+def test_sold_out_item_closes_its_listings():
+    init_db()
+    listings = [{"item_name": ITEM, "seller": f"Seller{i}", "quantity": 1, "price_won": 0,
+                 "price_yang": 3_000_000 + i, "total_yang": 3_000_000 + i, "bonuses": []} for i in range(4)]
+    first, sold_out = run_scrapes([listings, []])
+    assert first["ok"] and first["listings"] == 4
+    assert sold_out["ok"] and sold_out["listings"] == 0
+
+    conn = connect()
+    open_listings, closed = conn.execute("""
+        SELECT SUM(l.removed_at IS NULL), SUM(l.removed_at IS NOT NULL) FROM listings l
+        JOIN items i ON l.item_id = i.id JOIN servers s ON l.server_id = s.id
+        WHERE i.name = ? AND s.name = 'Safir'
+    """, (ITEM,)).fetchone()
+    summary = conn.execute("""
+        SELECT COUNT(*) FROM market_summary m JOIN items i ON m.item_id = i.id
+        WHERE i.name = ? AND m.listing_count > 0
+    """, (ITEM,)).fetchone()[0]
+    conn.close()
+    assert (open_listings, closed) == (0, 4)
+    assert summary == 0
+
+def test_failing_history_mirror_does_not_fail_analysis():
+    init_db()
+    item = "Yılan Kılıcı+6"
+    listings = [{"item_name": item, "seller": "Seller", "quantity": 1, "price_won": 0,
+                 "price_yang": 4_000_000, "total_yang": 4_000_000, "bonuses": []}]
+
+    def append(*args):
+        raise OSError("disk full")
+
+    async def run():
+        await scraper.save_to_db(listings, item, "Safir")
+        await scraper.analyze_market(item, "Safir")
+
+    real_append, history_store.append = history_store.append, append
+    try:
+        asyncio.run(run())
+    finally:
+        history_store.append = real_append
+        scraper.close_writer()
+
+    conn = connect()
+    points = conn.execute("SELECT COUNT(*) FROM price_history WHERE item_name = ?", (item,)).fetchone()[0]
+    conn.close()
+    assert points == 1
+
+if __name__ == "__main__":
+    test_scraper_init_db()
+    test_sold_out_item_closes_its_listings()
+    test_failing_history_mirror_does_not_fail_analysis()
+    print("Scraper OK.")
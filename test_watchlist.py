@@ -0,0 +1,150 @@
+import asyncio
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before backend.database is imported
+os.environ.setdefault("METIN2_DB_PATH", os.path.join(tempfile.mkdtemp(), "test.db"))
+
+from fastapi.testclient import TestClient
+
+from backend.database import init_db
+from backend.jobs import JobQueue
+from backend.main import app
+from backend.scheduler import WatchlistScheduler, add_entry
+from backend.search_index import sync_items
+from backend.watchlist import DEFAULT_INTERVAL, MAX_INTERVAL, MIN_INTERVAL, interval_for, volatility
+
+DB_PATH = os.environ["METIN2_DB_PATH"]
+
+def seed_history():
+    init_db()
+    conn = sqlite3.connect(DB_PATH)
+    conn.executemany("INSERT OR IGNORE INTO items (name, category) VALUES (?, 'General')",
+                     [("Geyik Boynuzu Yay+9",), ("Abonoz Küpe",)])
+    conn.execute("INSERT OR IGNORE INTO servers (name) VALUES ('Ezel')")
+    sync_items(conn)
+    start = datetime(2026, 1, 1)
+    rows = []
+    for i in range(12):
+        # One item swinging +-30%, the other flat
+        rows.append(("Geyik Boynuzu Yay+9", 1_000_000 * (1.3 if i % 2 else 0.7), start + timedelta(hours=i)))
+        rows.append(("Abonoz Küpe", 500_000, start + timedelta(hours=i)))
+    conn.executemany("""
+        INSERT INTO price_history (item_id, server_id, item_name, avg_unit_price, min_unit_price,
+                                   total_listings, timestamp)
+        VALUES ((SELECT id FROM items WHERE name = ?), (SELECT id FROM servers WHERE name = 'Ezel'), ?, ?, ?, 1, ?)
+    """, [(name, name, int(price), int(price), ts) for name, price, ts in rows])
+    conn.commit()
+    return conn
+
+def test_interval_shrinks_with_volatility():
+    assert interval_for(None) == DEFAULT_INTERVAL
+    assert interval_for(0.0) == MAX_INTERVAL
+    assert interval_for(5.0) == MIN_INTERVAL
+    assert MAX_INTERVAL > interval_for(0.01) > interval_for(0.05) > MIN_INTERVAL
+
+    conn = seed_history()
+    ezel = conn.execute("SELECT id FROM servers WHERE name = 'Ezel'").fetchone()[0]
+    assert volatility(conn, "gby", ezel) > 0.25       # alias resolves to the swinging item
+    assert volatility(conn, "Abonoz Küpe", ezel) == 0
+    assert volatility(conn, "Kin Kılıcı", ezel) is None
+    assert volatility(conn, "gby", ezel + 1) is None  # history is per server
+    conn.close()
+
+def test_scheduler_dispatches_due_entries_adaptively():
+    seed_history()
+    with TestClient(app) as client:
+        for query in ("gby", "Abonoz Küpe", "Kin Kılıcı"):
+            response = client.post("/watchlist", json={"query": query, "server": "Ezel"})
+            assert response.status_code == 201, response.text
+        entries = {e["query"]: e for e in client.get("/watchlist").json()}
+        assert set(entries) == {"gby", "Abonoz Küpe", "Kin Kılıcı"}
+
+    async def run():
+        submitted = []
+
+        async def runner(job):
+            submitted.append((job.query, job.server))
+
+        jobs = await JobQueue(workers=1, runner=runner).start()
+        scheduler = WatchlistScheduler(jobs, DB_PATH)
+        now = datetime.now()
+        first = scheduler.run_once(now)
+        # Nothing is due again a moment later
+        again = scheduler.run_once(now + timedelta(seconds=1))
+        await jobs._queue.join()
+        await jobs.stop()
+        return first, again, submitted
+
+    first, again, submitted = asyncio.run(run())
+    assert len(first) == 3 and again == []
+    assert ("gby", "Ezel") in submitted
+
+    with TestClient(app) as client:
+        entries = {e["query"]: e for e in client.get("/watchlist").json()}
+        assert entries["gby"]["interval_minutes"] < entries["Kin Kılıcı"]["interval_minutes"]
+        assert entries["Kin Kılıcı"]["interval_minutes"] < entries["Abonoz Küpe"]["interval_minutes"]
+
+        assert client.delete(f"/watchlist/{entries['gby']['id']}").status_code == 204
+        assert client.delete(f"/watchlist/{entries['gby']['id']}").status_code == 404
+
+def test_new_watchlist_server_invalidates_server_list():
+    init_db()
+    with TestClient(app) as client:
+        assert "Star" not in [s["name"] for s in client.get("/market/servers").json()]
+        assert client.post("/watchlist", json={"query": "Abonoz Küpe", "server": "Star"}).status_code == 201
+        # Served from the cache unless adding the server bumped the data version
+        assert "Star" in [s["name"] for s in client.get("/market/servers").json()]
+
+def test_unknown_watchlist_server_is_rejected():
+    with TestClient(app) as client:
+        response = client.post("/watchlist", json={"query": "Abonoz Küpe", "server": "Atlantis"})
+        assert response.status_code == 400
+        assert "Atlantis" not in [s["name"] for s in client.get("/market/servers").json()]
+
+def test_add_entry_rejects_unknown_servers():
+    init_db()
+    try:
+        add_entry(DB_PATH, "Abonoz Küpe", "Atlantis")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("add_entry accepted an unknown server")
+    conn = sqlite3.connect(DB_PATH)
+    assert conn.execute("SELECT COUNT(*) FROM servers WHERE name = 'Atlantis'").fetchone()[0] == 0
+    conn.close()
+
+def test_scheduler_tick_queries_off_the_event_loop():
+    init_db()
+    add_entry(DB_PATH, "Kin Kılıcı", "Safir")
+
+    async def run():
+        jobs = await JobQueue(workers=1, runner=lambda job: asyncio.sleep(0)).start()
+        scheduler = WatchlistScheduler(jobs, DB_PATH, tick=60)
+        threads, claim_due = [], scheduler.claim_due
+
+        def claim(now=None):
+            threads.append(threading.current_thread())
+            return claim_due(now)
+        scheduler.claim_due = claim
+        scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        await jobs.stop()
+        return threads, [job.query for job in jobs.jobs.values()]
+
+    threads, queries = asyncio.run(run())
+    assert threads and threading.main_thread() not in threads
+    assert "Kin Kılıcı" in queries
+
+if __name__ == "__main__":
+    test_interval_shrinks_with_volatility()
+    test_scheduler_dispatches_due_entries_adaptively()
+    test_new_watchlist_server_invalidates_server_list()
+    test_unknown_watchlist_server_is_rejected()
+    test_add_entry_rejects_unknown_servers()
+    test_scheduler_tick_queries_off_the_event_loop()
+    print("Watchlist scheduler OK.")